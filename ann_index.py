@@ -0,0 +1,377 @@
+"""
+⚡ JOB INTELLIGENT - Recherche approximative (ANN) pour le corpus complet
+
+Mode de recherche optionnel pour les gros corpus (553K+ offres) :
+    1. Les lignes TF-IDF sont projetées dans un espace dense de faible
+       dimension (TruncatedSVD, comme dans le notebook)
+    2. Un index IVF (k-means sphérique en NumPy pur) range chaque offre dans
+       la liste de son centroïde le plus proche
+    3. À la requête, seules les ``nprobe`` listes les plus proches du profil
+       sont lues : elles forment une liste restreinte de candidats, re-classée
+       EXACTEMENT sur les vecteurs TF-IDF creux (mêmes scores que la
+       recherche exacte)
+
+``nprobe`` règle le compromis latence / qualité ; ``evaluate_recall`` mesure
+le rappel@k par rapport à la recherche exacte pour choisir sa valeur.
+
+Usage :
+    python ann_index.py build model/ --components 128 --lists 1024
+    python ann_index.py evaluate model/ --k 10
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import scipy.sparse as sp
+
+from model_store import model_snapshot
+from recommender import search as exact_search
+
+
+ANN_DIR = "ann"
+ANN_FILE = "ann.json"
+
+
+# ============================================================================
+# K-MEANS SPHÉRIQUE
+# ============================================================================
+
+def _normalize_rows(matrix):
+    """Normalise les lignes (norme L2), les lignes nulles restent nulles."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _assign(embeddings, centroids, batch_size=65536):
+    """Indice du centroïde le plus proche (cosinus) de chaque ligne."""
+    labels = np.empty(len(embeddings), dtype=np.int32)
+    for start in range(0, len(embeddings), batch_size):
+        block = embeddings[start:start + batch_size]
+        labels[start:start + batch_size] = np.argmax(block @ centroids.T, axis=1)
+    return labels
+
+
+def spherical_kmeans(embeddings, n_clusters, n_iter=20, seed=0):
+    """
+    K-means sur la sphère unité (similarité cosinus)
+
+    Args:
+        embeddings (np.ndarray): Lignes normalisées (n x d)
+        n_clusters (int): Nombre de centroïdes
+        n_iter (int): Nombre d'itérations de Lloyd
+        seed (int): Graine aléatoire
+
+    Returns:
+        np.ndarray: Centroïdes normalisés (n_clusters x d, float32)
+    """
+
+    rng = np.random.default_rng(seed)
+    n_rows = len(embeddings)
+    centroids = embeddings[rng.choice(n_rows, n_clusters, replace=False)].copy()
+
+    for _ in range(n_iter):
+        labels = _assign(embeddings, centroids)
+
+        # Somme des membres de chaque cluster par un produit creux indicateur
+        membership = sp.csr_matrix(
+            (np.ones(n_rows, dtype=embeddings.dtype), (labels, np.arange(n_rows))),
+            shape=(n_clusters, n_rows)
+        )
+        sums = np.asarray(membership @ embeddings)
+
+        # Clusters vides : ré-initialisés sur des points tirés au hasard
+        empty = np.flatnonzero(np.asarray(membership.sum(axis=1)).ravel() == 0)
+        if len(empty):
+            sums[empty] = embeddings[rng.choice(n_rows, len(empty), replace=False)]
+
+        centroids = _normalize_rows(sums).astype(np.float32)
+
+    return centroids
+
+
+# ============================================================================
+# INDEX IVF
+# ============================================================================
+
+class AnnIndex:
+    """
+    Index IVF sur une projection SVD de la matrice TF-IDF
+
+    Attributes:
+        components (np.ndarray): Projection SVD (d x n_features, float32)
+        centroids (np.ndarray): Centroïdes normalisés (n_lists x d, float32)
+        list_offsets (np.ndarray): Bornes de chaque liste dans ``list_rows``
+        list_rows (np.ndarray): Positions des offres, rangées par liste
+        nprobe (int): Nombre de listes lues par requête
+        exact_threshold (int): En dessous de ce nombre de candidats filtrés,
+            la recherche exacte est plus rapide et est utilisée directement
+    """
+
+    # Résultats approximatifs : jamais servis depuis le cache des résultats
+    exact = False
+
+    def __init__(self, components, centroids, list_offsets, list_rows,
+                 nprobe=8, exact_threshold=20000):
+        self.components = components
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_rows = list_rows
+        self.nprobe = nprobe
+        self.exact_threshold = exact_threshold
+
+    @property
+    def n_lists(self):
+        return len(self.centroids)
+
+    @classmethod
+    def build(cls, tfidf_matrix, n_components=128, n_lists=None, n_iter=20,
+              sample_size=100000, seed=0, nprobe=8, block_size=65536):
+        """
+        Construit l'index à partir de la matrice TF-IDF
+
+        La SVD et le k-means sont appris sur un échantillon ; la projection et
+        l'affectation de toutes les lignes se font ensuite par blocs.
+
+        Args:
+            tfidf_matrix: Matrice TF-IDF CSR des emplois
+            n_components (int): Dimension de la projection
+            n_lists (int): Nombre de listes IVF (défaut : ~4 x racine de n)
+            n_iter (int): Itérations du k-means
+            sample_size (int): Taille de l'échantillon d'apprentissage
+            seed (int): Graine aléatoire
+            nprobe (int): Valeur par défaut de ``nprobe``
+            block_size (int): Taille des blocs de projection
+
+        Returns:
+            AnnIndex: Index prêt à l'emploi
+        """
+
+        from sklearn.decomposition import TruncatedSVD
+
+        n_rows, n_features = tfidf_matrix.shape
+        n_components = min(n_components, n_features - 1)
+        if n_lists is None:
+            n_lists = int(4 * np.sqrt(n_rows))
+        n_lists = max(1, min(n_lists, n_rows))
+
+        rng = np.random.default_rng(seed)
+        sample = np.sort(rng.choice(n_rows, min(sample_size, n_rows), replace=False))
+        sample_matrix = tfidf_matrix[sample]
+
+        svd = TruncatedSVD(n_components=n_components, random_state=seed)
+        svd.fit(sample_matrix)
+        components = svd.components_.astype(np.float32)
+
+        def _project(matrix):
+            return _normalize_rows(np.asarray(matrix @ components.T, dtype=np.float32))
+
+        centroids = spherical_kmeans(_project(sample_matrix), n_lists, n_iter=n_iter, seed=seed)
+
+        labels = np.empty(n_rows, dtype=np.int32)
+        for start in range(0, n_rows, block_size):
+            block = _project(tfidf_matrix[start:start + block_size])
+            labels[start:start + block_size] = _assign(block, centroids)
+
+        list_rows = np.argsort(labels, kind='stable').astype(np.int32)
+        counts = np.bincount(labels, minlength=n_lists)
+        list_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+        return cls(components, centroids, list_offsets, list_rows, nprobe=nprobe)
+
+    def with_nprobe(self, nprobe):
+        """Vue de l'index (mêmes tableaux) avec une autre valeur de ``nprobe``."""
+        return AnnIndex(self.components, self.centroids, self.list_offsets, self.list_rows,
+                        nprobe=nprobe, exact_threshold=self.exact_threshold)
+
+    def shortlist(self, profile_vector, nprobe=None):
+        """
+        Positions (triées) des offres des ``nprobe`` listes les plus proches
+
+        Returns:
+            np.ndarray | None: Candidats, ou None si le profil est vide
+        """
+
+        nprobe = min(nprobe or self.nprobe, self.n_lists)
+        query = np.asarray(profile_vector @ self.components.T, dtype=np.float32).ravel()
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return None
+
+        closeness = self.centroids @ (query / norm)
+        if nprobe < self.n_lists:
+            probes = np.argpartition(-closeness, nprobe - 1)[:nprobe]
+        else:
+            probes = np.arange(self.n_lists)
+
+        lists = [self.list_rows[self.list_offsets[p]:self.list_offsets[p + 1]] for p in probes]
+        return np.sort(np.concatenate(lists))
+
+    def search(self, profile_vector, tfidf_matrix, k, rows=None, nprobe=None):
+        """
+        Recherche approximative des k emplois les plus similaires
+
+        Même contrat que ``recommender.search`` : les scores retournés sont
+        les similarités cosinus exactes ; seule la liste des candidats est
+        approximative.
+
+        Args:
+            profile_vector: Vecteur TF-IDF (1 x n_features) du profil
+            tfidf_matrix: Matrice TF-IDF CSR des emplois
+            k (int): Nombre de résultats voulus
+            rows (np.ndarray): Positions candidates issues des filtres
+            nprobe (int): Listes lues (défaut : ``self.nprobe``)
+
+        Returns:
+            tuple: (positions, scores) des k meilleurs emplois, triés
+        """
+
+        if rows is not None and len(rows) <= self.exact_threshold:
+            return exact_search(profile_vector, tfidf_matrix, k, rows)
+
+        candidates = self.shortlist(profile_vector, nprobe)
+        if candidates is not None and rows is not None:
+            candidates = np.intersect1d(candidates, rows, assume_unique=True)
+
+        # Pas assez de candidats : la recherche exacte garantit k résultats
+        if candidates is None or len(candidates) < k:
+            return exact_search(profile_vector, tfidf_matrix, k, rows)
+
+        return exact_search(profile_vector, tfidf_matrix, k, candidates)
+
+    def save(self, directory, snapshot=0):
+        """Sauvegarde l'index (tableaux .npy + paramètres JSON), construit sur l'instantané ``snapshot``."""
+        os.makedirs(directory, exist_ok=True)
+        for name in ('components', 'centroids', 'list_offsets', 'list_rows'):
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(directory, ANN_FILE), 'w', encoding='utf-8') as f:
+            json.dump({'nprobe': self.nprobe, 'exact_threshold': self.exact_threshold,
+                       'n_lists': self.n_lists, 'n_components': int(self.components.shape[0]),
+                       'snapshot': snapshot}, f)
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        """Charge un index sauvegardé par ``save``."""
+        with open(os.path.join(directory, ANN_FILE), encoding='utf-8') as f:
+            params = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+            for name in ('components', 'centroids', 'list_offsets', 'list_rows')
+        }
+        return cls(nprobe=params['nprobe'], exact_threshold=params['exact_threshold'], **arrays)
+
+
+def load_ann_index(model_dir, mmap_mode='r'):
+    """
+    Charge l'index ANN d'un dossier de modèle, ou None s'il n'existe pas
+    ou s'il a été construit sur un autre instantané (mise à jour incrémentale)
+    """
+    directory = os.path.join(model_dir, ANN_DIR)
+    path = os.path.join(directory, ANN_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        if json.load(f).get('snapshot', 0) != model_snapshot(model_dir):
+            return None
+    return AnnIndex.load(directory, mmap_mode)
+
+
+# ============================================================================
+# ÉVALUATION
+# ============================================================================
+
+def evaluate_recall(ann, tfidf_matrix, query_vectors, k=10, nprobes=(1, 2, 4, 8, 16, 32, 64, 128)):
+    """
+    Mesure le rappel@k et la latence de l'ANN par rapport à la recherche exacte
+
+    Args:
+        ann (AnnIndex): Index à évaluer
+        tfidf_matrix: Matrice TF-IDF CSR des emplois
+        query_vectors: Matrice des profils de test (une ligne par requête)
+        k (int): Taille du top-k comparé
+        nprobes (tuple): Valeurs de ``nprobe`` à tester
+
+    Returns:
+        list: Un dict par ``nprobe`` (recall, latences moyennes en ms)
+    """
+
+    query_vectors = sp.csr_matrix(query_vectors)
+    n_queries = query_vectors.shape[0]
+
+    exact = []
+    start = time.perf_counter()
+    for i in range(n_queries):
+        positions, _ = exact_search(query_vectors[i], tfidf_matrix, k)
+        exact.append(set(positions.tolist()))
+    exact_ms = (time.perf_counter() - start) * 1000 / max(1, n_queries)
+
+    report = []
+    for nprobe in nprobes:
+        if nprobe > ann.n_lists:
+            break
+        found = 0
+        start = time.perf_counter()
+        for i in range(n_queries):
+            positions, _ = ann.search(query_vectors[i], tfidf_matrix, k, nprobe=nprobe)
+            found += len(exact[i].intersection(positions.tolist()))
+        ann_ms = (time.perf_counter() - start) * 1000 / max(1, n_queries)
+        report.append({
+            'nprobe': nprobe,
+            'recall': found / max(1, sum(len(expected) for expected in exact)),
+            'ann_ms': ann_ms,
+            'exact_ms': exact_ms,
+        })
+    return report
+
+
+def sample_queries(tfidf_matrix, n_queries=200, seed=0):
+    """Requêtes de test : des offres tirées au hasard, utilisées comme profils."""
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(tfidf_matrix.shape[0], min(n_queries, tfidf_matrix.shape[0]), replace=False)
+    return tfidf_matrix[np.sort(rows)]
+
+
+def main():
+    from model_store import load_model
+
+    parser = argparse.ArgumentParser(description="Index ANN (IVF) pour la recherche d'emplois")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help="Construire l'index dans model/ann/")
+    build_parser.add_argument('model_dir', nargs='?', default='model')
+    build_parser.add_argument('--components', type=int, default=128)
+    build_parser.add_argument('--lists', type=int, default=None)
+    build_parser.add_argument('--iterations', type=int, default=20)
+    build_parser.add_argument('--nprobe', type=int, default=8)
+    build_parser.add_argument('--seed', type=int, default=0)
+
+    eval_parser = subparsers.add_parser('evaluate', help="Mesurer le rappel@k contre la recherche exacte")
+    eval_parser.add_argument('model_dir', nargs='?', default='model')
+    eval_parser.add_argument('--k', type=int, default=10)
+    eval_parser.add_argument('--queries', type=int, default=200)
+
+    args = parser.parse_args()
+    vectorizer, tfidf_matrix, jobs, metadata, filter_index = load_model(args.model_dir)
+
+    if args.command == 'build':
+        start = time.perf_counter()
+        ann = AnnIndex.build(tfidf_matrix, n_components=args.components, n_lists=args.lists,
+                             n_iter=args.iterations, seed=args.seed, nprobe=args.nprobe)
+        ann.save(os.path.join(args.model_dir, ANN_DIR), model_snapshot(args.model_dir))
+        print(f"✅ Index ANN construit en {time.perf_counter() - start:.1f} s "
+              f"({ann.n_lists} listes, {ann.components.shape[0]} dimensions)")
+    else:
+        ann = load_ann_index(args.model_dir)
+        if ann is None:
+            parser.error(f"Aucun index ANN dans {args.model_dir}/{ANN_DIR}/ (lancer 'build' d'abord)")
+        queries = sample_queries(tfidf_matrix, args.queries)
+        print(f"{'nprobe':>7} {'recall@' + str(args.k):>10} {'ANN (ms)':>10} {'exact (ms)':>11}")
+        for row in evaluate_recall(ann, tfidf_matrix, queries, k=args.k):
+            print(f"{row['nprobe']:>7} {row['recall']:>10.3f} {row['ann_ms']:>10.2f} {row['exact_ms']:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -25,11 +25,16 @@ Interface Streamlit pour la recommandation d'emplois basée sur TF-IDF et simila
 
 import streamlit as st
 import pandas as pd
-import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 import os
-import pickle
+import logging
+
+from inverted_index import load_inverted_index
+from metrics import STAGES, QueryMetrics
+from model_store import load_market_cube
+from recommender import recommend_jobs
+from result_cache import ResultCache, model_version
+from serving import (load_serving_model, model_fingerprint, model_memory_usage,
+                     process_rss_bytes, warm_up)
 
 # ============================================================================
 # CONFIGURATION STREAMLIT
@@ -107,29 +112,309 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-@st.cache_data
+MODEL_DIR = "model"
+
+# Mesures par étape : fichier JSONL des requêtes (optionnel) et fraction des
+# requêtes profilées avec cProfile/tracemalloc (0 = désactivé)
+METRICS_FILE = os.environ.get("JOB_METRICS_FILE")
+PROFILE_RATE = float(os.environ.get("JOB_PROFILE_RATE", "0"))
+
+# Service de recommandation (service.py) : si défini, les recherches lui
+# sont envoyées au lieu d'être calculées dans le processus Streamlit
+SERVICE_URL = os.environ.get("JOB_SERVICE_URL")
+
+# Recherche exacte répartie sur plusieurs cœurs (sharded_search.py) :
+# nombre de tranches (0 = désactivée) et pool de workers 'thread' ou 'process'
+SEARCH_SHARDS = int(os.environ.get("JOB_SEARCH_SHARDS", "0"))
+SEARCH_BACKEND = os.environ.get("JOB_SEARCH_BACKEND", "thread")
+
+# Profils prédéfinis de la sidebar (pré-calculés dans le cache des résultats)
+PROFILE_PRESETS = {
+    "Personnalisé": "",
+    "Data Scientist": "data scientist machine learning python deep learning tensorflow pytorch statistics modeling predictive analytics neural networks",
+    "Data Analyst": "data analyst SQL Excel visualization Tableau Power BI reporting analytics business intelligence dashboard KPI metrics",
+    "Data Engineer": "data engineer ETL pipeline Spark Hadoop SQL Python cloud AWS Azure data warehouse big data processing streaming",
+    "ML Engineer": "machine learning engineer MLOps deployment model training optimization Python scikit-learn production infrastructure",
+    "Business Analyst": "business analyst requirements analysis stakeholder management documentation process improvement project management"
+}
+
+# Nombre de recommandations par défaut (slider de la sidebar)
+DEFAULT_RECOMMENDATIONS = 10
+
+
+@st.cache_resource(max_entries=1, show_spinner="⏳ Chargement du modèle...")
+def load_shared_model(model_dir, fingerprint):
+    """
+    Charge le modèle une seule fois par processus, partagé par toutes les sessions
+    
+    ``st.cache_resource`` retourne le même objet (en lecture seule) à chaque
+    session au lieu d'en sérialiser une copie à chaque rerun. L'empreinte
+    des fichiers fait partie de la clé : un modèle régénéré dans ``model/``
+    est rechargé automatiquement, et l'ancien est libéré (max_entries=1).
+    
+    Args:
+        model_dir (str): Dossier du modèle
+        fingerprint (str): Empreinte des fichiers (voir serving.model_fingerprint)
+    
+    Returns:
+        tuple: (model, memory) - le modèle pré-chauffé et sa mémoire occupée
+    """
+    
+    model = load_serving_model(model_dir)
+    
+    # Requête factice : la première vraie recherche ne paie pas l'initialisation
+    warm_up(model)
+    
+    return model, model_memory_usage(model)
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def load_shared_ann_index(model_dir, fingerprint):
+    """
+    Charge l'index ANN optionnel (model/ann/), partagé comme le modèle
+    
+    Returns:
+        AnnIndex | None: Index approximatif, ou None s'il n'a pas été construit
+    """
+    
+    if not os.path.isdir(os.path.join(model_dir, "ann")):
+        return None
+    from ann_index import load_ann_index
+    return load_ann_index(model_dir)
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def load_shared_inverted_index(model_dir, fingerprint):
+    """
+    Charge l'index inversé optionnel (model/inverted/), partagé comme le modèle
+    
+    Returns:
+        InvertedIndex | None: Index inversé, ou None s'il n'a pas été construit
+    """
+    
+    return load_inverted_index(model_dir)
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def load_shared_sharded_searcher(model_dir, fingerprint):
+    """
+    Recherche exacte répartie (JOB_SEARCH_SHARDS), workers partagés par les sessions
+    
+    Returns:
+        ShardedSearcher | None: Moteur parallèle, ou None s'il n'est pas activé
+    """
+    
+    if SEARCH_SHARDS <= 1:
+        return None
+    # Pools de workers et mémoire partagée importés seulement si activés
+    from sharded_search import load_sharded_searcher
+    model, _ = load_shared_model(model_dir, fingerprint)
+    return load_sharded_searcher(model[1], SEARCH_SHARDS, SEARCH_BACKEND)
+
+
+def load_exact_searcher(model_dir, fingerprint):
+    """Moteur exact : tranches parallèles si activées, sinon index inversé (ou None)."""
+    sharded = load_shared_sharded_searcher(model_dir, fingerprint)
+    if sharded is not None:
+        return sharded
+    return load_shared_inverted_index(model_dir, fingerprint)
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def load_shared_market_cube(model_dir, fingerprint):
+    """
+    Cube des statistiques du marché (model/stats/), partagé comme le modèle
+    
+    Reconstruit à partir des emplois chargés si le modèle n'en a pas
+    (ancien modèle) ou a reçu des mises à jour incrémentales.
+    
+    Returns:
+        MarketCube: Agrégats par état x expérience x contrat x remote
+    """
+    
+    model, _ = load_shared_model(model_dir, fingerprint)
+    return load_market_cube(model_dir, jobs=model[2])
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def load_shared_result_cache(model_dir, fingerprint):
+    """
+    Cache des résultats partagé par toutes les sessions, recréé avec le modèle
+    
+    Les profils prédéfinis (filtres par défaut) sont calculés dès le
+    chargement : le premier clic sur un preset est servi depuis le cache.
+    
+    Returns:
+        ResultCache: Cache LRU/TTL lié à la version du modèle
+    """
+    
+    model, _ = load_shared_model(model_dir, fingerprint)
+    vectorizer, tfidf_matrix, jobs_df, metadata, filter_index = model
+    cache = ResultCache(model_version(metadata))
+    
+    searcher = load_exact_searcher(model_dir, fingerprint)
+    for profile_text in PROFILE_PRESETS.values():
+        if profile_text:
+            recommend_jobs(profile_text, jobs_df, vectorizer, tfidf_matrix,
+                           n_recommendations=DEFAULT_RECOMMENDATIONS,
+                           filter_index=filter_index, searcher=searcher, cache=cache)
+    cache.reset_stats()
+    
+    return cache
+
+
+@st.cache_resource(show_spinner=False)
+def load_shared_metrics():
+    """
+    Mesures de performance partagées par toutes les sessions du processus
+    
+    Chaque requête est journalisée (logger ``job_intelligent.metrics``),
+    ajoutée à ``JOB_METRICS_FILE`` si défini, et résumée dans le panneau
+    d'administration.
+    
+    Returns:
+        QueryMetrics: Collecteur des mesures par étape
+    """
+    
+    logger = logging.getLogger("job_intelligent.metrics")
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+    
+    return QueryMetrics(metrics_path=METRICS_FILE, profile_rate=PROFILE_RATE)
+
+
+def display_metrics_panel(query_metrics):
+    """
+    Panneau d'administration : durée de chaque étape des dernières requêtes
+    
+    Args:
+        query_metrics (QueryMetrics): Collecteur partagé (voir load_shared_metrics)
+    """
+    
+    summary = query_metrics.summary()
+    if 'total' not in summary:
+        st.caption("Aucune requête mesurée depuis le démarrage.")
+        return
+    
+    rows = []
+    for stage in (*STAGES, 'total'):
+        if stage in summary:
+            stats = summary[stage]
+            rows.append({
+                'Étape': stage,
+                'Requêtes': stats['count'],
+                'p50 (ms)': round(stats['p50_ms'], 2),
+                'p95 (ms)': round(stats['p95_ms'], 2),
+                'p99 (ms)': round(stats['p99_ms'], 2),
+                'max (ms)': round(stats['max_ms'], 2),
+            })
+    st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+    
+    st.caption(f"Distribution de la durée totale ({summary['total']['window']} dernières requêtes)")
+    st.bar_chart(pd.Series(summary['total']['buckets'], name="requêtes"))
+    
+    profiles = query_metrics.recent_profiles()
+    if profiles:
+        latest = profiles[0]
+        st.caption(
+            f"🔬 Dernier profil échantillonné ({len(profiles)} conservés) : "
+            f"{latest['record']['total_ms']:.1f} ms, pic d'allocation {latest['tracemalloc_peak_kb']:,.0f} KB"
+        )
+        st.code(latest['cprofile'], language=None)
+        st.code("\n".join(latest['allocations']), language=None)
+    elif PROFILE_RATE == 0:
+        st.caption("🔬 Profilage désactivé (définir JOB_PROFILE_RATE, ex. 0.01)")
+
+
+def _format_salary(value):
+    return f"${value:,.0f}" if not pd.isna(value) else "N/A"
+
+
+def display_market_panel(cube, location_filter, experience_filter, work_type_filter, remote_only):
+    """
+    Tendances du marché pour les filtres de la sidebar (lues dans le cube)
+    
+    Aucune offre n'est parcourue : les cellules du cube qui correspondent
+    aux filtres sont additionnées, quelle que soit la taille du corpus.
+    
+    Args:
+        cube (MarketCube): Cube des statistiques (voir load_shared_market_cube)
+        location_filter, experience_filter, work_type_filter, remote_only:
+            Filtres de la sidebar ("Tous" = pas de filtre)
+    """
+    
+    mask = cube.select(location_filter, experience_filter, work_type_filter, remote_only)
+    summary = cube.summary(mask)
+    if summary['n_jobs'] == 0:
+        st.caption("Aucune offre pour ces filtres.")
+        return
+    
+    col_a, col_b, col_c, col_d = st.columns(4)
+    with col_a:
+        st.metric("Offres", f"{summary['n_jobs']:,}")
+    with col_b:
+        st.metric("Salaire médian", _format_salary(summary['median_salary']),
+                  help=f"Moyenne : {_format_salary(summary['mean_salary'])} "
+                       f"({summary['n_salaries']:,} offres avec salaire)")
+    with col_c:
+        st.metric("Fourchette P25-P75",
+                  f"{_format_salary(summary['p25_salary'])} - {_format_salary(summary['p75_salary'])}")
+    with col_d:
+        st.metric("🌍 Part remote", f"{summary['remote_share']:.0%}")
+    
+    col_left, col_right = st.columns(2)
+    with col_left:
+        st.caption("💰 Salaire médian par niveau d'expérience")
+        by_experience = cube.breakdown('formatted_experience_level', mask).dropna(subset=['median_salary'])
+        st.bar_chart(by_experience.set_index('formatted_experience_level')['median_salary'])
+        
+        st.caption("💼 Offres par type de contrat")
+        by_work_type = cube.breakdown('formatted_work_type', mask)
+        st.bar_chart(by_work_type.set_index('formatted_work_type')['jobs'])
+    with col_right:
+        st.caption("📍 Top 10 des états (nombre d'offres)")
+        by_state = cube.breakdown('state', mask).dropna(subset=['state']).head(10)
+        st.bar_chart(by_state.set_index('state')['jobs'])
+        
+        st.caption("🌍 Répartition remote / sur site")
+        by_remote = cube.breakdown('remote_allowed', mask)
+        by_remote['remote_allowed'] = by_remote['remote_allowed'].map({True: "Remote", False: "Sur site"})
+        st.bar_chart(by_remote.set_index('remote_allowed')['jobs'])
+    
+    st.caption(
+        f"Calculé sur le cube pré-agrégé ({len(cube.keys):,} cellules) ; le salaire minimum "
+        f"n'est pas appliqué et les quantiles sont estimés à ±{cube.sketch.accuracy:.0%} près."
+    )
+
+
 def load_model_and_data():
     """
     Charge le modèle TF-IDF pré-calculé et les données (ULTRA RAPIDE ⚡)
     
-    Cette fonction utilise le cache Streamlit (@st.cache_data) pour charger
-    le modèle une seule fois en mémoire, garantissant des performances
-    maximales lors des appels ultérieurs.
+    Le modèle est une ressource partagée (voir ``load_shared_model``) :
+    chargé et pré-chauffé une seule fois par processus, puis réutilisé
+    sans copie par toutes les sessions, et rechargé si ``model/`` change.
+    
+    Le format versionné de ``model_store`` (manifest.json + tableaux .npy)
+    est mappé en mémoire ; les anciens fichiers .pkl restent supportés.
     
     Returns:
-        tuple: (vectorizer, tfidf_matrix, jobs_df, metadata)
+        tuple: (vectorizer, tfidf_matrix, jobs_df, metadata, filter_index)
             - vectorizer: Modèle TF-IDF entraîné
             - tfidf_matrix: Matrice TF-IDF pré-calculée
-            - jobs_df: DataFrame avec les données d'emploi
+            - jobs_df: Données d'emploi (DataFrame ou JobTable paresseuse)
             - metadata: Métadonnées du modèle (date création, stats, etc.)
+            - filter_index: Index des filtres (construit une seule fois)
     
     Raises:
         FileNotFoundError: Si le dossier 'model' n'existe pas
-        pickle.UnpicklingError: Si un fichier .pkl est corrompu
+        ValueError: Si la version du format n'est pas supportée
+        pickle.UnpicklingError: Si un ancien fichier .pkl est corrompu
     """
     
-    MODEL_DIR = "model"
-    
     # Vérifier si le modèle existe
     if not os.path.exists(MODEL_DIR):
         st.error("""
@@ -145,23 +430,8 @@ def load_model_and_data():
         st.stop()
     
     try:
-        # Charger les métadonnées
-        with open(os.path.join(MODEL_DIR, "metadata.pkl"), 'rb') as f:
-            metadata = pickle.load(f)
-        
-        # Charger le vectorizer
-        with open(os.path.join(MODEL_DIR, "tfidf_vectorizer.pkl"), 'rb') as f:
-            vectorizer = pickle.load(f)
-        
-        # Charger la matrice TF-IDF
-        with open(os.path.join(MODEL_DIR, "tfidf_matrix.pkl"), 'rb') as f:
-            tfidf_matrix = pickle.load(f)
-        
-        # Charger les données des emplois
-        with open(os.path.join(MODEL_DIR, "jobs_data.pkl"), 'rb') as f:
-            jobs_df = pickle.load(f)
-        
-        return vectorizer, tfidf_matrix, jobs_df, metadata
+        model, _ = load_shared_model(MODEL_DIR, model_fingerprint(MODEL_DIR))
+        return model
     
     except Exception as e:
         st.error(f"""
@@ -175,79 +445,6 @@ def load_model_and_data():
         st.stop()
 
 
-def recommend_jobs(profile_text, jobs_df, vectorizer, tfidf_matrix, 
-                   n_recommendations=10, location_filter=None, 
-                   min_salary=0, experience_filter=None, work_type_filter=None,
-                   remote_only=False):
-    """
-    Recommande les emplois les plus pertinents pour un profil donné
-    
-    Utilise le modèle TF-IDF et la similarité cosinus pour scorer
-    chaque emploi par rapport au profil de l'utilisateur.
-    
-    Args:
-        profile_text (str): Description du profil candidat
-        jobs_df (pd.DataFrame): DataFrame des emplois
-        vectorizer: Modèle TF-IDF pré-entraîné
-        tfidf_matrix: Matrice TF-IDF pré-calculée
-        n_recommendations (int): Nombre d'emplois à retourner
-        location_filter (str): Filtrer par localisation
-        min_salary (float): Salaire minimum
-        experience_filter (str): Niveau d'expérience
-        work_type_filter (str): Type de contrat
-        remote_only (bool): Retourner seulement les postes en remote
-    
-    Returns:
-        pd.DataFrame: Emplois recommandés triés par score de similarité
-    """
-    
-    # Transformer le profil en vecteur TF-IDF
-    profile_vector = vectorizer.transform([profile_text])
-    
-    # Calculer la similarité cosinus
-    similarities = cosine_similarity(profile_vector, tfidf_matrix).flatten()
-    
-    # Créer un dataframe avec les scores
-    jobs_df = jobs_df.copy()
-    jobs_df['similarity_score'] = similarities
-    
-    # Appliquer les filtres
-    filtered_jobs = jobs_df.copy()
-    
-    # Filtre remote
-    if remote_only and 'remote_allowed' in filtered_jobs.columns:
-        filtered_jobs = filtered_jobs[filtered_jobs['remote_allowed'] == 1.0]
-    
-    if location_filter and location_filter != "Tous":
-        # Filtre localisation avec vérification des colonnes
-        location_mask = pd.Series([False] * len(filtered_jobs), index=filtered_jobs.index)
-        if 'location' in filtered_jobs.columns:
-            location_mask |= filtered_jobs['location'].str.contains(location_filter, case=False, na=False)
-        if 'state' in filtered_jobs.columns:
-            location_mask |= filtered_jobs['state'].str.contains(location_filter, case=False, na=False)
-        if 'city' in filtered_jobs.columns:
-            location_mask |= filtered_jobs['city'].str.contains(location_filter, case=False, na=False)
-        filtered_jobs = filtered_jobs[location_mask]
-    
-    if min_salary > 0 and 'med_salary' in filtered_jobs.columns:
-        filtered_jobs = filtered_jobs[filtered_jobs['med_salary'] >= min_salary]
-    
-    if experience_filter and experience_filter != "Tous" and 'formatted_experience_level' in filtered_jobs.columns:
-        filtered_jobs = filtered_jobs[
-            filtered_jobs['formatted_experience_level'].str.contains(experience_filter, case=False, na=False)
-        ]
-    
-    if work_type_filter and work_type_filter != "Tous" and 'formatted_work_type' in filtered_jobs.columns:
-        filtered_jobs = filtered_jobs[
-            filtered_jobs['formatted_work_type'].str.contains(work_type_filter, case=False, na=False)
-        ]
-    
-    # Trier par score de similarité
-    recommendations = filtered_jobs.nlargest(n_recommendations, 'similarity_score')
-    
-    return recommendations
-
-
 def display_job_card(job, rank):
     """
     Affiche une carte d'emploi stylisée avec tous les détails
@@ -264,7 +461,7 @@ def display_job_card(job, rank):
         - Entreprise, localisation, salaire
         - Niveau d'expérience et type de contrat
         - Score de correspondance en pourcentage
-        - Expanders pour description et compétences
+        - Expanders pour description, compétences et offres similaires
     """
     
     similarity_pct = job.get('similarity_score', 0) * 100
@@ -303,6 +500,12 @@ def display_job_card(job, rank):
                 skills = str(skills_text).split()[:15]
                 st.write(" • ".join(skills))
 
+        # Republications et variantes regroupées sous cette offre
+        n_duplicates = int(job.get('duplicates', 0) or 0)
+        if n_duplicates > 0:
+            with st.expander(f"🪞 {n_duplicates} offre(s) similaire(s) masquée(s)"):
+                st.caption(f"job_id : {job.get('duplicate_ids', '')}")
+
 
 def main():
     """
@@ -325,13 +528,13 @@ def main():
     
     # Charger les données
     try:
-        vectorizer, tfidf_matrix, jobs_df, metadata = load_model_and_data()
+        vectorizer, tfidf_matrix, jobs_df, metadata, filter_index = load_model_and_data()
         
         # Afficher les infos du modèle
         st.success(f"✅ Modèle chargé instantanément ! {len(jobs_df):,} offres disponibles")
         
         with st.expander("ℹ️ Informations sur le modèle"):
-            col_a, col_b, col_c = st.columns(3)
+            col_a, col_b, col_c, col_d = st.columns(4)
             with col_a:
                 st.metric("Emplois indexés", f"{metadata['n_jobs']:,}")
             with col_b:
@@ -339,6 +542,29 @@ def main():
             with col_c:
                 created = metadata['created_at'].split('T')[0]
                 st.metric("Créé le", created)
+            with col_d:
+                _, memory = load_shared_model(MODEL_DIR, model_fingerprint(MODEL_DIR))
+                rss = process_rss_bytes()
+                st.metric(
+                    "Mémoire modèle",
+                    f"{memory['private_bytes'] / 1e6:,.0f} MB",
+                    help=(
+                        f"Privée au processus : {memory['private_bytes'] / 1e6:,.1f} MB | "
+                        f"Mappée depuis le disque (partagée) : {memory['mapped_bytes'] / 1e6:,.1f} MB"
+                        + (f" | RSS du processus : {rss / 1e6:,.0f} MB" if rss else "")
+                    )
+                )
+            
+            # Compteurs du cache des résultats (partagé entre sessions)
+            cache_stats = load_shared_result_cache(MODEL_DIR, model_fingerprint(MODEL_DIR)).stats()
+            st.caption(
+                f"🗃️ Cache des résultats : {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+                f"({cache_stats['hit_rate']:.0%}) - {cache_stats['entries']} requêtes en cache"
+            )
+        
+        query_metrics = load_shared_metrics()
+        with st.expander("⏱️ Performances des requêtes (admin)"):
+            display_metrics_panel(query_metrics)
     
     except Exception as e:
         st.error(f"❌ Erreur lors du chargement des données: {str(e)}")
@@ -350,16 +576,8 @@ def main():
     
     # Profils prédéfinis
     st.sidebar.subheader("📋 Profils Prédéfinis")
-    profile_presets = {
-        "Personnalisé": "",
-        "Data Scientist": "data scientist machine learning python deep learning tensorflow pytorch statistics modeling predictive analytics neural networks",
-        "Data Analyst": "data analyst SQL Excel visualization Tableau Power BI reporting analytics business intelligence dashboard KPI metrics",
-        "Data Engineer": "data engineer ETL pipeline Spark Hadoop SQL Python cloud AWS Azure data warehouse big data processing streaming",
-        "ML Engineer": "machine learning engineer MLOps deployment model training optimization Python scikit-learn production infrastructure",
-        "Business Analyst": "business analyst requirements analysis stakeholder management documentation process improvement project management"
-    }
     
-    selected_preset = st.sidebar.selectbox("Choisir un profil prédéfini", list(profile_presets.keys()))
+    selected_preset = st.sidebar.selectbox("Choisir un profil prédéfini", list(PROFILE_PRESETS.keys()))
     
     # Filtres avancés
     st.sidebar.subheader("⚙️ Filtres Avancés")
@@ -367,34 +585,49 @@ def main():
     # Filtre Remote
     remote_only = st.sidebar.checkbox("🌍 Postes en remote uniquement", value=False)
     
-    # Filtre localisation - vérifier si la colonne existe
+    # Filtre localisation - options lues dans l'index des filtres
     locations = ["Tous"]
-    if 'state' in jobs_df.columns:
-        state_list = list(jobs_df['state'].dropna().unique())
-        locations.extend(state_list[:20])
+    locations.extend(filter_index.options('state')[:20])
     location_filter = st.sidebar.selectbox("📍 État/Région", locations)
     
     # Filtre salaire minimum - vérifier si la colonne existe
     min_salary = 0
-    if 'med_salary' in jobs_df.columns:
+    if filter_index.has_column('med_salary'):
         min_salary = st.sidebar.slider("💰 Salaire minimum ($)", 0, 200000, 0, 10000)
     
-    # Filtre niveau d'expérience - vérifier si la colonne existe
+    # Filtre niveau d'expérience - options lues dans l'index des filtres
     experience_levels = ["Tous"]
-    if 'formatted_experience_level' in jobs_df.columns:
-        exp_list = list(jobs_df['formatted_experience_level'].dropna().unique())
-        experience_levels.extend(exp_list)
+    experience_levels.extend(filter_index.options('formatted_experience_level'))
     experience_filter = st.sidebar.selectbox("📊 Niveau d'expérience", experience_levels)
     
-    # Filtre type de travail - vérifier si la colonne existe
+    # Filtre type de travail - options lues dans l'index des filtres
     work_types = ["Tous"]
-    if 'formatted_work_type' in jobs_df.columns:
-        work_list = list(jobs_df['formatted_work_type'].dropna().unique())
-        work_types.extend(work_list)
+    work_types.extend(filter_index.options('formatted_work_type'))
     work_type_filter = st.sidebar.selectbox("💼 Type de contrat", work_types)
     
     # Nombre de recommandations
-    n_recommendations = st.sidebar.slider("📋 Nombre de recommandations", 5, 30, 10)
+    n_recommendations = st.sidebar.slider("📋 Nombre de recommandations", 5, 30, DEFAULT_RECOMMENDATIONS)
+    
+    # Recherche exacte répartie sur plusieurs cœurs, ou par index inversé si
+    # construit (mêmes résultats, plus rapide)
+    fingerprint = model_fingerprint(MODEL_DIR)
+    searcher = load_exact_searcher(MODEL_DIR, fingerprint)
+    result_cache = load_shared_result_cache(MODEL_DIR, fingerprint)
+    
+    # Mode de recherche approximatif - seulement si l'index ANN a été construit
+    ann_index = load_shared_ann_index(MODEL_DIR, fingerprint)
+    market_cube = load_shared_market_cube(MODEL_DIR, fingerprint)
+    if ann_index is not None:
+        st.sidebar.subheader("⚡ Mode de recherche")
+        if st.sidebar.checkbox("Recherche approximative (ANN)", value=False,
+                               help="Ne score que les offres des listes IVF les plus proches du profil "
+                                    "(voir ann_index.py evaluate pour le rappel@k)"):
+            nprobe = st.sidebar.slider(
+                "🎚️ Listes explorées (nprobe)", 1, min(128, ann_index.n_lists),
+                min(ann_index.nprobe, ann_index.n_lists)
+            )
+            # Copie légère : l'index partagé entre sessions n'est jamais modifié
+            searcher = ann_index.with_nprobe(nprobe)
     
     # Zone principale
     col1, col2 = st.columns([2, 1])
@@ -403,7 +636,7 @@ def main():
         st.subheader("📝 Décrivez votre profil")
         
         # Zone de texte pour le profil
-        default_text = profile_presets[selected_preset]
+        default_text = PROFILE_PRESETS[selected_preset]
         profile_text = st.text_area(
             "Entrez vos compétences, expériences et domaines d'intérêt:",
             value=default_text,
@@ -420,75 +653,108 @@ def main():
         with col_a:
             st.metric("Offres totales", f"{len(jobs_df):,}")
         with col_b:
-            if 'med_salary' in jobs_df.columns:
-                avg_salary = jobs_df[jobs_df['med_salary'] > 0]['med_salary'].mean()
-                st.metric("Salaire moyen", f"${avg_salary:,.0f}" if not pd.isna(avg_salary) else "N/A")
-            else:
-                st.metric("Salaire moyen", "N/A")
+            # Lu dans le cube des statistiques : aucun parcours des offres par rerun
+            st.metric("Salaire moyen", _format_salary(market_cube.summary()['mean_salary']))
+    
+    with st.expander("📈 Tendances du marché (filtres actuels)"):
+        display_market_panel(market_cube, location_filter, experience_filter, work_type_filter, remote_only)
     
     st.markdown("---")
     
     # Résultats des recommandations
     if search_clicked and profile_text.strip():
-        with st.spinner("🔄 Analyse de votre profil en cours..."):
-            recommendations = recommend_jobs(
-                profile_text=profile_text,
-                jobs_df=jobs_df,
-                vectorizer=vectorizer,
-                tfidf_matrix=tfidf_matrix,
-                n_recommendations=n_recommendations,
+        trace = query_metrics.start(
+            n_recommendations=n_recommendations,
+            location_filter=location_filter,
+            min_salary=min_salary,
+            experience_filter=experience_filter,
+            work_type_filter=work_type_filter,
+            remote_only=remote_only
+        )
+        # Trace terminée même en cas d'erreur (service injoignable, rendu) :
+        # sinon cProfile et tracemalloc resteraient actifs pour le processus
+        try:
+            filters = dict(
                 location_filter=location_filter if location_filter != "Tous" else None,
                 min_salary=min_salary,
                 experience_filter=experience_filter if experience_filter != "Tous" else None,
                 work_type_filter=work_type_filter if work_type_filter != "Tous" else None,
                 remote_only=remote_only
             )
+            with st.spinner("🔄 Analyse de votre profil en cours..."):
+                if SERVICE_URL:
+                    # Client léger : le service regroupe les requêtes de toutes les sessions
+                    from service import RecommendationClient
+                    try:
+                        with trace.stage('service'):
+                            recommendations = RecommendationClient(SERVICE_URL).recommend(
+                                profile_text, n_recommendations, **filters
+                            )
+                    except RuntimeError as e:
+                        st.error(f"❌ {e}")
+                        return
+                else:
+                    recommendations = recommend_jobs(
+                        profile_text=profile_text,
+                        jobs_df=jobs_df,
+                        vectorizer=vectorizer,
+                        tfidf_matrix=tfidf_matrix,
+                        n_recommendations=n_recommendations,
+                        filter_index=filter_index,
+                        searcher=searcher,
+                        cache=result_cache,
+                        trace=trace,
+                        **filters
+                    )
         
-        if len(recommendations) > 0:
-            st.success(f"🎯 {len(recommendations)} emplois trouvés correspondant à votre profil!")
+            if len(recommendations) > 0:
+                st.success(f"🎯 {len(recommendations)} emplois trouvés correspondant à votre profil!")
             
-            # Afficher les métriques des résultats
-            col1, col2, col3, col4, col5 = st.columns(5)
-            with col1:
-                avg_score = recommendations['similarity_score'].mean() * 100
-                st.metric("Score moyen", f"{avg_score:.1f}%")
-            with col2:
-                max_score = recommendations['similarity_score'].max() * 100
-                st.metric("Meilleur match", f"{max_score:.1f}%")
-            with col3:
-                if 'med_salary' in recommendations.columns:
-                    avg_sal = recommendations[recommendations['med_salary'] > 0]['med_salary'].mean()
-                    st.metric("Salaire moyen", f"${avg_sal:,.0f}" if avg_sal > 0 else "N/A")
-                else:
-                    st.metric("Salaire moyen", "N/A")
-            with col4:
-                if 'remote_allowed' in recommendations.columns:
-                    remote_count = (recommendations['remote_allowed'] == 1.0).sum()
-                    st.metric("🌍 Remote", f"{remote_count}/{len(recommendations)}")
-                else:
-                    st.metric("🌍 Remote", "N/A")
-            with col5:
-                st.metric("Résultats", len(recommendations))
+                # Afficher les métriques des résultats
+                col1, col2, col3, col4, col5 = st.columns(5)
+                with col1:
+                    avg_score = recommendations['similarity_score'].mean() * 100
+                    st.metric("Score moyen", f"{avg_score:.1f}%")
+                with col2:
+                    max_score = recommendations['similarity_score'].max() * 100
+                    st.metric("Meilleur match", f"{max_score:.1f}%")
+                with col3:
+                    if 'med_salary' in recommendations.columns:
+                        avg_sal = recommendations[recommendations['med_salary'] > 0]['med_salary'].mean()
+                        st.metric("Salaire moyen", f"${avg_sal:,.0f}" if avg_sal > 0 else "N/A")
+                    else:
+                        st.metric("Salaire moyen", "N/A")
+                with col4:
+                    if 'remote_allowed' in recommendations.columns:
+                        remote_count = (recommendations['remote_allowed'] == 1.0).sum()
+                        st.metric("🌍 Remote", f"{remote_count}/{len(recommendations)}")
+                    else:
+                        st.metric("🌍 Remote", "N/A")
+                with col5:
+                    st.metric("Résultats", len(recommendations))
             
-            st.markdown("---")
-            st.subheader("🏆 Emplois Recommandés")
+                st.markdown("---")
+                st.subheader("🏆 Emplois Recommandés")
             
-            # Afficher les cartes d'emploi
-            for rank, (idx, job) in enumerate(recommendations.iterrows(), 1):
-                display_job_card(job, rank)
-                st.markdown("")
+                # Afficher les cartes d'emploi
+                with trace.stage('render'):
+                    for rank, (idx, job) in enumerate(recommendations.iterrows(), 1):
+                        display_job_card(job, rank)
+                        st.markdown("")
             
-            # Option pour télécharger les résultats
-            st.markdown("---")
-            csv = recommendations.to_csv(index=False)
-            st.download_button(
-                label="📥 Télécharger les résultats (CSV)",
-                data=csv,
-                file_name="recommandations_emplois.csv",
-                mime="text/csv"
-            )
-        else:
-            st.warning("⚠️ Aucun emploi trouvé avec ces critères. Essayez d'ajuster vos filtres.")
+                # Option pour télécharger les résultats
+                st.markdown("---")
+                csv = recommendations.to_csv(index=False)
+                st.download_button(
+                    label="📥 Télécharger les résultats (CSV)",
+                    data=csv,
+                    file_name="recommandations_emplois.csv",
+                    mime="text/csv"
+                )
+            else:
+                st.warning("⚠️ Aucun emploi trouvé avec ces critères. Essayez d'ajuster vos filtres.")
+        finally:
+            query_metrics.finish(trace)
     
     elif search_clicked:
         st.warning("⚠️ Veuillez entrer une description de votre profil.")
@@ -0,0 +1,408 @@
+"""
+📦 JOB INTELLIGENT - Recommandations par lots (sans interface)
+
+Score des milliers de profils candidats en une passe, avec la même
+sémantique de filtres que ``recommend_jobs`` :
+    1. Les profils sont lus par paquets (CSV ou JSONL) avec leurs filtres
+       propres (une ligne = un profil)
+    2. Chaque paquet est vectorisé par un seul appel à ``vectorizer.transform``
+    3. Les scores sont calculés par blocs de lignes de la matrice TF-IDF
+       (produit creux x dense), pour borner la mémoire, et seul le top-k de
+       chaque profil est conservé d'un bloc à l'autre
+    4. Les résultats sont écrits paquet par paquet (Parquet ou CSV) et un
+       point de reprise permet de relancer un traitement interrompu
+
+Colonnes d'entrée : ``profile_text`` (obligatoire), ``profile_id``,
+``location_filter``, ``min_salary``, ``experience_filter``,
+``work_type_filter``, ``remote_only``, ``n_recommendations`` (optionnelles).
+
+Usage :
+    python batch.py profiles.csv results/ --model model/ --top 10 --workers 4
+"""
+
+import argparse
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from recommender import candidate_rows, query_dtype, top_k
+from serving import load_serving_model, model_fingerprint
+
+
+CHECKPOINT_FILE = "checkpoint.json"
+
+# Taille des paquets de profils et des blocs de lignes de la matrice :
+# la matrice de scores d'un bloc occupe BLOCK_ROWS x CHUNK_PROFILES x 8 octets
+CHUNK_PROFILES = 256
+BLOCK_ROWS = 8192
+
+RESULT_COLUMNS = ['job_id', 'title', 'company_name', 'location', 'med_salary',
+                  'formatted_experience_level', 'formatted_work_type']
+
+
+# ============================================================================
+# LECTURE DES PROFILS
+# ============================================================================
+
+def read_profiles(path, chunk_size=CHUNK_PROFILES):
+    """
+    Lit un fichier de profils par paquets, sans le charger en entier
+
+    Args:
+        path (str): Fichier CSV ou JSONL (extension .jsonl / .json)
+        chunk_size (int): Nombre de profils par paquet
+
+    Yields:
+        pd.DataFrame: Paquets de profils (``profile_id`` ajouté s'il manque)
+    """
+
+    if path.endswith(('.jsonl', '.json')):
+        reader = pd.read_json(path, lines=True, chunksize=chunk_size, dtype=False)
+    else:
+        reader = pd.read_csv(path, chunksize=chunk_size)
+
+    offset = 0
+    for chunk in reader:
+        if 'profile_text' not in chunk.columns:
+            raise ValueError(f"Colonne 'profile_text' absente de {path}")
+        chunk = chunk.reset_index(drop=True)
+        if 'profile_id' not in chunk.columns:
+            chunk.insert(0, 'profile_id', np.arange(offset, offset + len(chunk)))
+        offset += len(chunk)
+        yield chunk
+
+
+def _text(value):
+    return None if value is None or pd.isna(value) or str(value) == "" else str(value)
+
+
+def _flag(value):
+    if value is None or pd.isna(value):
+        return False
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', '1.0', 'true', 'yes', 'oui')
+    return bool(value)
+
+
+def profile_filters(record):
+    """
+    Filtres d'un profil, normalisés comme les arguments de ``recommend_jobs``
+
+    Args:
+        record (dict): Ligne du fichier de profils
+
+    Returns:
+        dict: location_filter, min_salary, experience_filter,
+        work_type_filter, remote_only
+    """
+
+    min_salary = record.get('min_salary')
+    return dict(
+        location_filter=_text(record.get('location_filter')),
+        min_salary=0 if min_salary is None or pd.isna(min_salary) else float(min_salary),
+        experience_filter=_text(record.get('experience_filter')),
+        work_type_filter=_text(record.get('work_type_filter')),
+        remote_only=_flag(record.get('remote_only'))
+    )
+
+
+# ============================================================================
+# SCORING PAR BLOCS
+# ============================================================================
+
+def row_block(tfidf_matrix, start, end):
+    """
+    Lignes ``start:end`` d'une matrice CSR, sans copie des données
+
+    ``tfidf_matrix[start:end]`` recopie le bloc (données et indices) : pour
+    une matrice mappée en mémoire, chaque passage relirait tout le corpus.
+    Ici seuls les pointeurs de lignes du bloc sont recalculés. Un
+    instantané segmenté (``model_store.SegmentedMatrix``) recopie le bloc.
+    """
+    if not sp.issparse(tfidf_matrix):
+        return tfidf_matrix[start:end]
+    indptr = np.asarray(tfidf_matrix.indptr[start:end + 1])
+    first, last = int(indptr[0]), int(indptr[-1])
+    return sp.csr_matrix(
+        (tfidf_matrix.data[first:last], tfidf_matrix.indices[first:last], indptr - first),
+        shape=(end - start, tfidf_matrix.shape[1]), copy=False
+    )
+
+
+def batch_search(profile_vectors, tfidf_matrix, ks, rows_list, block_rows=BLOCK_ROWS):
+    """
+    Top-k exact de plusieurs profils, par blocs de lignes de la matrice
+
+    Chaque bloc est scoré pour tous les profils en un seul produit
+    (bloc CSR x profils denses) ; seul le top-k de chaque profil est gardé.
+    Scores et ordre (ex aequo : plus petite position d'abord) sont ceux de
+    ``recommender.search`` profil par profil.
+
+    Args:
+        profile_vectors: Matrice TF-IDF (n_profils x n_features) des profils
+        tfidf_matrix: Matrice TF-IDF CSR des emplois
+        ks (list): Nombre de résultats voulus pour chaque profil
+        rows_list (list): Positions candidates triées de chaque profil
+            (None = tout le corpus)
+        block_rows (int): Nombre de lignes de la matrice par bloc
+
+    Returns:
+        list: (positions, scores) des meilleurs emplois de chaque profil
+    """
+
+    n_profiles = profile_vectors.shape[0]
+    queries = np.asarray(profile_vectors.T.toarray(), dtype=query_dtype(tfidf_matrix))
+    kept_positions = [[] for _ in range(n_profiles)]
+    kept_scores = [[] for _ in range(n_profiles)]
+
+    for start in range(0, tfidf_matrix.shape[0], block_rows):
+        end = min(start + block_rows, tfidf_matrix.shape[0])
+
+        # Candidats de chaque profil dans ce bloc (positions locales)
+        local_rows = {}
+        for i in range(n_profiles):
+            if ks[i] <= 0:
+                continue
+            rows = rows_list[i]
+            if rows is None:
+                local_rows[i] = None
+            else:
+                low, high = np.searchsorted(rows, [start, end])
+                if high > low:
+                    local_rows[i] = np.asarray(rows[low:high], dtype=np.int64) - start
+        if not local_rows:
+            continue
+
+        active = list(local_rows)
+        block_scores = np.asarray(
+            row_block(tfidf_matrix, start, end) @ np.ascontiguousarray(queries[:, active]), dtype=np.float64
+        )
+
+        for column, i in enumerate(active):
+            local = local_rows[i]
+            scores = block_scores[:, column] if local is None else block_scores[local, column]
+            # Gagnants du bloc remis dans l'ordre des positions pour la fusion
+            best = np.sort(top_k(scores, ks[i]))
+            kept_positions[i].append((best if local is None else local[best]) + start)
+            kept_scores[i].append(scores[best])
+
+    results = []
+    for i in range(n_profiles):
+        if not kept_positions[i]:
+            results.append((np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float64)))
+            continue
+        positions = np.concatenate(kept_positions[i])
+        scores = np.concatenate(kept_scores[i])
+        best = top_k(scores, ks[i])
+        results.append((positions[best], scores[best]))
+    return results
+
+
+def recommend_batch(profiles, model, n_recommendations=10, block_rows=BLOCK_ROWS):
+    """
+    Recommande des emplois pour un paquet de profils
+
+    Args:
+        profiles (pd.DataFrame): Profils (voir colonnes d'entrée du module)
+        model (tuple): Résultat de ``load_serving_model``
+        n_recommendations (int): Nombre d'emplois par profil (si la colonne
+            ``n_recommendations`` est absente ou vide)
+        block_rows (int): Nombre de lignes de la matrice par bloc
+
+    Returns:
+        pd.DataFrame: Une ligne par (profil, emploi recommandé) avec
+        ``profile_id``, ``rank``, les colonnes de l'emploi et
+        ``similarity_score``
+    """
+
+    vectorizer, tfidf_matrix, jobs, metadata, filter_index = model
+
+    records = profiles.to_dict('records')
+    rows_list, ks = [], []
+    for record in records:
+        filters = profile_filters(record)
+        if filter_index is not None:
+            rows_list.append(filter_index.candidate_rows(**filters))
+        else:
+            rows_list.append(candidate_rows(jobs, **filters))
+        k = record.get('n_recommendations')
+        ks.append(n_recommendations if k is None or pd.isna(k) else int(k))
+
+    # Un seul appel au vectorizer pour tout le paquet
+    texts = profiles['profile_text'].fillna("").astype(str).tolist()
+    profile_vectors = vectorizer.transform(texts)
+
+    found = batch_search(profile_vectors, tfidf_matrix, ks, rows_list, block_rows)
+
+    profile_ids = np.concatenate([[record['profile_id']] * len(positions)
+                                  for record, (positions, _) in zip(records, found)] or [[]])
+    ranks = np.concatenate([np.arange(1, len(positions) + 1) for positions, _ in found] or [[]])
+    positions = np.concatenate([positions for positions, _ in found] or [[]]).astype(np.intp)
+    scores = np.concatenate([scores for _, scores in found] or [[]])
+
+    # Les colonnes des emplois ne sont lues que pour les lignes gagnantes
+    columns = [column for column in RESULT_COLUMNS if column in jobs.columns]
+    results = jobs.take(positions)[columns].reset_index(drop=True)
+    results.insert(0, 'profile_id', profile_ids)
+    results.insert(1, 'rank', ranks.astype(int))
+    results['similarity_score'] = scores
+    return results
+
+
+# ============================================================================
+# TRAITEMENT D'UN FICHIER (PROCESSUS PARALLÈLES + REPRISE)
+# ============================================================================
+
+_worker_model = None
+
+
+def _init_worker(model_dir):
+    """Charge le modèle une fois par processus (pages mappées partagées)."""
+    global _worker_model
+    _worker_model = load_serving_model(model_dir)
+
+
+def _score_chunk(profiles, n_recommendations, block_rows):
+    return recommend_batch(profiles, _worker_model, n_recommendations, block_rows)
+
+
+def _write_part(results, output_dir, chunk_id, output_format):
+    """Écrit le résultat d'un paquet de façon atomique."""
+    path = os.path.join(output_dir, f"part-{chunk_id:05d}.{output_format}")
+    tmp_path = f"{path}.tmp"
+    if output_format == 'parquet':
+        results.to_parquet(tmp_path, index=False)
+    else:
+        results.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def _write_checkpoint(output_dir, checkpoint):
+    path = os.path.join(output_dir, CHECKPOINT_FILE)
+    with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(f"{path}.tmp", path)
+
+
+def _load_checkpoint(output_dir, settings):
+    """Point de reprise existant, s'il correspond aux mêmes paramètres."""
+    path = os.path.join(output_dir, CHECKPOINT_FILE)
+    if not os.path.exists(path):
+        return {'settings': settings, 'completed': []}
+    with open(path, encoding='utf-8') as f:
+        checkpoint = json.load(f)
+    if checkpoint['settings'] != settings:
+        raise ValueError(
+            f"{path} a été créé avec d'autres paramètres (profils, modèle ou "
+            f"taille des paquets) : utiliser un autre dossier de sortie"
+        )
+    return checkpoint
+
+
+def run_batch(input_path, output_dir, model_dir="model", n_recommendations=10,
+              workers=1, chunk_size=CHUNK_PROFILES, block_rows=BLOCK_ROWS,
+              output_format='parquet'):
+    """
+    Recommande des emplois pour tous les profils d'un fichier
+
+    Les paquets sont répartis sur ``workers`` processus et écrits dans
+    ``output_dir`` (un fichier ``part-NNNNN`` par paquet). Les paquets déjà
+    écrits, notés dans ``checkpoint.json``, sont sautés à la relance.
+
+    Args:
+        input_path (str): Fichier de profils (CSV ou JSONL)
+        output_dir (str): Dossier des résultats
+        model_dir (str): Dossier du modèle
+        n_recommendations (int): Nombre d'emplois par profil par défaut
+        workers (int): Nombre de processus (1 = dans ce processus)
+        chunk_size (int): Nombre de profils par paquet
+        block_rows (int): Nombre de lignes de la matrice par bloc
+        output_format (str): 'parquet' ou 'csv'
+
+    Returns:
+        dict: Nombre de paquets traités et sautés, durée (secondes)
+    """
+
+    os.makedirs(output_dir, exist_ok=True)
+    stat = os.stat(input_path)
+    settings = {
+        'input': os.path.abspath(input_path),
+        'input_size': stat.st_size,
+        'input_mtime_ns': stat.st_mtime_ns,
+        'model': model_fingerprint(model_dir),
+        'chunk_size': chunk_size,
+        'n_recommendations': n_recommendations,
+        'format': output_format,
+    }
+    checkpoint = _load_checkpoint(output_dir, settings)
+    completed = set(checkpoint['completed'])
+
+    def _done(chunk_id, results):
+        _write_part(results, output_dir, chunk_id, output_format)
+        completed.add(chunk_id)
+        checkpoint['completed'] = sorted(completed)
+        _write_checkpoint(output_dir, checkpoint)
+
+    start = time.perf_counter()
+    processed = skipped = 0
+    chunks = (
+        (chunk_id, profiles)
+        for chunk_id, profiles in enumerate(read_profiles(input_path, chunk_size))
+    )
+
+    if workers <= 1:
+        model = load_serving_model(model_dir)
+        for chunk_id, profiles in chunks:
+            if chunk_id in completed:
+                skipped += 1
+                continue
+            _done(chunk_id, recommend_batch(profiles, model, n_recommendations, block_rows))
+            processed += 1
+    else:
+        # Au plus 2 paquets en attente par processus : la lecture reste bornée
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(model_dir,)) as pool:
+            pending = deque()
+            for chunk_id, profiles in chunks:
+                if chunk_id in completed:
+                    skipped += 1
+                    continue
+                pending.append((chunk_id, pool.submit(_score_chunk, profiles, n_recommendations, block_rows)))
+                while len(pending) >= 2 * workers:
+                    done_id, future = pending.popleft()
+                    _done(done_id, future.result())
+                    processed += 1
+            while pending:
+                done_id, future = pending.popleft()
+                _done(done_id, future.result())
+                processed += 1
+
+    return {'processed': processed, 'skipped': skipped, 'seconds': time.perf_counter() - start}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recommandations d'emplois pour un fichier de profils")
+    parser.add_argument('input', help="Profils (CSV ou JSONL, colonne profile_text)")
+    parser.add_argument('output', help="Dossier des résultats (part-NNNNN + checkpoint.json)")
+    parser.add_argument('--model', default='model')
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_PROFILES)
+    parser.add_argument('--block-rows', type=int, default=BLOCK_ROWS)
+    parser.add_argument('--format', choices=['parquet', 'csv'], default='parquet')
+    args = parser.parse_args()
+
+    report = run_batch(args.input, args.output, model_dir=args.model, n_recommendations=args.top,
+                       workers=args.workers, chunk_size=args.chunk_size,
+                       block_rows=args.block_rows, output_format=args.format)
+    print(f"✅ {report['processed']} paquets traités, {report['skipped']} repris du checkpoint "
+          f"en {report['seconds']:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,606 @@
+"""
+🏁 JOB INTELLIGENT - Banc d'essai des recommandations
+
+Mesure ce que promet l'application (chargement < 2 secondes, ~500MB) sur
+un corpus reproductible, sans dépendre du dataset LinkedIn :
+    - ``generate`` : corpus synthétique aux colonnes de ``jobs_data.pkl``
+      (title, description, skills_text, med_salary, remote_allowed, ...)
+      aux tailles 50K, 553K (corpus complet) et 2M, écrit directement au
+      format ``model/`` par le même pipeline que ``prepare_model.py``
+    - ``run`` : chargement (processus neuf), ``vectorizer.transform`` et
+      ``recommend_jobs`` par combinaison de filtres et niveau de
+      concurrence ; latences p50/p95/p99, requêtes par seconde, pic de
+      mémoire résidente, écrits en JSON
+    - ``compare`` : compare deux fichiers JSON et signale les régressions
+      (code de sortie 1, utilisable en intégration continue)
+
+Usage :
+    python benchmark.py generate bench/553k --size 553k
+    python benchmark.py run bench/553k --output bench/553k.json --concurrency 1 4 8
+    python benchmark.py compare bench/baseline.json bench/553k.json --tolerance 0.1
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from prepare_model import CHUNK_SIZE, JOB_COLUMNS, write_model
+from recommender import recommend_jobs
+from serving import load_serving_model, process_rss_bytes, warm_up
+
+
+BENCHMARK_VERSION = 1
+
+# Tailles de corpus : échantillon du notebook, corpus complet, croissance
+SIZES = {'50k': 50_000, '553k': 553_000, '2m': 2_000_000}
+
+# Combinaisons de filtres mesurées (valeurs résolues sur le modèle, voir filter_mixes)
+FILTER_MIXES = ('none', 'location', 'salary', 'experience', 'remote', 'all')
+
+CONCURRENCY_LEVELS = (1, 4, 8)
+
+
+# ============================================================================
+# CORPUS SYNTHÉTIQUE
+# ============================================================================
+
+ROLES = {
+    'Software Engineer': "python java javascript backend frontend api cloud microservices git agile code review",
+    'Data Scientist': "python machine learning statistics sql pandas models experimentation deep learning",
+    'Data Analyst': "sql excel tableau power bi dashboards reporting analytics stakeholders insights",
+    'DevOps Engineer': "aws kubernetes docker terraform ci cd linux monitoring automation infrastructure",
+    'Registered Nurse': "patient care clinical hospital nursing medication assessment rn license bls",
+    'Sales Representative': "sales quota crm clients pipeline negotiation territory prospecting revenue",
+    'Project Manager': "project planning budget schedule stakeholders risk delivery scrum pmp",
+    'Accountant': "accounting gaap reconciliation ledger audit tax financial statements cpa excel",
+    'Customer Service Representative': "customer service phone support tickets resolution communication",
+    'Marketing Manager': "marketing campaigns brand digital seo content social media analytics",
+    'Mechanical Engineer': "cad solidworks design manufacturing prototypes testing mechanical",
+    'Business Analyst': "requirements process analysis sql stakeholders documentation workflows",
+    'Product Manager': "roadmap product strategy customers discovery prioritization launch metrics",
+    'Financial Analyst': "financial modeling forecasting budgeting excel variance analysis reporting",
+    'Teacher': "teaching curriculum students classroom lesson plans education assessment",
+    'Administrative Assistant': "scheduling calendar office administration filing microsoft office",
+    'Warehouse Associate': "warehouse forklift shipping receiving inventory picking packing safety",
+    'Graphic Designer': "design adobe photoshop illustrator branding layouts typography creative",
+    'Human Resources Specialist': "recruiting onboarding benefits payroll employee relations hris",
+    'Electrician': "electrical wiring installation maintenance troubleshooting nec safety",
+}
+
+SENIORITIES = ("", "Senior ", "Junior ", "Lead ", "Principal ", "Associate ")
+
+SKILL_NAMES = (
+    "Information Technology", "Engineering", "Sales", "Management", "Manufacturing",
+    "Health Care Provider", "Business Development", "Finance", "Marketing", "Accounting/Auditing",
+    "Administrative", "Customer Service", "Analyst", "Project Management", "Research",
+    "Education", "Design", "Human Resources", "Legal", "Consulting", "Writing/Editing",
+    "Strategy/Planning", "Supply Chain", "Art/Creative", "Science", "Quality Assurance",
+)
+
+INDUSTRY_NAMES = (
+    "Hospitals and Health Care", "IT Services and IT Consulting", "Software Development",
+    "Staffing and Recruiting", "Retail", "Financial Services", "Manufacturing",
+    "Construction", "Higher Education", "Government Administration",
+)
+
+# Mots courants des offres LinkedIn, tirés selon une loi de Zipf
+COMMON_WORDS = (
+    "team work experience skills years opportunity company role business support "
+    "management development environment position ability knowledge benefits "
+    "responsibilities requirements strong communication including provide time "
+    "job customers training health insurance equal employer preferred required "
+    "degree bachelor related field plus excellent written verbal growth culture "
+    "leadership collaborate cross functional projects solutions quality high "
+    "performance service products technical processes data systems tools "
+    "industry organization clients best practices ensure manage develop"
+).split()
+
+# Longue traîne : termes rares, pour un vocabulaire de la taille du corpus réel
+TAIL_TERMS = 20000
+
+STATES = ("CA", "TX", "NY", "FL", "IL", "PA", "OH", "NC", "GA", "WA", "MA", "NJ", "VA",
+          "MI", "AZ", "CO", "MN", "TN", "IN", "MO", "WI", "MD", "OR", "SC", "UT")
+CITIES = ("New York", "Los Angeles", "Chicago", "Houston", "Phoenix", "Philadelphia",
+          "San Antonio", "San Diego", "Dallas", "Austin", "Seattle", "Denver", "Boston",
+          "Atlanta", "Miami", "Columbus", "Charlotte", "Portland", "Minneapolis", "Nashville")
+
+# Répartitions observées dans le dataset LinkedIn (notebook, étapes 3 à 5)
+EXPERIENCE_LEVELS = {
+    'Mid-Senior level': 0.36, 'Entry level': 0.30, 'Not Specified': 0.20, 'Associate': 0.09,
+    'Director': 0.03, 'Internship': 0.01, 'Executive': 0.01,
+}
+WORK_TYPES = {
+    'Full-time': 0.80, 'Contract': 0.09, 'Part-time': 0.08, 'Temporary': 0.01,
+    'Internship': 0.01, 'Volunteer': 0.005, 'Other': 0.005,
+}
+REMOTE_SHARE = 0.137
+SALARY_SHARE = 0.06
+
+
+def _zipf_probabilities(n, exponent=1.1):
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def _choice(rng, distribution, size):
+    values = np.array(list(distribution), dtype=object)
+    weights = np.array(list(distribution.values()), dtype=np.float64)
+    return values[rng.choice(len(values), size, p=weights / weights.sum())]
+
+
+def synthetic_jobs(n_rows, seed=0, chunk_size=CHUNK_SIZE):
+    """
+    Génère des offres synthétiques, paquet par paquet, de façon reproductible
+
+    Chaque paquet dépend seulement de ``seed`` et de son numéro : relancer
+    le générateur redonne exactement les mêmes offres (deux passes de
+    ``write_model`` sans garder le corpus en mémoire).
+
+    Args:
+        n_rows (int): Nombre d'offres
+        seed (int): Graine du générateur
+        chunk_size (int): Nombre d'offres par paquet
+
+    Yields:
+        tuple: (texts, jobs) - textes combinés et DataFrame des colonnes
+            ``JOB_COLUMNS`` (+ industries), comme ``prepare_model.iter_jobs``
+    """
+
+    roles = list(ROLES)
+    role_words = [np.array(words.split(), dtype=object) for words in ROLES.values()]
+    words = np.array(COMMON_WORDS + [f"term{i:05d}" for i in range(TAIL_TERMS)], dtype=object)
+    word_p = _zipf_probabilities(len(words))
+    company_p = _zipf_probabilities(20000, exponent=0.9)
+    skill_names = np.array(SKILL_NAMES, dtype=object)
+
+    for chunk_number, start in enumerate(range(0, n_rows, chunk_size)):
+        rng = np.random.default_rng([seed, chunk_number])
+        n = min(chunk_size, n_rows - start)
+
+        role = rng.integers(0, len(roles), n)
+        seniority = rng.integers(0, len(SENIORITIES), n)
+        titles = [f"{SENIORITIES[s]}{roles[r]}" for s, r in zip(seniority, role)]
+
+        # Descriptions : ~30 % de termes du métier, le reste en loi de Zipf
+        lengths = rng.integers(40, 260, n)
+        common = words[rng.choice(len(words), lengths.sum(), p=word_p)]
+        bounds = np.concatenate([[0], np.cumsum(lengths)])
+        descriptions = []
+        for i in range(n):
+            tokens = common[bounds[i]:bounds[i + 1]]
+            topical = role_words[role[i]][rng.integers(0, len(role_words[role[i]]), len(tokens) // 3)]
+            descriptions.append(" ".join(tokens) + " " + " ".join(topical))
+
+        n_skills = rng.integers(1, 4, n)
+        skill_index = rng.integers(0, len(skill_names), n_skills.sum())
+        skill_bounds = np.concatenate([[0], np.cumsum(n_skills)])
+        skills = [", ".join(skill_names[skill_index[skill_bounds[i]:skill_bounds[i + 1]]]) for i in range(n)]
+
+        cities = rng.integers(0, len(CITIES), n)
+        states = rng.choice(len(STATES), n, p=_zipf_probabilities(len(STATES), exponent=0.8))
+        locations = np.where(rng.random(n) < 0.08, "United States",
+                             [f"{CITIES[c]}, {STATES[s]}" for c, s in zip(cities, states)])
+
+        # Salaires : rares, annuels ou horaires (comme dans le dataset)
+        yearly = np.round(rng.lognormal(np.log(75000), 0.4, n), -2)
+        hourly = np.round(rng.uniform(15, 60, n), 2)
+        salaries = np.where(rng.random(n) < 0.2, hourly, yearly)
+        salaries = np.where(rng.random(n) < SALARY_SHARE, salaries, 0.0)
+
+        jobs = pd.DataFrame({
+            'job_id': np.arange(start, start + n, dtype=np.int64) + 3_900_000_000,
+            'title': titles,
+            'description': descriptions,
+            'company_name': [f"Company {i}" for i in rng.choice(len(company_p), n, p=company_p)],
+            'location': locations,
+            'med_salary': salaries,
+            'remote_allowed': (rng.random(n) < REMOTE_SHARE).astype(np.float64),
+            'formatted_experience_level': _choice(rng, EXPERIENCE_LEVELS, n),
+            'formatted_work_type': _choice(rng, WORK_TYPES, n),
+            'skills_text': skills,
+            'industries': np.array(INDUSTRY_NAMES, dtype=object)[rng.integers(0, len(INDUSTRY_NAMES), n)],
+        })[[*JOB_COLUMNS, 'industries']]
+
+        texts = (jobs['title'] + ' ' + jobs['description'] + ' ' + jobs['skills_text']).tolist()
+        yield texts, jobs
+
+
+def generate_model(model_dir, n_rows, seed=0, chunk_size=CHUNK_SIZE):
+    """
+    Construit un modèle complet (``model/``) sur un corpus synthétique
+
+    Args:
+        model_dir (str): Dossier du modèle à créer
+        n_rows (int): Nombre d'offres
+        seed (int): Graine du générateur
+        chunk_size (int): Nombre d'offres par paquet
+
+    Returns:
+        dict: Métadonnées du modèle
+    """
+
+    # Taille du corpus exacte : les descriptions générées ne sont pas regroupées
+    return write_model(lambda: synthetic_jobs(n_rows, seed, chunk_size), model_dir, dedup_threshold=None)
+
+
+# ============================================================================
+# MESURES
+# ============================================================================
+
+def peak_rss_bytes():
+    """Pic de mémoire résidente du processus (octets), ou None si indisponible."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def latency_summary(durations, wall_seconds=None):
+    """
+    Percentiles de latence (millisecondes) et débit
+
+    Args:
+        durations (array-like): Durée de chaque requête (secondes)
+        wall_seconds (float): Durée totale mesurée (défaut : somme des durées)
+
+    Returns:
+        dict: n, mean_ms, p50_ms, p95_ms, p99_ms, max_ms, qps
+    """
+
+    durations = np.asarray(durations, dtype=np.float64) * 1000
+    wall_seconds = durations.sum() / 1000 if wall_seconds is None else wall_seconds
+    p50, p95, p99 = np.percentile(durations, [50, 95, 99])
+    return {
+        'n': int(len(durations)),
+        'mean_ms': float(durations.mean()),
+        'p50_ms': float(p50),
+        'p95_ms': float(p95),
+        'p99_ms': float(p99),
+        'max_ms': float(durations.max()),
+        'qps': float(len(durations) / wall_seconds) if wall_seconds > 0 else None,
+    }
+
+
+def _timed_load(model_dir):
+    """Chargement + pré-chauffage, comme ``load_model_and_data`` (processus neuf)."""
+    start = time.perf_counter()
+    model = load_serving_model(model_dir)
+    loaded = time.perf_counter() - start
+    warm_up(model)
+    return {
+        'load_seconds': loaded,
+        'ready_seconds': time.perf_counter() - start,
+        'rss_bytes': process_rss_bytes(),
+        'peak_rss_bytes': peak_rss_bytes(),
+    }
+
+
+def measure_load(model_dir, repeats=3):
+    """
+    Mesure le chargement du modèle dans des processus neufs
+
+    Le cache disque du système n'est pas vidé : les mesures après la
+    première correspondent à un redémarrage de l'application.
+
+    Args:
+        model_dir (str): Dossier du modèle
+        repeats (int): Nombre de chargements
+
+    Returns:
+        dict: Percentiles de chargement et de mise en service, pic de mémoire
+    """
+
+    context = multiprocessing.get_context('spawn')
+    runs = []
+    for _ in range(repeats):
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            runs.append(executor.submit(_timed_load, model_dir).result())
+
+    summary = latency_summary([run['ready_seconds'] for run in runs])
+    summary['load_p50_ms'] = float(np.median([run['load_seconds'] for run in runs]) * 1000)
+    summary['first_ms'] = runs[0]['ready_seconds'] * 1000
+    summary['rss_mb'] = max(run['rss_bytes'] or 0 for run in runs) / 1024 ** 2
+    summary['peak_rss_mb'] = max(run['peak_rss_bytes'] or 0 for run in runs) / 1024 ** 2
+    summary.pop('qps')
+    return summary
+
+
+def benchmark_profiles(jobs, n_queries=200, seed=0):
+    """
+    Profils de requête : titres et compétences d'offres tirées au hasard
+
+    Args:
+        jobs: Emplois du modèle (DataFrame ou JobTable)
+        n_queries (int): Nombre de profils
+        seed (int): Graine du tirage
+
+    Returns:
+        list: Textes de profil
+    """
+
+    rng = np.random.default_rng(seed)
+    positions = np.sort(rng.choice(len(jobs), min(n_queries, len(jobs)), replace=False))
+    sample = jobs.take(positions)
+    profiles = (sample['title'].astype(str) + ' with ' + sample['skills_text'].astype(str)).tolist()
+    rng.shuffle(profiles)
+    return profiles
+
+
+def filter_mixes(filter_index):
+    """
+    Valeurs des filtres de chaque combinaison, résolues sur le modèle
+
+    Les valeurs les plus fréquentes sont prises (ex. l'État le plus
+    représenté) : les mêmes combinaisons sont comparables d'un modèle à
+    l'autre.
+
+    Returns:
+        dict: Nom de combinaison -> arguments de ``recommend_jobs``
+    """
+
+    def most_common(column):
+        if not filter_index.has_column(column):
+            return None
+        # Instantané segmenté : fréquences de la base
+        postings = getattr(filter_index, 'base', filter_index).postings[column]
+        counts = np.diff(np.asarray(postings.offsets))
+        values = [(count, value) for count, value in zip(counts, postings.values)
+                  if value not in ('Not Specified', 'United States')]
+        return max(values)[1] if values else None
+
+    location = most_common('location')
+    state = location.rsplit(', ', 1)[-1] if location and ', ' in location else location
+    mixes = {
+        'none': {},
+        'location': {'location_filter': state},
+        'salary': {'min_salary': 50000},
+        'experience': {'experience_filter': most_common('formatted_experience_level'),
+                       'work_type_filter': most_common('formatted_work_type')},
+        'remote': {'remote_only': True},
+    }
+    mixes['all'] = {key: value for mix in mixes.values() for key, value in mix.items()}
+    return mixes
+
+
+def measure_queries(function, profiles, concurrency=1):
+    """
+    Exécute ``function(profile)`` pour chaque profil avec ``concurrency`` threads
+
+    Returns:
+        dict: Résumé de latence (voir ``latency_summary``)
+    """
+
+    def _timed(profile):
+        start = time.perf_counter()
+        function(profile)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    if concurrency == 1:
+        durations = [_timed(profile) for profile in profiles]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            durations = list(executor.map(_timed, profiles))
+    return latency_summary(durations, time.perf_counter() - start)
+
+
+def run_benchmark(model_dir, n_queries=200, concurrency_levels=CONCURRENCY_LEVELS,
+                  mixes=FILTER_MIXES, load_repeats=3, n_recommendations=10, searcher=None):
+    """
+    Mesure chargement, vectorisation et recommandation sur un modèle
+
+    Args:
+        model_dir (str): Dossier du modèle
+        n_queries (int): Nombre de requêtes par mesure
+        concurrency_levels (iterable): Nombres de threads simultanés
+        mixes (iterable): Combinaisons de filtres (voir ``FILTER_MIXES``)
+        load_repeats (int): Chargements mesurés (0 = ne pas mesurer)
+        n_recommendations (int): Taille du top-k
+        searcher: Moteur de recherche passé à ``recommend_jobs``
+
+    Returns:
+        dict: Rapport JSON-sérialisable (environnement, modèle, résultats)
+    """
+
+    report = {
+        'benchmark_version': BENCHMARK_VERSION,
+        'created_at': pd.Timestamp.now().isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+        },
+        'results': [],
+    }
+
+    if load_repeats:
+        report['load'] = measure_load(model_dir, load_repeats)
+
+    model = load_serving_model(model_dir)
+    vectorizer, tfidf_matrix, jobs, metadata, filter_index = model
+    warm_up(model)
+    report['model'] = {
+        'model_dir': os.path.abspath(model_dir),
+        'n_jobs': int(tfidf_matrix.shape[0]),
+        'vocabulary_size': int(tfidf_matrix.shape[1]),
+        'nnz': int(tfidf_matrix.nnz),
+        'created_at': metadata.get('created_at'),
+    }
+
+    profiles = benchmark_profiles(jobs, n_queries)
+    resolved = filter_mixes(filter_index)
+
+    for concurrency in concurrency_levels:
+        summary = measure_queries(lambda profile: vectorizer.transform([profile]), profiles, concurrency)
+        report['results'].append({'name': 'transform', 'filters': 'none', 'concurrency': concurrency, **summary})
+
+        for mix in mixes:
+            filters = resolved[mix]
+
+            def _recommend(profile):
+                return recommend_jobs(profile, jobs, vectorizer, tfidf_matrix,
+                                      n_recommendations=n_recommendations,
+                                      filter_index=filter_index, searcher=searcher, **filters)
+
+            summary = measure_queries(_recommend, profiles, concurrency)
+            report['results'].append({'name': 'recommend_jobs', 'filters': mix,
+                                      'concurrency': concurrency, **summary})
+
+    report['filters'] = {mix: resolved[mix] for mix in mixes}
+    report['peak_rss_mb'] = (peak_rss_bytes() or 0) / 1024 ** 2
+    return report
+
+
+# ============================================================================
+# COMPARAISON ENTRE DEUX EXÉCUTIONS
+# ============================================================================
+
+def compare_reports(baseline, current, tolerance=0.10):
+    """
+    Compare deux rapports et liste les régressions
+
+    Une mesure régresse si son p95 augmente, ou son débit baisse, de plus de
+    ``tolerance`` (fraction) ; le chargement et le pic de mémoire aussi.
+
+    Args:
+        baseline (dict): Rapport de référence
+        current (dict): Rapport à évaluer
+        tolerance (float): Variation relative tolérée
+
+    Returns:
+        tuple: (rows, regressions) - lignes de comparaison et leur sous-ensemble
+            en régression
+    """
+
+    def _row(name, metric, before, after, higher_is_better=False):
+        change = (after - before) / before if before else 0.0
+        worse = -change if higher_is_better else change
+        return {'name': name, 'metric': metric, 'baseline': before, 'current': after,
+                'change': change, 'regression': worse > tolerance}
+
+    rows = []
+    previous = {(r['name'], r['filters'], r['concurrency']): r for r in baseline.get('results', [])}
+    for result in current.get('results', []):
+        key = (result['name'], result['filters'], result['concurrency'])
+        if key not in previous:
+            continue
+        name = f"{key[0]}[{key[1]}]x{key[2]}"
+        rows.append(_row(name, 'p95_ms', previous[key]['p95_ms'], result['p95_ms']))
+        if previous[key].get('qps') and result.get('qps'):
+            rows.append(_row(name, 'qps', previous[key]['qps'], result['qps'], higher_is_better=True))
+
+    if 'load' in baseline and 'load' in current:
+        rows.append(_row('load', 'p50_ms', baseline['load']['p50_ms'], current['load']['p50_ms']))
+        rows.append(_row('load', 'peak_rss_mb', baseline['load']['peak_rss_mb'], current['load']['peak_rss_mb']))
+    if baseline.get('peak_rss_mb') and current.get('peak_rss_mb'):
+        rows.append(_row('run', 'peak_rss_mb', baseline['peak_rss_mb'], current['peak_rss_mb']))
+
+    return rows, [row for row in rows if row['regression']]
+
+
+def _print_report(report):
+    if 'load' in report:
+        load = report['load']
+        print(f"📦 Chargement : p50 {load['p50_ms']:.0f} ms (premier {load['first_ms']:.0f} ms), "
+              f"pic mémoire {load['peak_rss_mb']:.0f} MB")
+    print(f"{'mesure':<30} {'conc.':>5} {'p50':>9} {'p95':>9} {'p99':>9} {'QPS':>9}")
+    for result in report['results']:
+        print(f"{result['name'] + '[' + result['filters'] + ']':<30} {result['concurrency']:>5} "
+              f"{result['p50_ms']:>7.2f}ms {result['p95_ms']:>7.2f}ms {result['p99_ms']:>7.2f}ms "
+              f"{result['qps']:>9.1f}")
+    print(f"📈 Pic de mémoire du banc d'essai : {report['peak_rss_mb']:.0f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc d'essai des recommandations")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    generate_parser = subparsers.add_parser('generate', help="Construire un modèle synthétique")
+    generate_parser.add_argument('model_dir')
+    generate_parser.add_argument('--size', choices=sorted(SIZES), default='50k')
+    generate_parser.add_argument('--rows', type=int, default=None, help="Nombre d'offres (remplace --size)")
+    generate_parser.add_argument('--seed', type=int, default=0)
+    generate_parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    run_parser = subparsers.add_parser('run', help="Mesurer un modèle")
+    run_parser.add_argument('model_dir')
+    run_parser.add_argument('--output', default=None, help="Fichier JSON des résultats")
+    run_parser.add_argument('--queries', type=int, default=200)
+    run_parser.add_argument('--concurrency', type=int, nargs='+', default=list(CONCURRENCY_LEVELS))
+    run_parser.add_argument('--filters', nargs='+', choices=FILTER_MIXES, default=list(FILTER_MIXES))
+    run_parser.add_argument('--load-repeats', type=int, default=3)
+    run_parser.add_argument('--searcher', choices=('exact', 'inverted', 'ann', 'sharded'), default='exact')
+    run_parser.add_argument('--shards', type=int, default=os.cpu_count() or 1,
+                            help="Tranches de --searcher sharded")
+    run_parser.add_argument('--backend', choices=('thread', 'process'), default='thread',
+                            help="Workers de --searcher sharded")
+
+    compare_parser = subparsers.add_parser('compare', help="Comparer deux exécutions")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--tolerance', type=float, default=0.10)
+
+    args = parser.parse_args()
+
+    if args.command == 'generate':
+        n_rows = args.rows or SIZES[args.size]
+        start = time.perf_counter()
+        metadata = generate_model(args.model_dir, n_rows, args.seed, args.chunk_size)
+        print(f"✅ Modèle synthétique : {metadata['n_jobs']:,} offres, vocabulaire "
+              f"{metadata['vocabulary_size']:,} ({time.perf_counter() - start:.0f} s, "
+              f"pic mémoire {(peak_rss_bytes() or 0) / 1024 ** 2:.0f} MB)")
+
+    elif args.command == 'run':
+        searcher = None
+        if args.searcher == 'inverted':
+            from inverted_index import load_inverted_index
+            searcher = load_inverted_index(args.model_dir)
+        elif args.searcher == 'ann':
+            from ann_index import load_ann_index
+            searcher = load_ann_index(args.model_dir)
+        elif args.searcher == 'sharded':
+            from sharded_search import ShardedSearcher
+            searcher = ShardedSearcher(load_serving_model(args.model_dir)[1], args.shards, args.backend)
+        if args.searcher != 'exact' and searcher is None:
+            sys.exit(f"❌ Index '{args.searcher}' absent (ou périmé) dans {args.model_dir}")
+
+        report = run_benchmark(args.model_dir, args.queries, args.concurrency, args.filters,
+                               args.load_repeats, searcher=searcher)
+        report['searcher'] = args.searcher
+        if args.searcher == 'sharded':
+            report['sharded'] = {'shards': searcher.n_shards, 'backend': searcher.backend}
+        _print_report(report)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            print(f"💾 Résultats : {args.output}")
+
+    elif args.command == 'compare':
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        with open(args.current, encoding='utf-8') as f:
+            current = json.load(f)
+        rows, regressions = compare_reports(baseline, current, args.tolerance)
+        for row in rows:
+            flag = "❌" if row['regression'] else "  "
+            print(f"{flag} {row['name']:<32} {row['metric']:<12} {row['baseline']:>10.2f} -> "
+                  f"{row['current']:>10.2f} ({row['change']:+.1%})")
+        if regressions:
+            sys.exit(f"❌ {len(regressions)} régression(s) au-delà de {args.tolerance:.0%}")
+        print(f"✅ Aucune régression au-delà de {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,596 @@
+"""
+📤 JOB INTELLIGENT - Export Parquet pour PowerBI (incrémental)
+
+Remplace les exports CSV du notebook (``powerbi_data/*.csv``) par une étape
+réutilisable :
+    1. ``job_postings.csv`` est lu une seule fois, par paquets, joint aux
+       entreprises (ville, état, pays, taille) par company_id
+    2. Offres, compétences et industries par offre sont écrites en Parquet
+       typé et compressé, partitionné par état et mois de publication :
+
+           powerbi_data/
+           ├── jobs/state=CA/month=2024-04/part-0.parquet
+           ├── job_skills/state=CA/month=2024-04/part-0.parquet
+           ├── job_industries/...
+           ├── companies.parquet, salaries.parquet, benefits.parquet
+           ├── aggregates/         # company_stats, city_stats, ...
+           └── export_state.json   # empreinte de chaque fichier écrit
+
+    3. Toutes les tables agrégées (company_stats, city_stats,
+       experience_stats, skills_demand, salary_by_title,
+       location_distribution) sont mises à jour pendant cette même passe :
+       comptes et sommes par ``np.bincount`` sur des codes stables entre
+       paquets, médianes calculées une fois à la fin
+    4. Chaque fichier porte l'empreinte de ses lignes sources : une
+       partition dont les lignes n'ont pas changé depuis le dernier export
+       n'est pas réécrite (rafraîchissement quotidien = partitions modifiées)
+
+La mémoire dépend de la taille des paquets et du nombre de valeurs
+distinctes des agrégats, pas du nombre d'offres : les lignes de chaque
+partition transitent par un dossier temporaire (``.staging``).
+
+Nécessite pyarrow (installé avec ``requirements.txt``).
+
+Usage :
+    python export_powerbi.py dataset/ powerbi_data/ --chunk-size 10000
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+from model_store import CategoryColumn
+from prepare_model import CHUNK_SIZE, _read_mapping
+
+
+EXPORT_DIR = "powerbi_data"
+STATE_FILE = "export_state.json"
+STAGING_DIR = ".staging"
+AGGREGATES_DIR = "aggregates"
+PARTITION_FILE = "part-0.parquet"
+
+# Incrémenter quand le contenu des fichiers change : tout est réécrit
+EXPORT_VERSION = 1
+
+# Compression lue par PowerBI (snappy, gzip) et par les autres outils
+PARQUET_COMPRESSION = 'snappy'
+
+# Valeur des textes manquants (comme le notebook)
+NOT_SPECIFIED = "Not Specified"
+UNKNOWN_MONTH = "unknown"
+
+# Colonnes des offres exportées (cellule "EXPORT DES DONNÉES POUR POWERBI")
+JOB_COLUMNS = [
+    'job_id', 'title', 'company_name', 'company_id', 'location', 'city', 'state', 'country',
+    'formatted_work_type', 'formatted_experience_level', 'remote_allowed',
+    'min_salary', 'med_salary', 'max_salary', 'currency', 'pay_period',
+    'views', 'applies', 'sponsored', 'application_type'
+]
+COMPANY_COLUMNS = ['company_id', 'name', 'company_size', 'city', 'state', 'country']
+NUMERIC_COLUMNS = (
+    'company_id', 'min_salary', 'med_salary', 'max_salary', 'views', 'applies',
+    'sponsored', 'remote_allowed', 'original_listed_time', 'listed_time'
+)
+
+# Textes de faible cardinalité : dictionnaire Parquet (category)
+CATEGORY_COLUMNS = (
+    'company_name', 'location', 'city', 'state', 'country', 'formatted_work_type',
+    'formatted_experience_level', 'currency', 'pay_period', 'application_type',
+    'skill_abr', 'skill_name', 'industry_name', 'month'
+)
+# Textes remplacés par 'Not Specified' quand ils manquent
+FILLED_COLUMNS = ('company_name', 'location', 'city', 'state', 'country', 'formatted_experience_level')
+# Compteurs entiers (valeurs manquantes possibles)
+COUNT_COLUMNS = ('views', 'applies', 'company_size')
+
+
+# ============================================================================
+# LECTURE ET TYPAGE
+# ============================================================================
+
+def read_companies(dataset_dir):
+    """Entreprises (colonnes de la cellule d'export), None si absentes."""
+    path = os.path.join(dataset_dir, 'companies.csv')
+    if not os.path.exists(path):
+        return None
+    header = pd.read_csv(path, nrows=0).columns
+    companies = pd.read_csv(path, usecols=[column for column in COMPANY_COLUMNS if column in header])
+    return companies.drop_duplicates(subset=['company_id'])
+
+
+def read_job_links(dataset_dir, filename, column, mapping_file, name_column):
+    """
+    Table 1-N (job_id, code) avec le libellé du code, triée par job_id
+
+    Returns:
+        pd.DataFrame: job_id, code, libellé (vide si le fichier est absent)
+    """
+
+    path = os.path.join(dataset_dir, filename)
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=['job_id', column, name_column])
+    links = pd.read_csv(path, usecols=['job_id', column]).dropna()
+    names = _read_mapping(os.path.join(dataset_dir, 'mappings', mapping_file), column, name_column)
+    links[name_column] = links[column].map(names)
+    return links.sort_values('job_id', kind='stable').reset_index(drop=True)
+
+
+def _links_for(links, job_ids):
+    """Lignes de ``links`` (triée par job_id) des offres ``job_ids``."""
+    link_ids = links['job_id'].to_numpy()
+    wanted = np.unique(job_ids)
+    starts = np.searchsorted(link_ids, wanted, side='left')
+    lengths = np.searchsorted(link_ids, wanted, side='right') - starts
+    # Concaténation des plages [start, start + length) sans boucle Python
+    offsets = np.cumsum(lengths) - lengths
+    positions = np.arange(lengths.sum()) - np.repeat(offsets - starts, lengths)
+    return links.iloc[positions]
+
+
+def posting_month(jobs):
+    """
+    Mois de publication 'AAAA-MM' de chaque offre
+
+    ``original_listed_time`` (ou ``listed_time``) est un horodatage en
+    millisecondes dans le dataset LinkedIn.
+    """
+
+    for column in ('original_listed_time', 'listed_time'):
+        if column in jobs.columns:
+            listed = pd.to_datetime(jobs[column], unit='ms', errors='coerce')
+            return listed, listed.dt.strftime('%Y-%m').fillna(UNKNOWN_MONTH)
+    missing = pd.Series(pd.NaT, index=jobs.index, dtype='datetime64[ns]')
+    return missing, pd.Series(UNKNOWN_MONTH, index=jobs.index)
+
+
+def iter_export_chunks(dataset_dir, companies=None, chunk_size=CHUNK_SIZE):
+    """
+    Lit les offres par paquets, jointes aux entreprises
+
+    Yields:
+        pd.DataFrame: Offres du paquet (colonnes de ``JOB_COLUMNS``
+        présentes, ``listed_at``, ``month`` et ``partition``)
+    """
+
+    path = os.path.join(dataset_dir, 'job_postings.csv')
+    header = pd.read_csv(path, nrows=0).columns
+    usecols = [column for column in (*JOB_COLUMNS, 'original_listed_time', 'listed_time') if column in header]
+    dtypes = {column: 'float64' if column in NUMERIC_COLUMNS else 'object' for column in usecols}
+    dtypes['job_id'] = 'int64'
+
+    for chunk in pd.read_csv(path, usecols=usecols, dtype=dtypes, chunksize=chunk_size):
+        chunk = chunk.drop_duplicates(subset=['job_id'])
+        if companies is not None and 'company_id' in chunk.columns:
+            located = companies.drop(columns=['name', 'company_size'], errors='ignore')
+            located = located.drop(columns=[column for column in located.columns
+                                            if column in chunk.columns and column != 'company_id'])
+            chunk = chunk.merge(located, on='company_id', how='left')
+        for column in FILLED_COLUMNS:
+            if column in chunk.columns:
+                chunk[column] = chunk[column].fillna(NOT_SPECIFIED)
+        if 'state' not in chunk.columns:
+            chunk['state'] = NOT_SPECIFIED
+
+        chunk['listed_at'], chunk['month'] = posting_month(chunk)
+        chunk['partition'] = [
+            f"state={quote(str(state), safe='')}/month={month}"
+            for state, month in zip(chunk['state'], chunk['month'])
+        ]
+        yield chunk.drop(columns=['original_listed_time', 'listed_time'], errors='ignore')
+
+
+def typed_frame(frame):
+    """
+    Types PowerBI d'une table exportée
+
+    Textes de faible cardinalité -> category (dictionnaire Parquet),
+    compteurs -> entiers nullables, ``remote_allowed`` -> booléen nullable
+    (1.0 = remote, "Unknown"/manquant = NA), ``sponsored`` -> booléen.
+    """
+
+    frame = frame.copy()
+    for column in frame.columns:
+        if column in CATEGORY_COLUMNS:
+            frame[column] = frame[column].astype('category')
+        elif column in COUNT_COLUMNS:
+            frame[column] = pd.to_numeric(frame[column], errors='coerce').round().astype('Int64')
+    if 'remote_allowed' in frame.columns:
+        remote = pd.to_numeric(frame['remote_allowed'], errors='coerce')
+        frame['remote_allowed'] = (remote == 1.0).astype('boolean').mask(remote.isna())
+    if 'sponsored' in frame.columns:
+        frame['sponsored'] = (pd.to_numeric(frame['sponsored'], errors='coerce') == 1).astype('boolean')
+    if 'company_id' in frame.columns:
+        frame['company_id'] = pd.to_numeric(frame['company_id'], errors='coerce').round().astype('Int64')
+    return frame
+
+
+# ============================================================================
+# AGRÉGATS EN UNE PASSE
+# ============================================================================
+
+def _padded_add(total, increment):
+    """``total + increment`` où ``total`` peut être plus court (nouvelles valeurs)."""
+    if len(total) < len(increment):
+        total = np.concatenate([total, np.zeros(len(increment) - len(total), dtype=total.dtype)])
+    return total + increment
+
+
+class GroupStats:
+    """
+    Agrégats par valeur d'une colonne, mis à jour paquet par paquet
+
+    Les valeurs reçoivent des codes stables entre paquets ; comptes et
+    sommes sont cumulés par ``np.bincount``. Les salaires connus sont gardés
+    (code, salaire) pour les médianes, calculées en un seul tri à la fin.
+
+    Attributes:
+        column (str): Colonne de regroupement
+        measures (tuple): Colonnes dont la somme et la moyenne sont suivies
+        counts (np.ndarray): Nombre de lignes par valeur
+    """
+
+    def __init__(self, column, measures=(), salaries=True):
+        self.column = column
+        self.measures = measures
+        self.salaries = salaries
+        self.mapping = {}
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.sums = {measure: np.zeros(0) for measure in measures}
+        self.known = {measure: np.zeros(0, dtype=np.int64) for measure in measures}
+        self._salary_codes = []
+        self._salary_values = []
+
+    def update(self, frame):
+        """Ajoute les lignes d'un paquet."""
+        if self.column not in frame.columns:
+            return
+        codes = CategoryColumn.encode(frame[self.column], self.mapping)
+        size = len(self.mapping)
+        valid = codes >= 0
+        self.counts = _padded_add(self.counts, np.bincount(codes[valid], minlength=size))
+        for measure in self.measures:
+            if measure not in frame.columns:
+                continue
+            values = pd.to_numeric(frame[measure], errors='coerce').to_numpy(dtype=np.float64)
+            known = valid & ~np.isnan(values)
+            self.sums[measure] = _padded_add(
+                self.sums[measure], np.bincount(codes[known], weights=values[known], minlength=size))
+            self.known[measure] = _padded_add(
+                self.known[measure], np.bincount(codes[known], minlength=size))
+        if self.salaries and 'med_salary' in frame.columns:
+            salaries = pd.to_numeric(frame['med_salary'], errors='coerce').to_numpy(dtype=np.float64)
+            known = valid & ~np.isnan(salaries)
+            self._salary_codes.append(codes[known])
+            self._salary_values.append(salaries[known])
+
+    def _padded(self, values, fill=0):
+        size = len(self.mapping)
+        if len(values) < size:
+            values = np.concatenate([values, np.full(size - len(values), fill, dtype=values.dtype)])
+        return values
+
+    def salary_stats(self):
+        """
+        Salaires connus par valeur (moyenne, médiane, min, max, nombre)
+
+        Returns:
+            dict: Tableaux indexés par code (NaN si aucun salaire connu)
+        """
+
+        size = len(self.mapping)
+        codes = np.concatenate(self._salary_codes) if self._salary_codes else np.empty(0, dtype=np.int32)
+        values = np.concatenate(self._salary_values) if self._salary_values else np.empty(0)
+        order = np.lexsort((values, codes))
+        codes, values = codes[order], values[order]
+
+        count = np.bincount(codes, minlength=size)
+        starts = np.concatenate([[0], np.cumsum(count)[:-1]])
+        stats = {name: np.full(size, np.nan) for name in ('mean', 'median', 'min', 'max')}
+        present = count > 0
+        first, last = starts[present], starts[present] + count[present] - 1
+        lower = starts[present] + (count[present] - 1) // 2
+        upper = starts[present] + count[present] // 2
+        stats['min'][present] = values[first]
+        stats['max'][present] = values[last]
+        stats['median'][present] = (values[lower] + values[upper]) / 2
+        stats['mean'][present] = np.bincount(codes, weights=values, minlength=size)[present] / count[present]
+        stats['count'] = count
+        return stats
+
+    def frame(self):
+        """DataFrame des agrégats (colonne, total, sommes, moyennes), trié par valeur."""
+        frame = pd.DataFrame({self.column: list(self.mapping), 'total_jobs': self._padded(self.counts)})
+        for measure in self.measures:
+            sums = self._padded(self.sums[measure])
+            known = self._padded(self.known[measure])
+            frame[f"sum_{measure}"] = sums
+            with np.errstate(invalid='ignore', divide='ignore'):
+                frame[f"mean_{measure}"] = np.where(known > 0, sums / np.maximum(known, 1), np.nan)
+        if self.salaries:
+            for name, values in self.salary_stats().items():
+                frame[f"{name}_salary" if name != 'count' else 'salary_count'] = values
+        return frame.sort_values(self.column, kind='stable').reset_index(drop=True)
+
+
+class ExportAggregates:
+    """
+    Toutes les tables agrégées du notebook, mises à jour en une passe
+
+    Tables (colonnes de la cellule "TABLES AGRÉGÉES POUR POWERBI") :
+    company_stats, city_stats, experience_stats, skills_demand,
+    salary_by_title et location_distribution. Les salaires manquants sont
+    ignorés (pas comptés comme 0).
+    """
+
+    def __init__(self):
+        self.companies = GroupStats('company_name', ('views', 'applies', 'remote'))
+        self.cities = GroupStats('city', ('remote',))
+        self.experience = GroupStats('formatted_experience_level', ('views', 'applies'))
+        self.titles = GroupStats('title')
+        self.locations = GroupStats('location', salaries=False)
+        self.skills = GroupStats('skill_name', salaries=False)
+
+    def update(self, jobs, skills):
+        """Ajoute un paquet d'offres et leurs compétences."""
+        if 'remote_allowed' in jobs.columns:
+            remote = (pd.to_numeric(jobs['remote_allowed'], errors='coerce') == 1.0).astype(np.float64)
+        else:
+            remote = pd.Series(0.0, index=jobs.index)
+        jobs = jobs.assign(remote=remote)
+        for stats in (self.companies, self.cities, self.experience, self.titles, self.locations):
+            stats.update(jobs)
+        self.skills.update(skills)
+
+    def tables(self):
+        """
+        Tables agrégées finales
+
+        Returns:
+            dict: Nom de la table -> DataFrame
+        """
+
+        company = self.companies.frame()
+        city = self.cities.frame()
+        experience = self.experience.frame()
+        title = self.titles.frame()
+
+        tables = {
+            'company_stats': pd.DataFrame({
+                'company_name': company['company_name'],
+                'total_jobs': company['total_jobs'],
+                'median_salary': company['median_salary'],
+                'total_views': company['sum_views'],
+                'total_applies': company['sum_applies'],
+                'remote_ratio': company['sum_remote'] / company['total_jobs'],
+            }),
+            'city_stats': pd.DataFrame({
+                'city': city['city'],
+                'total_jobs': city['total_jobs'],
+                'median_salary': city['median_salary'],
+                'remote_ratio': city['sum_remote'] / city['total_jobs'],
+            })[city['city'] != NOT_SPECIFIED].reset_index(drop=True),
+            'experience_stats': pd.DataFrame({
+                'experience_level': experience['formatted_experience_level'],
+                'total_jobs': experience['total_jobs'],
+                'median_salary': experience['median_salary'],
+                'avg_views': experience['mean_views'],
+                'avg_applies': experience['mean_applies'],
+            }),
+            'salary_by_title': pd.DataFrame({
+                'title': title['title'],
+                'avg_salary': title['mean_salary'],
+                'median_salary': title['median_salary'],
+                'min_salary': title['min_salary'],
+                'max_salary': title['max_salary'],
+                'count': title['salary_count'],
+            }),
+        }
+
+        for name, stats, label in (('skills_demand', self.skills, 'demand_count'),
+                                   ('location_distribution', self.locations, 'count')):
+            counts = stats.frame().rename(columns={'total_jobs': label})
+            tables[name] = counts.sort_values(label, ascending=False, kind='stable').reset_index(drop=True)
+        return tables
+
+
+# ============================================================================
+# ÉCRITURE INCRÉMENTALE
+# ============================================================================
+
+def _digest(frame, digest=None):
+    """
+    Empreinte des lignes d'un DataFrame, complétée paquet par paquet
+
+    Empreinte de chaque ligne, dans l'ordre : indépendante de l'index et du
+    découpage en paquets.
+    """
+
+    if digest is None:
+        digest = hashlib.sha1(f"v{EXPORT_VERSION}:{','.join(map(str, frame.columns))}".encode())
+    digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    return digest
+
+
+def _write_parquet(frame, path):
+    """
+    Écrit un fichier Parquet par remplacement atomique
+
+    Les colonnes catégorielles sont écrites en dictionnaires (int32, texte)
+    quelle que soit leur cardinalité : toutes les partitions d'une table ont
+    le même schéma et se relisent ensemble.
+    """
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    schema = pa.schema(
+        [field.with_type(pa.dictionary(pa.int32(), pa.string()))
+         if pa.types.is_dictionary(field.type) or pa.types.is_null(field.type) and field.name in CATEGORY_COLUMNS
+         else field.with_type(pa.string()) if pa.types.is_large_string(field.type) or pa.types.is_null(field.type)
+         else field for field in table.schema],
+        metadata=table.schema.metadata
+    )
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pq.write_table(table.cast(schema), path + ".tmp", compression=PARQUET_COMPRESSION)
+    os.replace(path + ".tmp", path)
+
+
+def read_export_state(export_dir):
+    """Empreintes des fichiers du dernier export ({} si aucun)."""
+    path = os.path.join(export_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f).get('files', {})
+
+
+def _write_export_state(export_dir, files):
+    path = os.path.join(export_dir, STATE_FILE)
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump({'version': EXPORT_VERSION, 'updated_at': pd.Timestamp.now().isoformat(),
+                   'files': files}, f, indent=2, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+class _Writer:
+    """Écrit un fichier seulement si son empreinte a changé depuis le dernier export."""
+
+    def __init__(self, export_dir, previous, force=False):
+        self.export_dir = export_dir
+        self.previous = previous
+        self.force = force
+        self.files = {}
+        self.written = []
+        self.skipped = []
+
+    def unchanged(self, relative_path, digest):
+        self.files[relative_path] = digest
+        return (not self.force and self.previous.get(relative_path) == digest
+                and os.path.exists(os.path.join(self.export_dir, relative_path)))
+
+    def write(self, relative_path, digest, make_frame):
+        """``make_frame`` n'est appelé que si le fichier doit être réécrit."""
+        if self.unchanged(relative_path, digest):
+            self.skipped.append(relative_path)
+            return
+        _write_parquet(typed_frame(make_frame()), os.path.join(self.export_dir, relative_path))
+        self.written.append(relative_path)
+
+    def remove_stale(self):
+        """Supprime les fichiers du dernier export qui n'existent plus (partitions vidées)."""
+        removed = []
+        for relative_path in sorted(set(self.previous) - set(self.files)):
+            path = os.path.join(self.export_dir, relative_path)
+            if os.path.exists(path):
+                os.remove(path)
+                removed.append(relative_path)
+            directory = os.path.dirname(path)
+            while directory != self.export_dir and os.path.isdir(directory) and not os.listdir(directory):
+                os.rmdir(directory)
+                directory = os.path.dirname(directory)
+        return removed
+
+
+def export_powerbi(dataset_dir="dataset", export_dir=EXPORT_DIR, chunk_size=CHUNK_SIZE, force=False):
+    """
+    Exporte le dataset en Parquet partitionné pour PowerBI
+
+    Args:
+        dataset_dir (str): Dossier des CSV LinkedIn
+        export_dir (str): Dossier d'export (``powerbi_data``)
+        chunk_size (int): Nombre d'offres par paquet
+        force (bool): Réécrire tous les fichiers, même inchangés
+
+    Returns:
+        dict: Fichiers écrits, ignorés (inchangés) et supprimés, nombre d'offres
+    """
+
+    os.makedirs(export_dir, exist_ok=True)
+    staging_dir = os.path.join(export_dir, STAGING_DIR)
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    writer = _Writer(export_dir, read_export_state(export_dir), force)
+
+    companies = read_companies(dataset_dir)
+    links = {
+        'job_skills': read_job_links(dataset_dir, 'job_skills.csv', 'skill_abr', 'skills.csv', 'skill_name'),
+        'job_industries': read_job_links(dataset_dir, 'job_industries.csv', 'industry_id',
+                                         'industries.csv', 'industry_name'),
+    }
+
+    # Passe unique : agrégats + lignes de chaque partition (fichiers
+    # temporaires) + empreinte des lignes sources de chaque partition
+    aggregates = ExportAggregates()
+    digests = {}
+    n_jobs = 0
+    for number, jobs in enumerate(iter_export_chunks(dataset_dir, companies, chunk_size)):
+        partition_of = dict(zip(jobs['job_id'].to_numpy(), jobs['partition']))
+        parts = {'jobs': jobs[[column for column in (*JOB_COLUMNS, 'listed_at', 'month', 'partition')
+                               if column in jobs.columns]]}
+        for table, table_links in links.items():
+            selected = _links_for(table_links, jobs['job_id'].to_numpy())
+            parts[table] = selected.assign(partition=selected['job_id'].map(partition_of).to_numpy())
+        aggregates.update(jobs, parts['job_skills'])
+
+        for table, frame in parts.items():
+            for partition, rows in frame.groupby('partition', sort=False):
+                rows = rows.drop(columns=['partition'])
+                key = f"{table}/{partition}/{PARTITION_FILE}"
+                digests[key] = _digest(rows, digests.get(key))
+                staged = os.path.join(staging_dir, table, partition)
+                os.makedirs(staged, exist_ok=True)
+                rows.to_parquet(os.path.join(staged, f"chunk-{number:06d}.parquet"), index=False,
+                                compression=None)
+        n_jobs += len(jobs)
+
+    for key, digest in sorted(digests.items()):
+        staged = os.path.join(staging_dir, os.path.dirname(key))
+
+        def _partition_rows(staged=staged):
+            return pd.concat([pd.read_parquet(os.path.join(staged, name))
+                              for name in sorted(os.listdir(staged))], ignore_index=True)
+
+        writer.write(key, digest.hexdigest(), _partition_rows)
+    shutil.rmtree(staging_dir, ignore_errors=True)
+
+    # Tables de référence et tables agrégées (petites) : empreinte du contenu
+    references = {'companies': companies}
+    for name in ('salaries', 'benefits'):
+        path = os.path.join(dataset_dir, f"{name}.csv")
+        if os.path.exists(path):
+            references[name] = pd.read_csv(path)
+    for name, frame in references.items():
+        if frame is not None:
+            writer.write(f"{name}.parquet", _digest(frame).hexdigest(), lambda frame=frame: frame)
+    for name, frame in aggregates.tables().items():
+        writer.write(f"{AGGREGATES_DIR}/{name}.parquet", _digest(frame).hexdigest(), lambda frame=frame: frame)
+
+    removed = writer.remove_stale()
+    _write_export_state(export_dir, writer.files)
+    return {'n_jobs': n_jobs, 'written': writer.written, 'skipped': writer.skipped, 'removed': removed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export Parquet partitionné pour PowerBI")
+    parser.add_argument('dataset_dir', nargs='?', default='dataset')
+    parser.add_argument('export_dir', nargs='?', default=EXPORT_DIR)
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--force', action='store_true', help="Réécrire tous les fichiers")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    summary = export_powerbi(args.dataset_dir, args.export_dir, args.chunk_size, args.force)
+    print(f"✅ Export en {time.perf_counter() - start:.1f} s : {summary['n_jobs']:,} offres, "
+          f"{len(summary['written'])} fichiers écrits, {len(summary['skipped'])} inchangés, "
+          f"{len(summary['removed'])} supprimés -> {args.export_dir}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+"""
+🗂️ JOB INTELLIGENT - Index des filtres catégoriels
+
+Index construit une seule fois au chargement du modèle :
+    - chaque valeur catégorielle (location, state, city, expérience, type de
+      contrat) est associée à la liste triée (int32) des lignes qui la portent
+    - les salaires connus sont pré-triés pour un filtre "salaire minimum" par
+      recherche dichotomique
+    - les lignes remote sont pré-calculées
+
+Une combinaison de filtres devient alors une simple intersection de listes
+triées, et les options de la sidebar sont lues dans l'index au lieu de
+re-scanner le DataFrame à chaque rerun Streamlit.
+
+Après des mises à jour incrémentales, ``SegmentedFilterIndex`` combine
+l'index de la base et celui de chaque segment, sans les reconstruire.
+"""
+
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from recommender import local_to_live
+
+
+ROW_DTYPE = np.int32
+INDEX_FILE = "filters.json"
+
+
+def _intersect(row_sets):
+    """Intersection de listes triées, en commençant par la plus courte."""
+    row_sets = sorted(row_sets, key=len)
+    result = row_sets[0]
+    for rows in row_sets[1:]:
+        if len(result) == 0:
+            break
+        result = np.intersect1d(result, rows, assume_unique=True)
+    return result.astype(ROW_DTYPE, copy=False)
+
+
+class ColumnPostings:
+    """
+    Listes de lignes par valeur pour une colonne catégorielle
+
+    Les listes sont concaténées dans un seul tableau ``rows`` ; les lignes de
+    la valeur ``values[i]`` sont ``rows[offsets[i]:offsets[i + 1]]``.
+
+    Attributes:
+        values (list): Valeurs distinctes, dans l'ordre de première apparition
+        offsets (np.ndarray): Bornes de chaque liste dans ``rows``
+        rows (np.ndarray): Positions (int32) triées par valeur puis par ligne
+    """
+
+    def __init__(self, values, offsets, rows):
+        self.values = list(values)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.rows = np.asarray(rows, dtype=ROW_DTYPE)
+
+    @classmethod
+    def from_series(cls, series):
+        """Construit les listes à partir d'une colonne du DataFrame."""
+        codes, uniques = pd.factorize(series, sort=False)
+        valid = np.flatnonzero(codes >= 0)
+        order = valid[np.argsort(codes[valid], kind='stable')]
+        counts = np.bincount(codes[valid], minlength=len(uniques))
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        return cls(list(uniques), offsets, order)
+
+    def rows_for(self, position):
+        """Lignes portant la valeur d'indice ``position``."""
+        return self.rows[self.offsets[position]:self.offsets[position + 1]]
+
+    def rows_containing(self, pattern):
+        """
+        Lignes dont la valeur contient ``pattern`` (insensible à la casse)
+
+        Même sémantique que ``str.contains(pattern, case=False, na=False)``,
+        mais évaluée une seule fois par valeur distincte.
+        """
+        regex = re.compile(pattern, flags=re.IGNORECASE)
+        matches = [
+            self.rows_for(i) for i, value in enumerate(self.values)
+            if isinstance(value, str) and regex.search(value)
+        ]
+        if not matches:
+            return np.empty(0, dtype=ROW_DTYPE)
+        if len(matches) == 1:
+            return matches[0]
+        return np.unique(np.concatenate(matches))
+
+
+class FilterIndex:
+    """
+    Index des filtres de recherche, construit une fois par modèle
+
+    Attributes:
+        n_rows (int): Nombre d'emplois indexés
+        postings (dict): ColumnPostings par colonne catégorielle
+        salary_sorted (np.ndarray | None): Salaires connus, triés
+        salary_rows (np.ndarray | None): Lignes correspondant à ``salary_sorted``
+        remote_rows (np.ndarray | None): Lignes des postes en remote
+    """
+
+    CATEGORICAL_COLUMNS = (
+        'location', 'state', 'city',
+        'formatted_experience_level', 'formatted_work_type'
+    )
+    LOCATION_COLUMNS = ('location', 'state', 'city')
+
+    def __init__(self, n_rows, postings, salary_sorted=None, salary_rows=None,
+                 remote_rows=None):
+        self.n_rows = n_rows
+        self.postings = postings
+        self.salary_sorted = salary_sorted
+        self.salary_rows = salary_rows
+        self.remote_rows = remote_rows
+
+    @classmethod
+    def from_dataframe(cls, jobs_df):
+        """
+        Construit l'index à partir du DataFrame des emplois
+
+        Args:
+            jobs_df (pd.DataFrame): DataFrame des emplois
+
+        Returns:
+            FilterIndex: Index prêt à l'emploi
+        """
+
+        postings = {
+            column: ColumnPostings.from_series(jobs_df[column])
+            for column in cls.CATEGORICAL_COLUMNS
+            if column in jobs_df.columns
+        }
+
+        salary_sorted = salary_rows = None
+        if 'med_salary' in jobs_df.columns:
+            salaries = pd.to_numeric(jobs_df['med_salary'], errors='coerce').to_numpy(dtype=np.float64)
+            known = np.flatnonzero(~np.isnan(salaries))
+            order = known[np.argsort(salaries[known], kind='stable')]
+            salary_sorted = salaries[order]
+            salary_rows = order.astype(ROW_DTYPE)
+
+        remote_rows = None
+        if 'remote_allowed' in jobs_df.columns:
+            remote_rows = np.flatnonzero(
+                (jobs_df['remote_allowed'] == 1.0).to_numpy(dtype=bool)
+            ).astype(ROW_DTYPE)
+
+        return cls(len(jobs_df), postings, salary_sorted, salary_rows, remote_rows)
+
+    def save(self, directory):
+        """
+        Sauvegarde l'index dans un dossier (tableaux .npy + description JSON)
+
+        Args:
+            directory (str): Dossier de destination (créé si besoin)
+        """
+
+        os.makedirs(directory, exist_ok=True)
+        description = {
+            'n_rows': int(self.n_rows),
+            'columns': {},
+            'has_salary': self.salary_sorted is not None,
+            'has_remote': self.remote_rows is not None,
+        }
+
+        for column, column_postings in self.postings.items():
+            description['columns'][column] = [
+                value.item() if hasattr(value, 'item') else value
+                for value in column_postings.values
+            ]
+            np.save(os.path.join(directory, f"{column}.offsets.npy"), column_postings.offsets)
+            np.save(os.path.join(directory, f"{column}.rows.npy"), column_postings.rows)
+
+        if self.salary_sorted is not None:
+            np.save(os.path.join(directory, "salary_sorted.npy"), self.salary_sorted)
+            np.save(os.path.join(directory, "salary_rows.npy"), self.salary_rows)
+        if self.remote_rows is not None:
+            np.save(os.path.join(directory, "remote_rows.npy"), self.remote_rows)
+
+        with open(os.path.join(directory, INDEX_FILE), 'w', encoding='utf-8') as f:
+            json.dump(description, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        """
+        Charge un index sauvegardé par ``save``
+
+        Args:
+            directory (str): Dossier de l'index
+            mmap_mode (str): Mode de mapping mémoire des tableaux (None = copie)
+
+        Returns:
+            FilterIndex: Index prêt à l'emploi
+        """
+
+        with open(os.path.join(directory, INDEX_FILE), encoding='utf-8') as f:
+            description = json.load(f)
+
+        def _load(name):
+            return np.load(os.path.join(directory, name), mmap_mode=mmap_mode)
+
+        postings = {
+            column: ColumnPostings(values, _load(f"{column}.offsets.npy"), _load(f"{column}.rows.npy"))
+            for column, values in description['columns'].items()
+        }
+
+        salary_sorted = salary_rows = remote_rows = None
+        if description['has_salary']:
+            salary_sorted = _load("salary_sorted.npy")
+            salary_rows = _load("salary_rows.npy")
+        if description['has_remote']:
+            remote_rows = _load("remote_rows.npy")
+
+        return cls(description['n_rows'], postings, salary_sorted, salary_rows, remote_rows)
+
+    def has_column(self, column):
+        """Indique si une colonne est disponible pour le filtrage."""
+        if column == 'med_salary':
+            return self.salary_sorted is not None
+        if column == 'remote_allowed':
+            return self.remote_rows is not None
+        return column in self.postings
+
+    def options(self, column):
+        """
+        Valeurs distinctes d'une colonne (équivalent de ``dropna().unique()``)
+
+        Args:
+            column (str): Nom de la colonne catégorielle
+
+        Returns:
+            list: Valeurs dans l'ordre de première apparition ([] si absente)
+        """
+        if column not in self.postings:
+            return []
+        return list(self.postings[column].values)
+
+    def rows_with_min_salary(self, min_salary):
+        """Lignes dont le salaire médian est >= ``min_salary`` (triées)."""
+        start = np.searchsorted(self.salary_sorted, min_salary, side='left')
+        return np.sort(self.salary_rows[start:])
+
+    def candidate_rows(self, location_filter=None, min_salary=0,
+                       experience_filter=None, work_type_filter=None,
+                       remote_only=False):
+        """
+        Calcule les positions des emplois qui passent tous les filtres
+
+        Même contrat que ``recommender.candidate_rows`` : mêmes filtres, mêmes
+        résultats, mais par intersection de listes pré-calculées.
+
+        Returns:
+            np.ndarray | None: Positions triées des lignes candidates, ou None
+            si aucun filtre n'est actif
+        """
+
+        row_sets = []
+
+        if remote_only and self.remote_rows is not None:
+            row_sets.append(self.remote_rows)
+
+        if location_filter and location_filter != "Tous":
+            matches = [
+                self.postings[column].rows_containing(location_filter)
+                for column in self.LOCATION_COLUMNS
+                if column in self.postings
+            ]
+            matches = [rows for rows in matches if len(rows)]
+            if not matches:
+                row_sets.append(np.empty(0, dtype=ROW_DTYPE))
+            elif len(matches) == 1:
+                row_sets.append(matches[0])
+            else:
+                row_sets.append(np.unique(np.concatenate(matches)))
+
+        if min_salary > 0 and self.salary_sorted is not None:
+            row_sets.append(self.rows_with_min_salary(min_salary))
+
+        if experience_filter and experience_filter != "Tous" and 'formatted_experience_level' in self.postings:
+            row_sets.append(self.postings['formatted_experience_level'].rows_containing(experience_filter))
+
+        if work_type_filter and work_type_filter != "Tous" and 'formatted_work_type' in self.postings:
+            row_sets.append(self.postings['formatted_work_type'].rows_containing(work_type_filter))
+
+        if not row_sets:
+            return None
+        return _intersect(row_sets)
+
+
+class SegmentedFilterIndex:
+    """
+    Index des filtres d'un instantané segmenté (voir update_model.py)
+
+    L'index de la base (mappé) et celui de chaque segment sont interrogés
+    séparément ; les lignes supprimées (offres fermées ou republiées) sont
+    retirées des candidats, puis les positions locales sont converties en
+    positions de l'instantané.
+
+    Attributes:
+        indexes (list): FilterIndex de la base puis de chaque segment
+        dead (list): Lignes supprimées de chaque partie (positions locales triées)
+        starts (np.ndarray): Première position de chaque partie dans l'instantané
+        n_rows (int): Nombre d'emplois vivants
+    """
+
+    def __init__(self, indexes, dead):
+        self.indexes = indexes
+        self.dead = [np.asarray(part_dead, dtype=np.int64) for part_dead in dead]
+        self.starts = np.concatenate([[0], np.cumsum([
+            index.n_rows - len(part_dead) for index, part_dead in zip(indexes, self.dead)
+        ])])
+        self.n_rows = int(self.starts[-1])
+        self._options = {}
+
+    @property
+    def base(self):
+        """Index de la base."""
+        return self.indexes[0]
+
+    def has_column(self, column):
+        """Indique si une colonne est disponible pour le filtrage."""
+        return any(index.has_column(column) for index in self.indexes)
+
+    def options(self, column):
+        """
+        Valeurs distinctes d'une colonne portées par au moins une ligne vivante
+
+        Args:
+            column (str): Nom de la colonne catégorielle
+
+        Returns:
+            list: Valeurs dans l'ordre de première apparition ([] si absente)
+        """
+
+        if column not in self._options:
+            # Première ligne vivante de chaque valeur : (partie, position locale)
+            first = {}
+            for number, (index, part_dead) in enumerate(zip(self.indexes, self.dead)):
+                if column not in index.postings:
+                    continue
+                postings = index.postings[column]
+                rows = np.asarray(postings.rows, dtype=np.int64)
+                if len(part_dead):
+                    rows = np.where(np.isin(rows, part_dead), np.iinfo(np.int64).max, rows)
+                starts = np.asarray(postings.offsets[:-1])
+                firsts = np.minimum.reduceat(rows, starts) if len(rows) else np.empty(0, dtype=np.int64)
+                for value, row, count in zip(postings.values, firsts, np.diff(postings.offsets)):
+                    if count > 0 and row != np.iinfo(np.int64).max:
+                        first.setdefault(value, (number, int(row)))
+            self._options[column] = sorted(first, key=first.get)
+        return list(self._options[column])
+
+    def candidate_rows(self, **filters):
+        """
+        Calcule les positions des emplois vivants qui passent tous les filtres
+
+        Même contrat que ``FilterIndex.candidate_rows``.
+
+        Returns:
+            np.ndarray | None: Positions triées des lignes candidates, ou None
+            si aucun filtre n'est actif
+        """
+
+        parts = [index.candidate_rows(**filters) for index in self.indexes]
+        if all(rows is None for rows in parts):
+            return None
+        row_sets = []
+        for rows, index, part_dead, start in zip(parts, self.indexes, self.dead, self.starts):
+            if rows is None:
+                # Filtres sur des colonnes absentes de cette partie : ignorés
+                rows = np.arange(index.n_rows)
+            row_sets.append(local_to_live(rows, part_dead) + start)
+        return np.concatenate(row_sets).astype(ROW_DTYPE, copy=False)
@@ -0,0 +1,287 @@
+"""
+🔎 JOB INTELLIGENT - Recherche exacte par index inversé (MaxScore)
+
+Un profil n'a que quelques dizaines de termes TF-IDF non nuls : au lieu de
+scorer toutes les offres, ce moteur parcourt les listes de postings (vue CSC
+de la matrice TF-IDF) des seuls termes du profil, terme par terme :
+
+    1. Les termes sont triés par borne supérieure de contribution
+       (poids du terme dans le profil x poids maximal du terme dans le corpus)
+    2. Tant que la somme des bornes des termes restants peut encore faire
+       entrer une nouvelle offre dans le top-k, les postings sont collectés
+       puis sommés en une seule passe (termes "essentiels")
+    3. Ensuite, seules les offres déjà accumulées sont complétées, et celles
+       qui ne peuvent plus atteindre le seuil du top-k sont élaguées
+    4. Les survivantes sont re-scorées par le même produit scalaire que la
+       recherche exacte : scores et classement sont identiques
+
+La latence dépend de la longueur des listes de postings lues, pas de la
+taille du corpus.
+
+Usage (construction + vérification de parité) :
+    python inverted_index.py model/
+"""
+
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import scipy.sparse as sp
+
+from model_store import model_snapshot
+from recommender import score_rows, search as exact_search, top_k
+
+
+INVERTED_DIR = "inverted"
+INVERTED_FILE = "inverted.json"
+
+# Marge numérique des bornes : l'élagage ne dépend jamais d'un arrondi
+PRUNING_SLACK = 1e-9
+# Poids float32 (matrix_compression.py) : arrondis du produit float32
+FLOAT32_PRUNING_SLACK = 1e-5
+
+
+def pruning_slack(dtype):
+    """Marge des bornes adaptée à la précision des poids TF-IDF."""
+    return FLOAT32_PRUNING_SLACK if np.dtype(dtype) == np.float32 else PRUNING_SLACK
+
+
+def _accumulate(row_lists, score_lists):
+    """Somme les contributions par offre (positions triées, sans doublon)."""
+    if not row_lists:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    rows = np.concatenate(row_lists).astype(np.int64, copy=False)
+    scores = np.concatenate(score_lists)
+    if len(rows) == 0:
+        return rows, scores
+    order = np.argsort(rows, kind='stable')
+    rows = rows[order]
+    scores = scores[order]
+    starts = np.flatnonzero(np.concatenate([[True], rows[1:] != rows[:-1]]))
+    return rows[starts], np.add.reduceat(scores, starts)
+
+
+def _lookup(sorted_rows, wanted):
+    """Positions de ``wanted`` dans ``sorted_rows`` et masque de présence."""
+    if len(sorted_rows) == 0:
+        return np.zeros(len(wanted), dtype=np.intp), np.zeros(len(wanted), dtype=bool)
+    found = np.minimum(np.searchsorted(sorted_rows, wanted), len(sorted_rows) - 1)
+    return found, sorted_rows[found] == wanted
+
+
+def _kth_score(scores, k):
+    """k-ième meilleur score partiel (0 s'il y a moins de k offres)."""
+    if len(scores) < k:
+        return 0.0
+    return float(np.partition(scores, len(scores) - k)[len(scores) - k])
+
+
+class InvertedIndex:
+    """
+    Listes de postings par terme (vue CSC de la matrice TF-IDF)
+
+    Les offres contenant le terme ``t`` sont ``term_rows[term_offsets[t]:
+    term_offsets[t + 1]]`` (triées), avec leurs poids dans ``term_weights``.
+
+    Attributes:
+        term_offsets (np.ndarray): Bornes de chaque liste (indptr CSC)
+        term_rows (np.ndarray): Positions des offres (indices CSC)
+        term_weights (np.ndarray): Poids TF-IDF (data CSC)
+        max_weights (np.ndarray): Poids maximal de chaque terme
+        n_rows (int): Nombre d'offres indexées
+        max_posting_fraction (float): Au-delà de cette fraction des postings
+            du corpus à lire (profil très long), le produit matrice-vecteur de
+            la recherche exacte est moins coûteux et est utilisé directement
+    """
+
+    # Mêmes résultats que la recherche exacte (cache des résultats autorisé)
+    exact = True
+
+    def __init__(self, term_offsets, term_rows, term_weights, max_weights, n_rows,
+                 max_posting_fraction=0.1):
+        self.term_offsets = term_offsets
+        self.term_rows = term_rows
+        self.term_weights = term_weights
+        self.max_weights = max_weights
+        self.n_rows = n_rows
+        self.max_posting_fraction = max_posting_fraction
+
+    @classmethod
+    def from_matrix(cls, tfidf_matrix):
+        """Construit l'index à partir de la matrice TF-IDF (CSR)."""
+        csc = sp.csc_matrix(tfidf_matrix.tocsr())
+        csc.sort_indices()
+        max_weights = np.zeros(csc.shape[1], dtype=np.float64)
+        non_empty = np.flatnonzero(np.diff(csc.indptr) > 0)
+        if len(non_empty):
+            max_weights[non_empty] = np.maximum.reduceat(csc.data, csc.indptr[non_empty])
+        return cls(csc.indptr.astype(np.int64), csc.indices, csc.data, max_weights, csc.shape[0])
+
+    def term_matrix(self):
+        """
+        Vue CSR (termes x offres) des postings, sans copie
+
+        ``profils @ term_matrix()`` score un lot de profils en un seul
+        produit creux qui ne lit que les postings de leurs termes.
+        """
+        return sp.csr_matrix((self.term_weights, self.term_rows, self.term_offsets),
+                             shape=(len(self.term_offsets) - 1, self.n_rows), copy=False)
+
+    def postings(self, term):
+        """(positions, poids) des offres contenant le terme ``term``."""
+        start, end = self.term_offsets[term], self.term_offsets[term + 1]
+        return self.term_rows[start:end], self.term_weights[start:end]
+
+    def _restricted_postings(self, term, rows):
+        """Postings du terme limités aux candidats ``rows`` (triés) si donnés."""
+        posting_rows, posting_weights = self.postings(term)
+        if rows is None:
+            return posting_rows, posting_weights
+        _, present = _lookup(rows, posting_rows)
+        return posting_rows[present], posting_weights[present]
+
+    def search(self, profile_vector, tfidf_matrix, k, rows=None):
+        """
+        Recherche exacte des k emplois les plus similaires (MaxScore)
+
+        Même contrat et mêmes résultats que ``recommender.search``.
+
+        Args:
+            profile_vector: Vecteur TF-IDF (1 x n_features) du profil
+            tfidf_matrix: Matrice TF-IDF CSR des emplois
+            k (int): Nombre de résultats voulus
+            rows (np.ndarray): Positions candidates triées (None = tout)
+
+        Returns:
+            tuple: (positions, scores) des k meilleurs emplois, triés
+        """
+
+        n_candidates = self.n_rows if rows is None else len(rows)
+        if k <= 0 or n_candidates == 0:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float64)
+
+        query = sp.csr_matrix(profile_vector)
+        terms = query.indices
+        weights = query.data.astype(np.float64)
+
+        posting_total = int(np.sum(self.term_offsets[terms + 1] - self.term_offsets[terms]))
+        if posting_total > self.max_posting_fraction * len(self.term_rows):
+            return exact_search(profile_vector, tfidf_matrix, k, rows)
+
+        slack = pruning_slack(self.term_weights.dtype)
+
+        # Termes triés par contribution maximale décroissante
+        bounds = weights * self.max_weights[terms]
+        order = np.argsort(-bounds, kind='stable')
+        terms, weights, bounds = terms[order], weights[order], bounds[order]
+        remaining = np.concatenate([np.cumsum(bounds[::-1])[::-1], [0.0]])
+
+        # Phase 1 : termes essentiels, de nouvelles offres peuvent encore entrer.
+        # Le seuil du top-k est minoré par le k-ième meilleur score d'un seul
+        # terme (offres distinctes), ce qui évite de fusionner à chaque terme.
+        row_lists, score_lists = [], []
+        threshold = 0.0
+        position = 0
+        while position < len(terms):
+            if remaining[position] < threshold - slack:
+                break
+            posting_rows, posting_weights = self._restricted_postings(terms[position], rows)
+            contributions = posting_weights * weights[position]
+            row_lists.append(posting_rows)
+            score_lists.append(contributions)
+            threshold = max(threshold, _kth_score(contributions, k))
+            position += 1
+        acc_rows, acc_scores = _accumulate(row_lists, score_lists)
+
+        # Phase 2 : compléter les offres accumulées, élaguer celles hors d'atteinte
+        for position in range(position, len(terms)):
+            threshold = _kth_score(acc_scores, k)
+            alive = acc_scores + remaining[position] >= threshold - slack
+            acc_rows, acc_scores = acc_rows[alive], acc_scores[alive]
+
+            posting_rows, posting_weights = self.postings(terms[position])
+            found, present = _lookup(posting_rows, acc_rows)
+            acc_scores[present] += posting_weights[found[present]] * weights[position]
+
+        if len(acc_rows) >= k:
+            threshold = _kth_score(acc_scores, k)
+            acc_rows = acc_rows[acc_scores >= threshold - slack]
+        else:
+            # Moins de k offres partagent un terme : compléter avec des offres
+            # à score nul, dans l'ordre des positions (comme la recherche exacte)
+            candidates = np.arange(min(self.n_rows, k + len(acc_rows))) if rows is None \
+                else np.asarray(rows[:k + len(acc_rows)], dtype=np.int64)
+            padding = np.setdiff1d(candidates, acc_rows, assume_unique=True)[:k - len(acc_rows)]
+            acc_rows = np.sort(np.concatenate([acc_rows, padding]))
+
+        # Re-scoring des survivantes avec le produit scalaire de la recherche exacte
+        scores = score_rows(profile_vector, tfidf_matrix, acc_rows)
+        best = top_k(scores, k)
+        return acc_rows[best], scores[best]
+
+    def save(self, directory, snapshot=0):
+        """Sauvegarde l'index (tableaux .npy), construit sur l'instantané ``snapshot``."""
+        os.makedirs(directory, exist_ok=True)
+        for name in ('term_offsets', 'term_rows', 'term_weights', 'max_weights'):
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(directory, INVERTED_FILE), 'w', encoding='utf-8') as f:
+            json.dump({'n_rows': int(self.n_rows), 'snapshot': snapshot}, f)
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        """Charge un index sauvegardé par ``save``."""
+        with open(os.path.join(directory, INVERTED_FILE), encoding='utf-8') as f:
+            params = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+            for name in ('term_offsets', 'term_rows', 'term_weights', 'max_weights')
+        }
+        return cls(n_rows=params['n_rows'], **arrays)
+
+
+def load_inverted_index(model_dir, mmap_mode='r'):
+    """
+    Charge l'index inversé d'un dossier de modèle, ou None s'il n'existe pas
+    ou s'il a été construit sur un autre instantané (mise à jour incrémentale)
+    """
+    directory = os.path.join(model_dir, INVERTED_DIR)
+    path = os.path.join(directory, INVERTED_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        if json.load(f).get('snapshot', 0) != model_snapshot(model_dir):
+            return None
+    return InvertedIndex.load(directory, mmap_mode)
+
+
+if __name__ == "__main__":
+    from model_store import load_model
+
+    target = sys.argv[1] if len(sys.argv) > 1 else "model"
+    vectorizer, tfidf_matrix, jobs, metadata, filter_index = load_model(target)
+
+    start = time.perf_counter()
+    index = InvertedIndex.from_matrix(tfidf_matrix)
+    index.save(os.path.join(target, INVERTED_DIR), model_snapshot(target))
+    print(f"✅ Index inversé construit en {time.perf_counter() - start:.1f} s")
+
+    # Vérification de parité et latence sur des offres utilisées comme profils
+    rng = np.random.default_rng(0)
+    sample = np.sort(rng.choice(tfidf_matrix.shape[0], min(100, tfidf_matrix.shape[0]), replace=False))
+    exact_time = inverted_time = 0.0
+    mismatches = 0
+    for row in sample:
+        query = tfidf_matrix[row]
+        start = time.perf_counter()
+        expected = exact_search(query, tfidf_matrix, 10)
+        exact_time += time.perf_counter() - start
+        start = time.perf_counter()
+        found = index.search(query, tfidf_matrix, 10)
+        inverted_time += time.perf_counter() - start
+        mismatches += not (np.array_equal(expected[0], found[0]) and np.array_equal(expected[1], found[1]))
+
+    print(f"✅ Parité : {len(sample) - mismatches}/{len(sample)} requêtes identiques")
+    print(f"⏱️ Exacte : {exact_time * 1000 / len(sample):.2f} ms | "
+          f"Index inversé : {inverted_time * 1000 / len(sample):.2f} ms par requête")
@@ -0,0 +1,446 @@
+"""
+📈 JOB INTELLIGENT - Cube de statistiques du marché de l'emploi
+
+Cube pré-agrégé construit une seule fois avec le modèle (``model/stats/``)
+sur les dimensions des filtres de la sidebar :
+
+    état x niveau d'expérience x type de contrat x remote
+
+Chaque cellule non vide du cube contient :
+    - le nombre d'offres
+    - le nombre, la somme, le minimum et le maximum des salaires connus
+    - une esquisse (sketch) des salaires : histogramme à classes
+      logarithmiques, fusionnable par simple addition, dont les quantiles
+      ont une erreur relative bornée (``SKETCH_ACCURACY``)
+
+Une combinaison de filtres sélectionne des cellules (quelques milliers au
+plus) puis additionne leurs agrégats : les statistiques affichées ne
+dépendent pas du nombre d'offres, et aucune colonne des emplois n'est lue.
+
+Le cube est écrit par ``model_store.ModelWriter`` et chargé par
+``model_store.load_market_cube``.
+
+Usage (construction pour un modèle existant + comparaison à pandas) :
+    python market_stats.py model/
+"""
+
+import json
+import os
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+
+STATS_DIR = "stats"
+STATS_FILE = "stats.json"
+
+# Dimensions du cube (remote_allowed est réduit à remote / non remote)
+DIMENSIONS = ('state', 'formatted_experience_level', 'formatted_work_type', 'remote_allowed')
+CUBE_COLUMNS = (*DIMENSIONS, 'location', 'med_salary')
+
+# État d'une localisation LinkedIn "Ville, ST" (modèles sans colonne state)
+STATE_PATTERN = re.compile(r',\s*([A-Z]{2})\s*$')
+
+# Erreur relative maximale des quantiles de salaire estimés
+SKETCH_ACCURACY = 0.01
+
+QUANTILES = (0.25, 0.5, 0.75)
+
+
+def _state_series(jobs_df):
+    """
+    Colonne state, ou état extrait de ``location`` si elle est absente
+
+    L'extraction est faite une fois par localisation distincte.
+    """
+    if 'state' in jobs_df.columns or 'location' not in jobs_df.columns:
+        return jobs_df.get('state')
+    codes, uniques = pd.factorize(jobs_df['location'], sort=False)
+    states = [None] * len(uniques)
+    for position, location in enumerate(uniques):
+        match = STATE_PATTERN.search(location) if isinstance(location, str) else None
+        if match:
+            states[position] = match.group(1)
+    states.append(None)
+    return pd.Series(np.asarray(states, dtype=object)[codes], index=jobs_df.index)
+
+
+def _dimension_codes(series, dimension):
+    """Codes d'une dimension (valeurs manquantes comprises) et valeurs distinctes."""
+    if dimension == 'remote_allowed':
+        remote = pd.to_numeric(series, errors='coerce').to_numpy(dtype=np.float64) == 1.0
+        return remote.astype(np.int32), [False, True]
+    codes, uniques = pd.factorize(series, sort=False)
+    values = list(uniques)
+    if (codes < 0).any():
+        codes = np.where(codes < 0, len(values), codes)
+        values.append(None)
+    return codes.astype(np.int32), values
+
+
+class SalarySketch:
+    """
+    Classes logarithmiques des salaires (esquisse de quantiles fusionnable)
+
+    Un salaire ``x > 0`` tombe dans la classe ``ceil(log(x) / log(gamma))``
+    avec ``gamma = (1 + accuracy) / (1 - accuracy)`` : le représentant de la
+    classe est à moins de ``accuracy`` (relatif) de toute valeur qu'elle
+    contient. Les histogrammes de deux ensembles d'offres s'additionnent.
+
+    Attributes:
+        accuracy (float): Erreur relative maximale des quantiles
+        min_index (int): Indice de la première classe (colonne 0)
+        n_buckets (int): Nombre de classes
+    """
+
+    def __init__(self, accuracy=SKETCH_ACCURACY, min_index=0, n_buckets=0):
+        self.accuracy = accuracy
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.min_index = min_index
+        self.n_buckets = n_buckets
+
+    def bucket_index(self, salaries):
+        """Indice absolu de la classe de chaque salaire (> 0)."""
+        return np.ceil(np.log(salaries) / np.log(self.gamma)).astype(np.int64)
+
+    def fit(self, salaries):
+        """Fixe l'étendue des classes sur les salaires observés."""
+        if len(salaries):
+            indices = self.bucket_index(salaries)
+            self.min_index = int(indices.min())
+            self.n_buckets = int(indices.max()) - self.min_index + 1
+        return self
+
+    def representatives(self):
+        """Valeur représentative de chaque classe (erreur relative <= accuracy)."""
+        indices = np.arange(self.min_index, self.min_index + self.n_buckets, dtype=np.float64)
+        return 2 * self.gamma ** indices / (self.gamma + 1)
+
+    def quantiles(self, histograms, quantiles=QUANTILES):
+        """
+        Quantiles estimés de chaque ligne d'histogrammes
+
+        Args:
+            histograms (np.ndarray): Effectifs par classe (lignes x classes)
+            quantiles (tuple): Ordres des quantiles voulus
+
+        Returns:
+            np.ndarray: Quantiles (lignes x quantiles), NaN si ligne vide
+        """
+
+        histograms = np.atleast_2d(np.asarray(histograms))
+        result = np.full((histograms.shape[0], len(quantiles)), np.nan)
+        if self.n_buckets == 0:
+            return result
+        cumulative = np.cumsum(histograms, axis=1)
+        totals = cumulative[:, -1]
+        representatives = self.representatives()
+        for row in np.flatnonzero(totals > 0):
+            # Même rang que la médiane "basse" : ``q * (n - 1)``
+            ranks = np.asarray(quantiles) * (totals[row] - 1)
+            buckets = np.searchsorted(cumulative[row], ranks, side='right')
+            result[row] = representatives[np.minimum(buckets, self.n_buckets - 1)]
+        return result
+
+
+class MarketCube:
+    """
+    Agrégats des offres par cellule (état, expérience, contrat, remote)
+
+    Seules les cellules non vides sont stockées ; la cellule ``i`` a pour
+    coordonnées ``keys[i]`` (codes des valeurs de chaque dimension).
+
+    Attributes:
+        values (dict): Valeurs distinctes par dimension (None = non renseigné)
+        keys (np.ndarray): Codes des cellules (cellules x dimensions)
+        counts (np.ndarray): Nombre d'offres par cellule
+        salary_counts (np.ndarray): Nombre de salaires connus (> 0)
+        salary_sums (np.ndarray): Somme des salaires connus
+        salary_mins (np.ndarray): Salaire minimum (NaN si aucun)
+        salary_maxs (np.ndarray): Salaire maximum (NaN si aucun)
+        histograms (sp.csr_matrix): Esquisse des salaires (cellules x classes)
+        sketch (SalarySketch): Classes de l'esquisse
+        n_rows (int): Nombre d'offres agrégées
+    """
+
+    def __init__(self, values, keys, counts, salary_counts, salary_sums, salary_mins,
+                 salary_maxs, histograms, sketch, n_rows):
+        self.values = values
+        self.keys = keys
+        self.counts = counts
+        self.salary_counts = salary_counts
+        self.salary_sums = salary_sums
+        self.salary_mins = salary_mins
+        self.salary_maxs = salary_maxs
+        self.histograms = histograms
+        self.sketch = sketch
+        self.n_rows = n_rows
+
+    @classmethod
+    def from_dataframe(cls, jobs_df, accuracy=SKETCH_ACCURACY):
+        """
+        Construit le cube à partir des colonnes des emplois
+
+        Args:
+            jobs_df (pd.DataFrame): Emplois (colonnes de ``CUBE_COLUMNS``,
+                les absentes sont traitées comme non renseignées ; sans
+                colonne state, l'état est lu dans ``location``)
+            accuracy (float): Erreur relative des quantiles de salaire
+
+        Returns:
+            MarketCube: Cube prêt à interroger
+        """
+
+        n_rows = len(jobs_df)
+        codes, values = [], {}
+        for dimension in DIMENSIONS:
+            series = _state_series(jobs_df) if dimension == 'state' else jobs_df.get(dimension)
+            if series is None:
+                series = pd.Series([None] * n_rows, dtype=object)
+            dimension_codes, values[dimension] = _dimension_codes(series, dimension)
+            codes.append(dimension_codes)
+
+        shape = tuple(max(1, len(values[dimension])) for dimension in DIMENSIONS)
+        flat = np.ravel_multi_index(codes, shape) if n_rows else np.empty(0, dtype=np.int64)
+        cells, cell_of_row = np.unique(flat, return_inverse=True)
+        keys = np.stack(np.unravel_index(cells, shape), axis=1).astype(np.int32)
+        n_cells = len(cells)
+
+        salaries = np.full(n_rows, np.nan)
+        if 'med_salary' in jobs_df.columns:
+            salaries = pd.to_numeric(jobs_df['med_salary'], errors='coerce').to_numpy(dtype=np.float64)
+        known = np.flatnonzero(salaries > 0)
+        known_cells, known_salaries = cell_of_row[known], salaries[known]
+
+        salary_mins = np.full(n_cells, np.inf)
+        salary_maxs = np.full(n_cells, -np.inf)
+        np.minimum.at(salary_mins, known_cells, known_salaries)
+        np.maximum.at(salary_maxs, known_cells, known_salaries)
+        salary_mins[np.isinf(salary_mins)] = np.nan
+        salary_maxs[np.isinf(salary_maxs)] = np.nan
+
+        sketch = SalarySketch(accuracy).fit(known_salaries)
+        buckets = sketch.bucket_index(known_salaries) - sketch.min_index if len(known) \
+            else np.empty(0, dtype=np.int64)
+        histograms = sp.csr_matrix(
+            (np.ones(len(known), dtype=np.int64), (known_cells, buckets)),
+            shape=(n_cells, sketch.n_buckets)
+        )
+        histograms.sum_duplicates()
+
+        return cls(
+            values=values,
+            keys=keys,
+            counts=np.bincount(cell_of_row, minlength=n_cells).astype(np.int64),
+            salary_counts=np.bincount(known_cells, minlength=n_cells).astype(np.int64),
+            salary_sums=np.bincount(known_cells, weights=known_salaries, minlength=n_cells),
+            salary_mins=salary_mins,
+            salary_maxs=salary_maxs,
+            histograms=histograms,
+            sketch=sketch,
+            n_rows=n_rows,
+        )
+
+    @classmethod
+    def from_jobs(cls, jobs):
+        """Construit le cube depuis un DataFrame, une JobTable ou une SegmentedJobTable."""
+        return cls.from_dataframe(pd.DataFrame({
+            column: jobs[column] for column in CUBE_COLUMNS if column in jobs.columns
+        }, index=pd.RangeIndex(len(jobs))))
+
+    # ------------------------------------------------------------------------
+    # Sélection des cellules
+    # ------------------------------------------------------------------------
+
+    def _matching_codes(self, dimension, pattern):
+        """Codes des valeurs qui contiennent ``pattern`` (insensible à la casse)."""
+        regex = re.compile(pattern, flags=re.IGNORECASE)
+        return [code for code, value in enumerate(self.values[dimension])
+                if isinstance(value, str) and regex.search(value)]
+
+    def select(self, location_filter=None, experience_filter=None,
+               work_type_filter=None, remote_only=False):
+        """
+        Cellules correspondant à une combinaison de filtres de la sidebar
+
+        Les filtres texte ont la sémantique de ``FilterIndex`` (la valeur
+        contient le motif, insensible à la casse) ; le lieu n'est comparé
+        qu'à l'état, seule dimension géographique du cube.
+
+        Returns:
+            np.ndarray: Masque booléen des cellules sélectionnées
+        """
+
+        mask = np.ones(len(self.keys), dtype=bool)
+        text_filters = (
+            ('state', location_filter),
+            ('formatted_experience_level', experience_filter),
+            ('formatted_work_type', work_type_filter),
+        )
+        for dimension, pattern in text_filters:
+            if pattern and pattern != "Tous":
+                position = DIMENSIONS.index(dimension)
+                mask &= np.isin(self.keys[:, position], self._matching_codes(dimension, pattern))
+        if remote_only:
+            mask &= self.keys[:, DIMENSIONS.index('remote_allowed')] == 1
+        return mask
+
+    # ------------------------------------------------------------------------
+    # Agrégats
+    # ------------------------------------------------------------------------
+
+    def summary(self, mask=None):
+        """
+        Statistiques d'un ensemble de cellules (toutes par défaut)
+
+        Returns:
+            dict: n_jobs, n_salaries, mean/min/max du salaire, quantiles
+            estimés (p25, median, p75) et part des offres en remote
+        """
+
+        mask = np.ones(len(self.keys), dtype=bool) if mask is None else mask
+        n_jobs = int(self.counts[mask].sum())
+        n_salaries = int(self.salary_counts[mask].sum())
+        remote = self.keys[:, DIMENSIONS.index('remote_allowed')] == 1
+        quantiles = self.sketch.quantiles(
+            np.asarray(self.histograms[np.flatnonzero(mask)].sum(axis=0))
+        )[0]
+        with np.errstate(all='ignore'):
+            return {
+                'n_jobs': n_jobs,
+                'n_salaries': n_salaries,
+                'mean_salary': self.salary_sums[mask].sum() / n_salaries if n_salaries else np.nan,
+                'min_salary': np.nanmin(self.salary_mins[mask]) if n_salaries else np.nan,
+                'max_salary': np.nanmax(self.salary_maxs[mask]) if n_salaries else np.nan,
+                'p25_salary': quantiles[0],
+                'median_salary': quantiles[1],
+                'p75_salary': quantiles[2],
+                'remote_share': self.counts[mask & remote].sum() / n_jobs if n_jobs else np.nan,
+            }
+
+    def breakdown(self, dimension, mask=None):
+        """
+        Statistiques par valeur d'une dimension, pour les cellules sélectionnées
+
+        Args:
+            dimension (str): Dimension du cube (voir ``DIMENSIONS``)
+            mask (np.ndarray): Cellules sélectionnées (None = toutes)
+
+        Returns:
+            pd.DataFrame: Une ligne par valeur présente (jobs, salary_count,
+            mean_salary, median_salary, remote_share), par nombre d'offres
+            décroissant
+        """
+
+        mask = np.ones(len(self.keys), dtype=bool) if mask is None else mask
+        selected = np.flatnonzero(mask)
+        groups = self.keys[selected, DIMENSIONS.index(dimension)]
+        n_groups = len(self.values[dimension])
+        remote = self.keys[selected, DIMENSIONS.index('remote_allowed')] == 1
+
+        jobs = np.bincount(groups, weights=self.counts[selected], minlength=n_groups)
+        salary_counts = np.bincount(groups, weights=self.salary_counts[selected], minlength=n_groups)
+        salary_sums = np.bincount(groups, weights=self.salary_sums[selected], minlength=n_groups)
+        remote_jobs = np.bincount(groups[remote], weights=self.counts[selected][remote], minlength=n_groups)
+
+        # Histogrammes des groupes = somme des histogrammes de leurs cellules
+        membership = sp.csr_matrix(
+            (np.ones(len(selected)), (groups, np.arange(len(selected)))),
+            shape=(n_groups, len(selected))
+        )
+        medians = self.sketch.quantiles((membership @ self.histograms[selected]).toarray(), (0.5,))[:, 0]
+
+        present = np.flatnonzero(jobs > 0)
+        with np.errstate(all='ignore'):
+            frame = pd.DataFrame({
+                dimension: [self.values[dimension][code] for code in present],
+                'jobs': jobs[present].astype(np.int64),
+                'salary_count': salary_counts[present].astype(np.int64),
+                'mean_salary': np.where(salary_counts[present] > 0,
+                                        salary_sums[present] / salary_counts[present], np.nan),
+                'median_salary': medians[present],
+                'remote_share': remote_jobs[present] / jobs[present],
+            })
+        return frame.sort_values('jobs', ascending=False, kind='stable').reset_index(drop=True)
+
+    # ------------------------------------------------------------------------
+    # Persistance
+    # ------------------------------------------------------------------------
+
+    ARRAYS = ('keys', 'counts', 'salary_counts', 'salary_sums', 'salary_mins', 'salary_maxs')
+
+    def save(self, directory):
+        """Sauvegarde le cube (tableaux .npy + description JSON)."""
+        os.makedirs(directory, exist_ok=True)
+        for name in self.ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        for name in ('data', 'indices', 'indptr'):
+            np.save(os.path.join(directory, f"histograms.{name}.npy"), getattr(self.histograms, name))
+
+        description = {
+            'n_rows': int(self.n_rows),
+            'dimensions': list(DIMENSIONS),
+            'values': {
+                dimension: [value.item() if hasattr(value, 'item') else value for value in values]
+                for dimension, values in self.values.items()
+            },
+            'sketch': {
+                'accuracy': self.sketch.accuracy,
+                'min_index': self.sketch.min_index,
+                'n_buckets': self.sketch.n_buckets,
+            },
+        }
+        with open(os.path.join(directory, STATS_FILE), 'w', encoding='utf-8') as f:
+            json.dump(description, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        """Charge un cube sauvegardé par ``save``."""
+        with open(os.path.join(directory, STATS_FILE), encoding='utf-8') as f:
+            description = json.load(f)
+
+        def _load(name):
+            return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+
+        arrays = {name: _load(name) for name in cls.ARRAYS}
+        sketch = SalarySketch(**description['sketch'])
+        histograms = sp.csr_matrix(
+            tuple(_load(f"histograms.{name}") for name in ('data', 'indices', 'indptr')),
+            shape=(len(arrays['keys']), sketch.n_buckets), copy=False
+        )
+        return cls(values=description['values'], histograms=histograms, sketch=sketch,
+                   n_rows=description['n_rows'], **arrays)
+
+
+if __name__ == "__main__":
+    from model_store import load_model, read_manifest
+
+    target = sys.argv[1] if len(sys.argv) > 1 else "model"
+    vectorizer, tfidf_matrix, jobs, metadata, filter_index = load_model(target)
+
+    # Modèle construit avant l'ajout du cube : l'enregistrer avec la base
+    start = time.perf_counter()
+    cube = MarketCube.from_jobs(jobs)
+    manifest = read_manifest(target)
+    if not manifest.get('segments'):
+        cube.save(os.path.join(target, manifest.get('base', '.'), STATS_DIR))
+    print(f"✅ Cube construit en {time.perf_counter() - start:.2f} s "
+          f"({len(cube.keys):,} cellules pour {cube.n_rows:,} offres)")
+
+    # Comparaison au calcul pandas sur toutes les offres
+    salaries = pd.to_numeric(jobs['med_salary'], errors='coerce')
+    salaries = salaries[salaries > 0]
+    summary = cube.summary()
+    print(f"✅ Salaire moyen : cube {summary['mean_salary']:,.2f} | pandas {salaries.mean():,.2f}")
+    print(f"✅ Salaire médian : cube {summary['median_salary']:,.0f} | pandas {salaries.median():,.0f} "
+          f"(erreur relative <= {cube.sketch.accuracy:.0%})")
+
+    start = time.perf_counter()
+    for level in filter_index.options('formatted_experience_level'):
+        cube.summary(cube.select(experience_filter=level, remote_only=True))
+    print(f"⏱️ Consultation : {(time.perf_counter() - start) * 1000:.2f} ms "
+          f"pour {len(filter_index.options('formatted_experience_level'))} combinaisons")
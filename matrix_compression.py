@@ -0,0 +1,338 @@
+"""
+🗜️ JOB INTELLIGENT - Compression de la matrice TF-IDF
+
+La matrice TF-IDF est stockée en float64 (8 octets par poids) alors que
+l'essentiel du poids de chaque offre tient dans quelques termes. Options de
+construction du modèle (``prepare_model.py --matrix-precision --top-terms``) :
+
+    - ``float32`` : poids en simple précision, toujours mappés en mémoire ;
+      les profils sont convertis en float32 pour que le produit creux ne
+      recopie pas la matrice à chaque requête
+    - ``uint8``   : poids quantifiés sur 8 bits avec une échelle par ligne
+      (poids = code x échelle, le plus grand poids de la ligne vaut 255),
+      indices de colonnes sur 16 bits si le vocabulaire le permet ; décodés
+      en float32 au chargement (SciPy n'opère que sur des indices 32 bits),
+      donc dans la mémoire privée de chaque processus : format de stockage
+      et de transfert, pas de service multi-processus
+    - ``top_terms`` : seuls les N plus forts poids de chaque offre sont
+      gardés, puis la ligne est renormalisée (norme du vectorizer)
+
+Une évaluation compare chaque réglage au classement exact float64 sur un
+jeu de requêtes : recouvrement du top-k, dérive des scores, taille sur
+disque et une fois chargée (mémoire privée par processus / mappée et
+partagée), latence ; le réglage retenu est celui qui coûte le moins de
+mémoire au service dans la tolérance.
+
+Usage (évaluation sur un modèle float64 existant) :
+    python matrix_compression.py model/ --top-terms 32 64 128
+"""
+
+import argparse
+import time
+
+import numpy as np
+import scipy.sparse as sp
+
+from recommender import score_rows, search
+
+
+PRECISIONS = ('float64', 'float32', 'uint8')
+DEFAULT_PRECISION = 'float64'
+
+# Niveaux de quantification (codes 0..255, poids TF-IDF positifs)
+QUANTIZATION_LEVELS = 255
+
+# Tolérance par défaut de l'évaluation
+MIN_OVERLAP = 0.95
+MAX_SCORE_DRIFT = 0.01
+
+
+def data_dtype(precision):
+    """Type des poids stockés sur disque pour une précision."""
+    if precision not in PRECISIONS:
+        raise ValueError(f"Précision inconnue: {precision!r} (choix : {', '.join(PRECISIONS)})")
+    return np.dtype(np.uint8 if precision == 'uint8' else precision)
+
+
+def index_dtype(precision, n_features, nnz):
+    """
+    Type des indices de colonnes stockés sur disque
+
+    16 bits seulement pour une matrice quantifiée (décodée au chargement) :
+    les matrices float restent mappées telles quelles, en indices 32 bits.
+    """
+    if precision == 'uint8' and n_features <= np.iinfo(np.int16).max:
+        return np.dtype(np.int16)
+    return np.dtype(np.int32 if nnz <= np.iinfo(np.int32).max else np.int64)
+
+
+def prune_rows(matrix, top_terms, norm='l2'):
+    """
+    Garde les ``top_terms`` plus forts poids de chaque ligne, puis renormalise
+
+    Args:
+        matrix: Matrice TF-IDF CSR
+        top_terms (int): Nombre de termes gardés par ligne
+        norm (str): Norme des lignes après élagage (None = aucune)
+
+    Returns:
+        sp.csr_matrix: Matrice élaguée (indices triés)
+    """
+
+    matrix = sp.csr_matrix(matrix)
+    lengths = np.diff(matrix.indptr)
+    if len(lengths) == 0 or lengths.max() <= top_terms:
+        return matrix
+
+    # Rang de chaque poids dans sa ligne (plus fort d'abord, puis par colonne)
+    row_of = np.repeat(np.arange(matrix.shape[0]), lengths)
+    order = np.lexsort((matrix.indices, -matrix.data, row_of))
+    rank = np.empty(matrix.nnz, dtype=np.int64)
+    rank[order] = np.arange(matrix.nnz) - np.repeat(matrix.indptr[:-1], lengths)
+    keep = rank < top_terms
+
+    indptr = np.concatenate([[0], np.cumsum(np.minimum(lengths, top_terms))])
+    pruned = sp.csr_matrix((matrix.data[keep], matrix.indices[keep], indptr), shape=matrix.shape)
+    pruned.sort_indices()
+    if norm:
+        from sklearn.preprocessing import normalize
+        pruned = normalize(pruned, norm=norm, copy=False)
+    return pruned
+
+
+def quantize_rows(matrix):
+    """
+    Quantifie les poids sur 8 bits avec une échelle par ligne
+
+    Args:
+        matrix: Matrice TF-IDF CSR (poids positifs)
+
+    Returns:
+        tuple: (codes uint8 alignés sur ``matrix.data``, échelles float32 par ligne)
+    """
+
+    matrix = sp.csr_matrix(matrix)
+    if matrix.nnz and matrix.data.min() < 0:
+        raise ValueError("La quantification 8 bits suppose des poids TF-IDF positifs")
+
+    lengths = np.diff(matrix.indptr)
+    scales = np.zeros(matrix.shape[0], dtype=np.float32)
+    non_empty = np.flatnonzero(lengths > 0)
+    if len(non_empty):
+        row_max = np.maximum.reduceat(matrix.data, matrix.indptr[non_empty])
+        scales[non_empty] = row_max / QUANTIZATION_LEVELS
+
+    divisors = np.repeat(scales, lengths).astype(np.float64)
+    divisors[divisors == 0] = 1.0
+    codes = np.clip(np.rint(matrix.data / divisors), 0, QUANTIZATION_LEVELS).astype(np.uint8)
+    return codes, scales
+
+
+def dequantize(codes, scales, indptr):
+    """Poids float32 d'une matrice quantifiée (``code x échelle de la ligne``)."""
+    return np.asarray(codes, dtype=np.float32) * np.repeat(
+        np.asarray(scales, dtype=np.float32), np.diff(np.asarray(indptr))
+    )
+
+
+def compress_matrix(matrix, precision=DEFAULT_PRECISION, top_terms=None, norm='l2'):
+    """
+    Matrice telle qu'elle est servie après compression (pour l'évaluation)
+
+    Args:
+        matrix: Matrice TF-IDF CSR de référence
+        precision (str): 'float64', 'float32' ou 'uint8'
+        top_terms (int): Termes gardés par ligne (None = tous)
+        norm (str): Norme des lignes après élagage
+
+    Returns:
+        sp.csr_matrix: Matrice float64 ou float32
+    """
+
+    data_dtype(precision)
+    block = prune_rows(matrix, top_terms, norm) if top_terms else sp.csr_matrix(matrix)
+    if precision == 'uint8':
+        codes, scales = quantize_rows(block)
+        return sp.csr_matrix((dequantize(codes, scales, block.indptr), block.indices, block.indptr),
+                             shape=block.shape)
+    return block.astype(precision)
+
+
+def storage_bytes(matrix, precision):
+    """Taille sur disque (octets) de la matrice au format du modèle."""
+    n_rows, n_features = matrix.shape
+    size = matrix.nnz * (data_dtype(precision).itemsize
+                         + index_dtype(precision, n_features, matrix.nnz).itemsize)
+    size += (n_rows + 1) * index_dtype('float64', n_features, matrix.nnz).itemsize
+    if precision == 'uint8':
+        size += n_rows * np.dtype(np.float32).itemsize
+    return size
+
+
+def loaded_bytes(matrix, precision):
+    """
+    Mémoire occupée par la matrice une fois chargée par un processus serveur
+
+    Les matrices float sont mappées telles quelles (pages partagées entre
+    processus) ; une matrice 8 bits est décodée en float32, et ses indices
+    16 bits élargis en 32 bits, dans la mémoire privée de chaque processus.
+
+    Returns:
+        dict: private (octets copiés dans chaque processus) et mapped
+        (octets mappés, partagés par le cache disque)
+    """
+    if precision != 'uint8':
+        return {'private': 0, 'mapped': storage_bytes(matrix, precision)}
+    n_rows, n_features = matrix.shape
+    indptr = (n_rows + 1) * index_dtype('float64', n_features, matrix.nnz).itemsize
+    private = matrix.nnz * np.dtype(np.float32).itemsize
+    if index_dtype(precision, n_features, matrix.nnz) == np.int32:
+        return {'private': private, 'mapped': indptr + matrix.nnz * np.dtype(np.int32).itemsize}
+    return {'private': private + matrix.nnz * np.dtype(np.int32).itemsize, 'mapped': indptr}
+
+
+# ============================================================================
+# ÉVALUATION
+# ============================================================================
+
+def evaluate(reference, candidate, queries, k=10):
+    """
+    Compare le classement d'une matrice compressée au classement exact
+
+    Args:
+        reference: Matrice TF-IDF float64 de référence
+        candidate: Matrice compressée (voir ``compress_matrix``)
+        queries: Profils TF-IDF (n_requêtes x n_features)
+        k (int): Taille du top-k comparé
+
+    Returns:
+        dict: overlap (recouvrement moyen du top-k), min_overlap, top1
+        (même premier résultat), mean_drift / max_drift (écart absolu des
+        scores sur le top-k exact) et ms_per_query (recherche compressée)
+    """
+
+    overlaps, top1, drifts = [], [], []
+    elapsed = 0.0
+    for row in range(queries.shape[0]):
+        query = queries[row]
+        expected, expected_scores = search(query, reference, k)
+        start = time.perf_counter()
+        found, _ = search(query, candidate, k)
+        elapsed += time.perf_counter() - start
+
+        overlaps.append(len(np.intersect1d(expected, found)) / max(1, len(expected)))
+        top1.append(len(found) > 0 and len(expected) > 0 and found[0] == expected[0])
+        drifts.append(np.abs(score_rows(query, candidate, expected) - expected_scores))
+
+    drifts = np.concatenate(drifts) if drifts else np.zeros(1)
+    return {
+        'overlap': float(np.mean(overlaps)),
+        'min_overlap': float(np.min(overlaps)),
+        'top1': float(np.mean(top1)),
+        'mean_drift': float(drifts.mean()),
+        'max_drift': float(drifts.max()),
+        'ms_per_query': elapsed * 1000 / max(1, queries.shape[0]),
+    }
+
+
+def evaluate_settings(reference, queries, settings, k=10, norm='l2'):
+    """
+    Évalue une liste de réglages (precision, top_terms)
+
+    Returns:
+        list: Un dict par réglage (réglage, taille sur disque, mémoire
+        privée / mappée une fois chargée, résultats de ``evaluate``)
+    """
+
+    results = []
+    for precision, top_terms in settings:
+        candidate = compress_matrix(reference, precision, top_terms, norm)
+        loaded = loaded_bytes(candidate, precision)
+        results.append({
+            'precision': precision,
+            'top_terms': top_terms,
+            'bytes': storage_bytes(candidate, precision),
+            'private_bytes': loaded['private'],
+            'mapped_bytes': loaded['mapped'],
+            **evaluate(reference, candidate, queries, k),
+        })
+    return results
+
+
+def smallest_within_tolerance(results, min_overlap=MIN_OVERLAP, max_drift=MAX_SCORE_DRIFT):
+    """
+    Réglage qui respecte la tolérance au moindre coût de service, ou None
+
+    Classement par mémoire privée (payée par chaque processus serveur), puis
+    mémoire chargée totale, taille sur disque et latence.
+    """
+    accepted = [result for result in results
+                if result['overlap'] >= min_overlap and result['max_drift'] <= max_drift]
+    if not accepted:
+        return None
+    return min(accepted, key=lambda result: (result['private_bytes'],
+                                             result['private_bytes'] + result['mapped_bytes'],
+                                             result['bytes'], result['ms_per_query']))
+
+
+def main():
+    from model_store import load_model, read_manifest
+
+    parser = argparse.ArgumentParser(description="Évaluation de la compression de la matrice TF-IDF")
+    parser.add_argument('model_dir', nargs='?', default="model")
+    parser.add_argument('--queries', type=int, default=200, help="Offres utilisées comme profils")
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--top-terms', type=int, nargs='*', default=[32, 64, 128],
+                        help="Valeurs de N évaluées (en plus de 'tous les termes')")
+    parser.add_argument('--min-overlap', type=float, default=MIN_OVERLAP)
+    parser.add_argument('--max-drift', type=float, default=MAX_SCORE_DRIFT)
+    args = parser.parse_args()
+
+    vectorizer, tfidf_matrix, jobs, metadata, filter_index = load_model(args.model_dir, mmap_mode=None)
+    matrix_format = read_manifest(args.model_dir).get('matrix', {})
+    if matrix_format.get('precision', DEFAULT_PRECISION) != 'float64' or matrix_format.get('top_terms'):
+        print(f"⚠️ Modèle déjà compressé ({matrix_format}) : la référence n'est pas le classement exact")
+    reference = sp.csr_matrix(tfidf_matrix.tocsr(), dtype=np.float64)
+
+    rng = np.random.default_rng(0)
+    sample = np.sort(rng.choice(reference.shape[0], min(args.queries, reference.shape[0]), replace=False))
+    queries = reference[sample]
+
+    settings = [(precision, top_terms) for top_terms in [None, *sorted(args.top_terms, reverse=True)]
+                for precision in PRECISIONS]
+    results = evaluate_settings(reference, queries, settings, args.k, vectorizer.norm)
+
+    print(f"{'précision':>9} {'termes':>6} {'disque':>10} {'privée':>10} {'mappée':>10} {'top-k':>7} "
+          f"{'min':>6} {'top-1':>6} {'dérive moy':>11} {'dérive max':>11} {'ms/req':>7}")
+    for result in results:
+        print(f"{result['precision']:>9} {result['top_terms'] or 'tous':>6} "
+              f"{result['bytes'] / 1e6:>8.1f}MB {result['private_bytes'] / 1e6:>8.1f}MB "
+              f"{result['mapped_bytes'] / 1e6:>8.1f}MB {result['overlap']:>7.1%} {result['min_overlap']:>6.0%} "
+              f"{result['top1']:>6.0%} {result['mean_drift']:>11.2e} {result['max_drift']:>11.2e} "
+              f"{result['ms_per_query']:>7.2f}")
+    print("   privée : copiée dans chaque processus serveur ; mappée : partagée par le cache disque")
+
+    best = smallest_within_tolerance(results, args.min_overlap, args.max_drift)
+    if best is None:
+        print(f"❌ Aucun réglage ne respecte top-k >= {args.min_overlap:.0%} et dérive <= {args.max_drift}")
+        return
+    options = f"--matrix-precision {best['precision']}"
+    if best['top_terms']:
+        options += f" --top-terms {best['top_terms']}"
+    print(f"✅ Réglage le moins coûteux à servir dans la tolérance : {options} "
+          f"({best['private_bytes'] / 1e6:.1f} MB privés + {best['mapped_bytes'] / 1e6:.1f} MB mappés, "
+          f"{best['bytes'] / 1e6:.1f} MB sur disque, top-k {best['overlap']:.1%}, "
+          f"dérive max {best['max_drift']:.1e})")
+    print(f"   python prepare_model.py dataset/ model/ {options}")
+    smallest = min((result for result in results
+                    if result['overlap'] >= args.min_overlap and result['max_drift'] <= args.max_drift),
+                   key=lambda result: result['bytes'])
+    if smallest['bytes'] < best['bytes']:
+        print(f"💡 Plus petit sur disque (stockage, transfert) : --matrix-precision {smallest['precision']}"
+              + (f" --top-terms {smallest['top_terms']}" if smallest['top_terms'] else "")
+              + f" ({smallest['bytes'] / 1e6:.1f} MB, décodé en {smallest['private_bytes'] / 1e6:.1f} MB "
+              f"privés par processus)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+⏱️ JOB INTELLIGENT - Mesures de performance par étape
+
+Chaque recherche produit un enregistrement structuré (une ligne JSON) avec
+la durée de chaque étape du chemin de recommandation :
+    - cache      : clé + consultation du cache des résultats
+    - filters    : résolution des filtres en lignes candidates
+    - transform  : ``vectorizer.transform`` du profil
+    - scoring    : produit scalaire creux sur les candidats
+    - top_k      : sélection partielle des k meilleurs
+    - frame      : construction du DataFrame des k résultats
+    - service    : appel au service de recommandation (app en client léger)
+    - render     : boucle ``display_job_card`` de l'application
+
+Les durées alimentent des histogrammes glissants (dernières requêtes) par
+étape. Un mode profilage optionnel échantillonne une fraction des requêtes
+avec cProfile et tracemalloc.
+
+Sorties : logs (logger ``job_intelligent.metrics``), fichier JSONL des
+enregistrements (``metrics_path``) et panneau d'administration de l'app.
+"""
+
+import cProfile
+import io
+import json
+import logging
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+
+logger = logging.getLogger("job_intelligent.metrics")
+
+STAGES = ('cache', 'filters', 'transform', 'scoring', 'top_k', 'frame', 'service', 'render')
+
+# Bornes supérieures (ms) des classes des histogrammes
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class QueryTrace:
+    """
+    Durées des étapes d'une requête
+
+    Attributes:
+        attributes (dict): Contexte de la requête (filtres, cache, moteur, ...)
+        stages (dict): Durée cumulée (secondes) par étape
+        started_at (float): Horodatage du début (epoch)
+    """
+
+    def __init__(self, **attributes):
+        self.attributes = attributes
+        self.stages = {}
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self._profiler = None
+        self._owns_tracemalloc = False
+
+    @contextmanager
+    def stage(self, name):
+        """Chronomètre une étape (les durées d'une même étape s'additionnent)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def annotate(self, **attributes):
+        """Ajoute des informations de contexte à l'enregistrement."""
+        self.attributes.update(attributes)
+
+    def record(self):
+        """Enregistrement structuré (durées en millisecondes)."""
+        return {
+            'timestamp': self.started_at,
+            'total_ms': (time.perf_counter() - self._start) * 1000,
+            'stages_ms': {name: seconds * 1000 for name, seconds in self.stages.items()},
+            **self.attributes,
+        }
+
+
+class RollingHistogram:
+    """
+    Distribution des dernières durées observées (fenêtre glissante)
+
+    Attributes:
+        window (int): Nombre de valeurs conservées
+    """
+
+    def __init__(self, window=1000):
+        self.window = window
+        self._values = deque(maxlen=window)
+        self.count = 0
+
+    def add(self, value_ms):
+        self._values.append(value_ms)
+        self.count += 1
+
+    def summary(self):
+        """Percentiles et classes de la fenêtre courante (millisecondes)."""
+        values = sorted(self._values)
+        if not values:
+            return {'count': self.count, 'window': 0}
+
+        def percentile(q):
+            return values[min(len(values) - 1, int(q * len(values)))]
+
+        buckets = {f"<={bound}": 0 for bound in BUCKETS_MS}
+        buckets[f">{BUCKETS_MS[-1]}"] = 0
+        for value in values:
+            for bound in BUCKETS_MS:
+                if value <= bound:
+                    buckets[f"<={bound}"] += 1
+                    break
+            else:
+                buckets[f">{BUCKETS_MS[-1]}"] += 1
+
+        return {
+            'count': self.count,
+            'window': len(values),
+            'mean_ms': sum(values) / len(values),
+            'p50_ms': percentile(0.50),
+            'p95_ms': percentile(0.95),
+            'p99_ms': percentile(0.99),
+            'max_ms': values[-1],
+            'buckets': buckets,
+        }
+
+
+class QueryMetrics:
+    """
+    Collecte des mesures de toutes les requêtes du processus (thread-safe)
+
+    Attributes:
+        metrics_path (str): Fichier JSONL des enregistrements (None = aucun)
+        profile_rate (float): Fraction des requêtes profilées (0 = jamais)
+        histograms (dict): RollingHistogram par étape, et 'total'
+        profiles (deque): Derniers profils (cProfile + tracemalloc)
+    """
+
+    def __init__(self, window=1000, metrics_path=None, profile_rate=0.0, max_profiles=10,
+                 random_state=None):
+        self.metrics_path = metrics_path
+        self.profile_rate = profile_rate
+        self.histograms = {name: RollingHistogram(window) for name in (*STAGES, 'total')}
+        self.profiles = deque(maxlen=max_profiles)
+        self._random = random.Random(random_state)
+        self._lock = threading.Lock()
+        self._profiling = False
+
+    def start(self, **attributes):
+        """
+        Démarre la mesure d'une requête
+
+        Une requête sur ``1 / profile_rate`` environ est profilée ; une seule
+        à la fois (tracemalloc trace tout le processus).
+
+        Returns:
+            QueryTrace: Trace à passer à ``recommend_jobs`` puis à ``finish``
+        """
+
+        trace = QueryTrace(**attributes)
+        with self._lock:
+            sampled = (not self._profiling and self.profile_rate > 0
+                       and self._random.random() < self.profile_rate)
+            if sampled:
+                self._profiling = True
+        if sampled:
+            trace._profiler = cProfile.Profile()
+            if not tracemalloc.is_tracing():
+                trace._owns_tracemalloc = True
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            trace._profiler.enable()
+        return trace
+
+    def finish(self, trace):
+        """
+        Termine la mesure : histogrammes, logs et fichier des enregistrements
+
+        Returns:
+            dict: Enregistrement de la requête
+        """
+
+        profile = None
+        if trace._profiler is not None:
+            trace._profiler.disable()
+        record = trace.record()
+
+        if trace._profiler is not None:
+            profile = self._profile_summary(trace._profiler)
+            if trace._owns_tracemalloc:
+                tracemalloc.stop()
+            with self._lock:
+                self._profiling = False
+            record['profiled'] = True
+            record['tracemalloc_peak_kb'] = profile['tracemalloc_peak_kb']
+
+        with self._lock:
+            for name, value in record['stages_ms'].items():
+                if name in self.histograms:
+                    self.histograms[name].add(value)
+            self.histograms['total'].add(record['total_ms'])
+            if profile is not None:
+                self.profiles.append({'record': record, **profile})
+            if self.metrics_path:
+                with open(self.metrics_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record, default=str) + "\n")
+
+        logger.info(json.dumps(record, default=str))
+        if profile is not None:
+            logger.info("Profil de requête :\n%s", profile['cprofile'])
+        return record
+
+    @staticmethod
+    def _profile_summary(profiler, limit=15):
+        """Fonctions les plus coûteuses et allocations principales."""
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(limit)
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        allocations = [str(statistic) for statistic in snapshot.statistics('lineno')[:10]]
+        return {
+            'cprofile': stream.getvalue(),
+            'tracemalloc_peak_kb': peak / 1024,
+            'allocations': allocations,
+        }
+
+    def summary(self):
+        """Résumé par étape (percentiles et classes des histogrammes glissants)."""
+        with self._lock:
+            return {name: histogram.summary() for name, histogram in self.histograms.items()
+                    if histogram.count}
+
+    def recent_profiles(self):
+        """Derniers profils échantillonnés, du plus récent au plus ancien."""
+        with self._lock:
+            return list(reversed(self.profiles))
@@ -0,0 +1,1188 @@
+"""
+💾 JOB INTELLIGENT - Format de modèle sans pickle, mappé en mémoire
+
+Format versionné du dossier ``model/`` :
+
+    model/
+    ├── manifest.json          # Version du format, métadonnées, schéma
+    ├── vectorizer/
+    │   ├── vocabulary.json    # Termes, dans l'ordre des colonnes TF-IDF
+    │   ├── idf.npy            # Poids IDF
+    │   └── stop_words.json    # Mots vides (voir query_encoder.py)
+    ├── matrix/                # Matrice TF-IDF CSR (data, indices, indptr)
+    │                          #   float64, float32 ou 8 bits + row_scales
+    │                          #   (voir matrix_compression.py)
+    ├── jobs/                  # Colonnes des emplois
+    │   ├── <num>.npy          #   colonnes numériques (float32 si sans perte)
+    │   ├── <cat>.codes.npy    #   faible cardinalité : codes entiers
+    │   │   <cat>.categories.json  + valeurs distinctes
+    │   └── <txt>.offsets.npy  #   colonnes texte : offsets + blob UTF-8
+    │       <txt>.bin          #   (compressé par valeur pour les longs textes)
+    │                          #   décodé uniquement pour les lignes lues
+    ├── filters/               # Index des filtres (voir filter_index.py)
+    └── stats/                 # Cube des statistiques (voir market_stats.py)
+
+Mises à jour incrémentales (voir update_model.py) : le manifeste peut aussi
+lister des segments delta (``segments/<n>/``, mêmes fichiers + offres
+fermées) et pointer vers une base compactée (``generations/<n>/``). Il est
+toujours remplacé atomiquement : un chargement voit un instantané cohérent.
+Base et segments restent mappés séparément (``SegmentedMatrix``,
+``SegmentedJobTable``, ``SegmentedFilterIndex``) : les offres fermées sont
+écartées au filtrage et au scoring, sans recopier la base.
+
+Tous les tableaux sont ouverts avec ``np.load(mmap_mode='r')`` : le
+démarrage ne lit que le manifeste, les pages sont chargées à la demande, et
+plusieurs processus serveurs partagent la même copie dans le cache disque.
+
+Usage (conversion d'un ancien modèle pickle) :
+    python model_store.py model/
+"""
+
+import json
+import os
+import pickle
+import sys
+import zlib
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from pandas.api.types import union_categoricals
+
+from filter_index import FilterIndex, SegmentedFilterIndex
+from market_stats import STATS_DIR, STATS_FILE, MarketCube
+from matrix_compression import (DEFAULT_PRECISION, data_dtype, dequantize, index_dtype,
+                                prune_rows, quantize_rows)
+from query_encoder import QueryEncoder
+from recommender import live_to_local, merge_top_k, search_live
+
+
+FORMAT_NAME = "job-intelligent-model"
+FORMAT_VERSION = 3
+MANIFEST_FILE = "manifest.json"
+TOMBSTONES_FILE = "tombstones.npy"
+LEGACY_FILES = ("tfidf_vectorizer.pkl", "tfidf_matrix.pkl", "jobs_data.pkl", "metadata.pkl")
+
+# Colonnes de faible cardinalité stockées en codes + valeurs distinctes
+CATEGORY_COLUMNS = (
+    'company_name', 'location', 'state', 'city',
+    'formatted_experience_level', 'formatted_work_type'
+)
+
+# Colonnes numériques : les valeurs non numériques (ex. remote_allowed =
+# "Unknown" dans jobs_data.pkl) deviennent NaN
+NUMERIC_COLUMNS = ('med_salary', 'remote_allowed')
+
+# Longs textes compressés valeur par valeur (décompressés à la lecture) ;
+# les textes courts (compétences, titres) grossiraient une fois compressés
+COMPRESSED_COLUMNS = ('description',)
+TEXT_COMPRESSION = 'zlib'
+
+# Paramètres du TfidfVectorizer exportables en JSON
+VECTORIZER_PARAMS = (
+    'input', 'encoding', 'decode_error', 'strip_accents', 'lowercase',
+    'token_pattern', 'stop_words', 'ngram_range', 'analyzer', 'max_df',
+    'min_df', 'max_features', 'binary', 'norm', 'use_idf', 'smooth_idf',
+    'sublinear_tf'
+)
+
+
+# ============================================================================
+# COLONNES DES EMPLOIS
+# ============================================================================
+
+def _open_array(path, mmap_mode):
+    """Ouvre un .npy (mappé en mémoire si ``mmap_mode`` est donné)."""
+    return np.load(path, mmap_mode=mmap_mode)
+
+
+def _open_blob(path, mmap_mode):
+    """Ouvre un fichier binaire brut comme tableau d'octets."""
+    if os.path.getsize(path) == 0:
+        return np.empty(0, dtype=np.uint8)
+    if mmap_mode is None:
+        return np.fromfile(path, dtype=np.uint8)
+    return np.memmap(path, dtype=np.uint8, mode=mmap_mode)
+
+
+class TextColumn:
+    """
+    Colonne de texte stockée en blob UTF-8 indexé par offsets
+
+    La valeur de la ligne ``i`` est ``blob[offsets[i]:offsets[i + 1]]``,
+    décodée seulement quand elle est lue. Les colonnes de type ``json``
+    (valeurs mixtes) stockent chaque valeur encodée en JSON. Avec
+    ``compression='zlib'``, chaque valeur est compressée séparément (deflate
+    brut) : l'accès à une ligne reste direct.
+
+    Attributes:
+        offsets (np.ndarray): Bornes de chaque valeur dans le blob (int32 ou int64)
+        blob (np.ndarray): Octets UTF-8 concaténés
+        nulls (np.ndarray): Positions triées des valeurs manquantes
+        kind (str): 'text' ou 'json'
+        compression (str): None ou 'zlib'
+    """
+
+    def __init__(self, offsets, blob, nulls, kind='text', compression=None):
+        self.offsets = offsets
+        self.blob = blob
+        self.nulls = nulls
+        self.kind = kind
+        self.compression = compression
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @staticmethod
+    def encode(series, kind='text', compression=None):
+        """
+        Encode une colonne pandas en (offsets, blob, nulls)
+
+        Args:
+            series (pd.Series): Colonne à encoder
+            kind (str): 'text' (valeurs str) ou 'json' (valeurs mixtes)
+            compression (str): None ou 'zlib' (chaque valeur compressée)
+
+        Returns:
+            tuple: (offsets int64, blob bytes, nulls int32)
+        """
+
+        values = series.tolist()
+        nulls = np.flatnonzero(pd.isna(series).to_numpy(dtype=bool)).astype(np.int32)
+        chunks = []
+        for value in values:
+            if pd.isna(value):
+                chunks.append(b"")
+            elif kind == 'json':
+                chunks.append(json.dumps(value.item() if hasattr(value, 'item') else value).encode('utf-8'))
+            else:
+                chunks.append(str(value).encode('utf-8'))
+        if compression == 'zlib':
+            chunks = [zlib.compress(chunk, 6, wbits=-15) if chunk else chunk for chunk in chunks]
+        lengths = np.fromiter((len(chunk) for chunk in chunks), dtype=np.int64, count=len(chunks))
+        offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        return offsets, b"".join(chunks), nulls
+
+    def _is_null(self, position):
+        found = np.searchsorted(self.nulls, position)
+        return found < len(self.nulls) and self.nulls[found] == position
+
+    def get(self, position):
+        """Valeur décodée de la ligne ``position`` (None si manquante)."""
+        if self._is_null(position):
+            return None
+        raw = bytes(self.blob[self.offsets[position]:self.offsets[position + 1]])
+        if self.compression == 'zlib' and raw:
+            raw = zlib.decompress(raw, wbits=-15)
+        raw = raw.decode('utf-8')
+        return json.loads(raw) if self.kind == 'json' else raw
+
+    def take(self, positions):
+        """Valeurs décodées des lignes demandées."""
+        return [self.get(int(position)) for position in positions]
+
+    def to_numpy(self):
+        """Décode toute la colonne (à éviter sur le chemin d'une requête)."""
+        return np.array(self.take(range(len(self))), dtype=object)
+
+
+class CategoryColumn:
+    """
+    Colonne de faible cardinalité stockée en codes entiers
+
+    La valeur de la ligne ``i`` est ``categories[codes[i]]`` (code -1 =
+    valeur manquante) : une chaîne par valeur distincte au lieu d'une par
+    ligne, et la colonne entière se lit en ``pd.Categorical`` sans décodage.
+
+    Attributes:
+        codes (np.ndarray): Code de chaque ligne (int8, int16 ou int32)
+        categories (list): Valeurs distinctes (str)
+    """
+
+    def __init__(self, codes, categories):
+        self.codes = codes
+        self.categories = list(categories)
+        # Dernier élément : valeur des codes -1
+        self._lookup = np.array([*self.categories, None], dtype=object)
+
+    def __len__(self):
+        return len(self.codes)
+
+    @staticmethod
+    def encode(series, mapping):
+        """
+        Codes (int32) d'une colonne pandas
+
+        Args:
+            series (pd.Series): Colonne à encoder (valeurs str)
+            mapping (dict): Valeur -> code, complété avec les nouvelles valeurs
+
+        Returns:
+            np.ndarray: Code de chaque ligne (-1 si manquante)
+        """
+
+        return np.fromiter(
+            (-1 if pd.isna(value) else mapping.setdefault(value, len(mapping))
+             for value in series.tolist()),
+            dtype=np.int32, count=len(series)
+        )
+
+    @staticmethod
+    def code_dtype(n_categories):
+        """Plus petit type entier signé pour ``n_categories`` valeurs."""
+        for dtype in (np.int8, np.int16, np.int32):
+            if n_categories <= np.iinfo(dtype).max:
+                return dtype
+        return np.int64
+
+    def take(self, positions):
+        """Valeurs des lignes demandées (tableau d'objets, None si manquante)."""
+        return self._lookup[np.asarray(self.codes[positions], dtype=np.intp)]
+
+    def to_categorical(self, positions=None):
+        """Colonne (ou lignes demandées) en ``pd.Categorical``, sans décodage."""
+        codes = self.codes if positions is None else self.codes[positions]
+        return pd.Categorical.from_codes(np.asarray(codes), categories=self.categories)
+
+
+class JobTable:
+    """
+    Table des emplois chargée paresseusement depuis ``model/jobs/``
+
+    Expose le sous-ensemble de l'API DataFrame utilisé par l'application :
+    ``len()``, ``columns``, ``table[col]`` et ``take(positions)``, qui ne
+    construit un DataFrame que pour les lignes demandées. ``table[col]``
+    retourne les colonnes de faible cardinalité en ``category``.
+
+    Attributes:
+        n_rows (int): Nombre d'emplois
+        data (dict): Colonne -> np.ndarray (mappé), CategoryColumn ou TextColumn
+        dtypes (dict): Colonne -> dtype pandas d'origine (str)
+    """
+
+    # Lignes encodées à la fois par ``from_dataframe``
+    ENCODE_BLOCK = 10000
+
+    def __init__(self, n_rows, data, dtypes=None):
+        self.n_rows = n_rows
+        self.data = data
+        self.dtypes = dtypes or {}
+
+    def __len__(self):
+        return self.n_rows
+
+    @property
+    def columns(self):
+        return pd.Index(list(self.data))
+
+    @classmethod
+    def from_dataframe(cls, jobs_df, compression=TEXT_COMPRESSION):
+        """
+        Table compacte en mémoire, mêmes encodages que ``save_model``
+
+        Args:
+            jobs_df (pd.DataFrame): Données des emplois (ex. jobs_data.pkl)
+            compression (str): Compression des longs textes (None = aucune)
+
+        Returns:
+            JobTable: Table équivalente (mêmes lignes retournées par ``take``)
+        """
+
+        jobs_df = jobs_df.reset_index(drop=True)
+        data, dtypes = {}, {}
+        for column in jobs_df.columns:
+            series = _typed_series(column, jobs_df[column])
+            spec = _column_spec(column, series, compression)
+            dtypes[column] = spec['dtype']
+            if spec['kind'] == 'numeric':
+                values = series.to_numpy()
+                data[column] = values.view(np.int64) if values.dtype.kind == 'M' else _compact_numeric(values)
+            elif spec['kind'] == 'category':
+                mapping = {}
+                codes = CategoryColumn.encode(series, mapping)
+                data[column] = CategoryColumn(codes.astype(CategoryColumn.code_dtype(len(mapping))), mapping)
+            else:
+                # Par blocs : jamais toute la colonne encodée en double en mémoire
+                offset_parts, blob_parts, null_parts = [np.zeros(1, dtype=np.int64)], [], []
+                blob_size = 0
+                for start in range(0, len(series), cls.ENCODE_BLOCK):
+                    offsets, blob, nulls = TextColumn.encode(series.iloc[start:start + cls.ENCODE_BLOCK],
+                                                             spec['kind'], spec.get('compression'))
+                    offset_parts.append(offsets[1:] + blob_size)
+                    null_parts.append(nulls + start)
+                    blob_parts.append(blob)
+                    blob_size += len(blob)
+                data[column] = TextColumn(
+                    np.concatenate(offset_parts).astype(_offset_dtype(blob_size)),
+                    np.frombuffer(b"".join(blob_parts), dtype=np.uint8),
+                    np.concatenate(null_parts).astype(np.int32) if null_parts else np.empty(0, dtype=np.int32),
+                    kind=spec['kind'], compression=spec.get('compression')
+                )
+        return cls(len(jobs_df), data, dtypes)
+
+    def _values(self, column, positions=None, categorical=False):
+        values = self.data[column]
+        if isinstance(values, TextColumn):
+            if positions is None:
+                return values.to_numpy()
+            return np.array(values.take(positions), dtype=object)
+        if isinstance(values, CategoryColumn):
+            if categorical:
+                return values.to_categorical(positions)
+            return values.take(slice(None) if positions is None else positions)
+        values = values if positions is None else values[positions]
+        dtype = self.dtypes.get(column)
+        if dtype and dtype.startswith('datetime64'):
+            return values.view(dtype)
+        if dtype and values.dtype != dtype:
+            # Stocké en float32 sans perte : relu avec le dtype d'origine
+            return values.astype(dtype)
+        return values
+
+    def __getitem__(self, column):
+        return pd.Series(self._values(column, categorical=True), name=column)
+
+    def take(self, positions):
+        """
+        Construit un DataFrame pour les lignes demandées uniquement
+
+        Args:
+            positions (array-like): Positions des lignes
+
+        Returns:
+            pd.DataFrame: Lignes demandées, indexées par leur position
+        """
+
+        positions = np.asarray(positions, dtype=np.int64)
+        frame = pd.DataFrame(
+            {column: self._values(column, positions) for column in self.data},
+            index=positions
+        )
+        return frame
+
+
+def _live_starts(n_rows, dead):
+    """Première position globale de chaque partie (lignes vivantes), puis le total."""
+    return np.concatenate([[0], np.cumsum([n - len(part_dead) for n, part_dead in zip(n_rows, dead)])])
+
+
+class SegmentedJobTable:
+    """
+    Concaténation paresseuse des tables de la base et des segments delta
+
+    Seules les lignes vivantes de chaque table (ni fermées, ni remplacées
+    par un segment plus récent) sont visibles, dans l'ordre des segments.
+
+    Attributes:
+        tables (list): JobTable de la base puis de chaque segment
+        dead (list): Lignes supprimées de chaque table (positions locales triées)
+        starts (np.ndarray): Première position globale de chaque table
+    """
+
+    def __init__(self, tables, dead):
+        self.tables = tables
+        self.dead = [np.asarray(table_dead, dtype=np.int64) for table_dead in dead]
+        self.starts = _live_starts([len(table) for table in tables], self.dead)
+
+    def __len__(self):
+        return int(self.starts[-1])
+
+    @property
+    def columns(self):
+        columns = []
+        for table in self.tables:
+            columns.extend(column for column in table.columns if column not in columns)
+        return pd.Index(columns)
+
+    def __getitem__(self, column):
+        parts = []
+        for table, table_dead in zip(self.tables, self.dead):
+            table_rows = np.delete(np.arange(len(table)), table_dead) if len(table_dead) else None
+            if column in table.data:
+                parts.append(table._values(column, table_rows, categorical=True))
+            else:
+                parts.append(pd.Series([None] * (len(table) - len(table_dead)), dtype=object))
+        if all(isinstance(part, pd.Categorical) for part in parts):
+            return pd.Series(union_categoricals(parts), name=column)
+        return pd.concat([pd.Series(part) for part in parts], ignore_index=True).rename(column)
+
+    def take(self, positions):
+        """
+        Construit un DataFrame pour les lignes demandées uniquement
+
+        Args:
+            positions (array-like): Positions globales des lignes
+
+        Returns:
+            pd.DataFrame: Lignes demandées, indexées par leur position
+        """
+
+        positions = np.asarray(positions, dtype=np.int64)
+        if not len(positions):
+            return pd.DataFrame(columns=self.columns, index=positions)
+        # Chaque ligne n'est lue qu'une fois (les lots répètent des positions),
+        # puis dupliquée par rang : les positions triées suivent l'ordre des tables
+        unique, inverse = np.unique(positions, return_inverse=True)
+        segments = np.searchsorted(self.starts, unique, side='right') - 1
+        frames = []
+        for segment in np.unique(segments):
+            selected = unique[segments == segment]
+            local = live_to_local(selected - self.starts[segment], self.dead[segment])
+            frame = self.tables[segment].take(local)
+            for column in self.columns.difference(frame.columns, sort=False):
+                frame[column] = pd.Series(None, index=frame.index, dtype=object)
+            frames.append(frame)
+        frame = pd.concat(frames, ignore_index=True).reindex(columns=self.columns).iloc[inverse]
+        frame.index = positions
+        return frame
+
+
+class SegmentedMatrix:
+    """
+    Matrice TF-IDF d'un instantané segmenté, sans copie de la base
+
+    La base et chaque segment restent des matrices CSR distinctes (mappées) ;
+    les lignes supprimées (offres fermées ou republiées) sont écartées au
+    scoring. Expose le sous-ensemble de l'API CSR utilisé par les moteurs :
+    ``shape``, ``dtype``, ``nnz``, ``matrice[lignes]``, ``matrice @ profils``
+    et ``tocsr()`` (copie complète, pour construire un index ou compacter).
+
+    Attributes:
+        parts (list): Matrice CSR de la base puis de chaque segment
+        dead (list): Lignes supprimées de chaque partie (positions locales triées)
+        starts (np.ndarray): Première position globale de chaque partie
+    """
+
+    def __init__(self, parts, dead):
+        self.parts = parts
+        self.dead = [np.asarray(part_dead, dtype=np.int64) for part_dead in dead]
+        self.starts = _live_starts([part.shape[0] for part in parts], self.dead)
+        self.shape = (int(self.starts[-1]), parts[0].shape[1])
+        self.dtype = parts[0].dtype
+
+    @property
+    def nnz(self):
+        return int(sum(part.nnz - np.diff(part.indptr)[part_dead].sum()
+                       for part, part_dead in zip(self.parts, self.dead)))
+
+    def __getitem__(self, rows):
+        """Lignes demandées (positions globales), recopiées en une matrice CSR."""
+        if isinstance(rows, slice):
+            rows = np.arange(*rows.indices(self.shape[0]))
+        rows = np.atleast_1d(np.asarray(rows, dtype=np.int64))
+        owners = np.searchsorted(self.starts, rows, side='right') - 1
+        order = np.argsort(owners, kind='stable')
+        blocks = [self.parts[0][:0]]
+        for number in np.unique(owners):
+            local = live_to_local(rows[owners == number] - self.starts[number], self.dead[number])
+            blocks.append(self.parts[number][local])
+        matrix = sp.vstack(blocks, format='csr')
+        if np.any(np.diff(order) < 0):
+            matrix = matrix[np.argsort(order)]
+        return matrix
+
+    def __matmul__(self, other):
+        """Produit avec des profils denses (une ligne de résultat par ligne vivante)."""
+        return np.concatenate([
+            np.delete(np.asarray(part @ other), part_dead, axis=0)
+            for part, part_dead in zip(self.parts, self.dead)
+        ])
+
+    def tocsr(self):
+        """Copie CSR des lignes vivantes (construction d'index, compaction)."""
+        return sp.vstack([
+            part[np.delete(np.arange(part.shape[0]), part_dead)] if len(part_dead) else part
+            for part, part_dead in zip(self.parts, self.dead)
+        ], format='csr')
+
+    def search(self, profile_vector, k, rows=None):
+        """
+        Recherche exacte : top-k de chaque partie, puis fusion
+
+        Args:
+            profile_vector: Vecteur TF-IDF (1 x n_features) du profil
+            k (int): Nombre de résultats voulus
+            rows (np.ndarray): Positions candidates triées (None = tout)
+
+        Returns:
+            tuple: (positions, scores) des k meilleurs emplois, triés
+        """
+
+        if rows is not None:
+            rows = np.asarray(rows, dtype=np.int64)
+            cuts = np.searchsorted(rows, self.starts)
+        results = []
+        for number, (part, part_dead) in enumerate(zip(self.parts, self.dead)):
+            start = self.starts[number]
+            part_rows = None
+            if rows is not None:
+                part_rows = rows[cuts[number]:cuts[number + 1]] - start
+                if len(part_rows) == 0:
+                    continue
+            found, scores = search_live(profile_vector, part, k, part_rows, part_dead)
+            results.append((found + start, scores))
+        return merge_top_k(results, k)
+
+
+def _open_jobs(directory, n_rows, schema, mmap_mode):
+    """Ouvre les colonnes des emplois décrites par ``schema``."""
+    data = {}
+    dtypes = {}
+    for column, spec in schema.items():
+        base = os.path.join(directory, column)
+        if spec['kind'] == 'numeric':
+            data[column] = _open_array(f"{base}.npy", mmap_mode)
+            dtypes[column] = spec['dtype']
+        elif spec['kind'] == 'category':
+            with open(f"{base}.categories.json", encoding='utf-8') as f:
+                categories = json.load(f)
+            data[column] = CategoryColumn(_open_array(f"{base}.codes.npy", mmap_mode), categories)
+        else:
+            data[column] = TextColumn(
+                _open_array(f"{base}.offsets.npy", mmap_mode),
+                _open_blob(f"{base}.bin", mmap_mode),
+                _open_array(f"{base}.nulls.npy", mmap_mode),
+                kind=spec['kind'],
+                compression=spec.get('compression')
+            )
+    return JobTable(n_rows, data, dtypes)
+
+
+# ============================================================================
+# VECTORIZER
+# ============================================================================
+
+def vectorizer_params(vectorizer):
+    """Paramètres JSON du vectorizer (refuse les callables personnalisés)."""
+    params = vectorizer.get_params()
+    for name in ('preprocessor', 'tokenizer', 'vocabulary'):
+        if params.get(name) is not None:
+            raise ValueError(f"Paramètre '{name}' non exportable sans pickle")
+    if callable(params.get('analyzer')):
+        raise ValueError("Paramètre 'analyzer' non exportable sans pickle")
+
+    exported = {name: params[name] for name in VECTORIZER_PARAMS if name in params}
+    if isinstance(exported.get('ngram_range'), tuple):
+        exported['ngram_range'] = list(exported['ngram_range'])
+    if isinstance(exported.get('stop_words'), (set, frozenset)):
+        exported['stop_words'] = sorted(exported['stop_words'])
+    exported['dtype'] = np.dtype(params.get('dtype', np.float64)).name
+    return exported
+
+
+def build_vectorizer(params, vocabulary, idf):
+    """Reconstruit un TfidfVectorizer entraîné à partir du sidecar."""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    params = dict(params)
+    params['ngram_range'] = tuple(params['ngram_range'])
+    params['dtype'] = np.dtype(params['dtype']).type
+    vectorizer = TfidfVectorizer(**params)
+    vectorizer.vocabulary_ = {term: position for position, term in enumerate(vocabulary)}
+    if params.get('use_idf', True):
+        vectorizer.idf_ = np.asarray(idf, dtype=np.float64)
+    return vectorizer
+
+
+# ============================================================================
+# SAUVEGARDE / CHARGEMENT
+# ============================================================================
+
+def _json_default(value):
+    if hasattr(value, 'item'):
+        return value.item()
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    raise TypeError(f"Valeur non sérialisable: {value!r}")
+
+
+class _RawArray:
+    """Tableau 1-D écrit bloc par bloc dans un fichier brut, puis converti en .npy."""
+
+    # Éléments copiés par bloc lors de la conversion (mémoire bornée)
+    COPY_BLOCK = 1 << 22
+
+    def __init__(self, path, dtype):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.size = 0
+        self._file = open(f"{path}.raw", 'wb')
+
+    def append(self, values):
+        values = np.ascontiguousarray(values, dtype=self.dtype)
+        self._file.write(values.tobytes())
+        self.size += len(values)
+
+    def convert(self, dtype, name):
+        """Convertit les éléments déjà écrits en ``dtype`` (copie par blocs, sans perte)."""
+        self._file.close()
+        raw_path = f"{self.path}.raw"
+        dtype = np.dtype(dtype)
+        with open(f"{raw_path}.tmp", 'wb') as f:
+            if self.size:
+                source = np.memmap(raw_path, dtype=self.dtype, mode='r', shape=(self.size,))
+                for start in range(0, self.size, self.COPY_BLOCK):
+                    f.write(_exact_cast(source[start:start + self.COPY_BLOCK], dtype, name).tobytes())
+                del source
+        os.replace(f"{raw_path}.tmp", raw_path)
+        self.dtype = dtype
+        self._file = open(raw_path, 'ab')
+
+    def finish(self, dtype=None):
+        """Écrit ``<path>.npy`` (converti en ``dtype`` si donné) et supprime le brut."""
+        self._file.close()
+        raw_path = f"{self.path}.raw"
+        dtype = np.dtype(dtype or self.dtype)
+        target = np.lib.format.open_memmap(f"{self.path}.npy", mode='w+', dtype=dtype, shape=(self.size,))
+        if self.size:
+            source = np.memmap(raw_path, dtype=self.dtype, mode='r', shape=(self.size,))
+            for start in range(0, self.size, self.COPY_BLOCK):
+                target[start:start + self.COPY_BLOCK] = source[start:start + self.COPY_BLOCK]
+            del source
+        target.flush()
+        del target
+        os.remove(raw_path)
+
+
+def _typed_series(column, series):
+    """Colonne numérique attendue : valeurs non numériques converties en NaN."""
+    if column in NUMERIC_COLUMNS and not pd.api.types.is_numeric_dtype(series):
+        return pd.to_numeric(series, errors='coerce')
+    return series
+
+
+def _column_spec(column, series, compression=TEXT_COMPRESSION):
+    """Encodage d'une colonne : 'numeric', 'category', 'text' ou 'json'."""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        # Dates stockées en int64, relues avec leur dtype d'origine
+        return {'kind': 'numeric', 'dtype': str(series.to_numpy().dtype)}
+    if pd.api.types.is_numeric_dtype(series) and not isinstance(series.dtype, pd.CategoricalDtype):
+        return {'kind': 'numeric', 'dtype': str(series.dtype)}
+    if not series.dropna().map(lambda value: isinstance(value, str)).all():
+        return {'kind': 'json', 'dtype': str(series.dtype)}
+    if column in CATEGORY_COLUMNS:
+        return {'kind': 'category', 'dtype': str(series.dtype)}
+    spec = {'kind': 'text', 'dtype': str(series.dtype)}
+    if compression and column in COMPRESSED_COLUMNS:
+        spec['compression'] = compression
+    return spec
+
+
+def _offset_dtype(blob_size):
+    """Offsets 32 bits tant que le blob le permet."""
+    return np.int32 if blob_size <= np.iinfo(np.int32).max else np.int64
+
+
+def _fits_float32(values):
+    """Indique si des float64 sont représentables en float32 sans perte."""
+    return values.dtype == np.float64 and np.array_equal(values.astype(np.float32), values, equal_nan=True)
+
+
+def _exact_cast(values, dtype, column):
+    """Convertit des valeurs numériques en ``dtype`` ; ValueError si la conversion perd de l'information."""
+    cast = values.astype(dtype)
+    if cast.dtype != values.dtype and not np.array_equal(
+        cast.astype(values.dtype), values, equal_nan=values.dtype.kind == 'f'
+    ):
+        raise ValueError(f"Colonne '{column}' : valeurs non représentables en {np.dtype(dtype).name}")
+    return cast
+
+
+def _compact_numeric(values):
+    """float64 stockés en float32 quand la conversion est sans perte."""
+    return values.astype(np.float32) if _fits_float32(values) else values
+
+
+class _ColumnWriter:
+    """Colonne des emplois écrite bloc par bloc (numérique, catégorielle, texte/JSON)."""
+
+    def __init__(self, directory, column, series, compression=TEXT_COMPRESSION):
+        self.base = os.path.join(directory, column)
+        self.column = column
+        self.spec = _column_spec(column, _typed_series(column, series), compression)
+        self.kind = self.spec['kind']
+        if self.kind == 'numeric':
+            dtype = np.int64 if self.spec['dtype'].startswith('datetime64') else np.dtype(self.spec['dtype'])
+            self.values = _RawArray(self.base, dtype)
+            # float32 tant que tous les blocs le permettent sans perte
+            self.as_float32 = True
+        elif self.kind == 'category':
+            self.mapping = {}
+            self.codes = _RawArray(f"{self.base}.codes", np.int32)
+        else:
+            self.offsets = _RawArray(f"{self.base}.offsets", np.int64)
+            self.offsets.append([0])
+            self.nulls = _RawArray(f"{self.base}.nulls", np.int32)
+            self.blob = open(f"{self.base}.bin", 'wb')
+            self.blob_size = 0
+        self.n_rows = 0
+
+    def append(self, series):
+        series = _typed_series(self.column, series)
+        if self.kind == 'numeric':
+            values = series.to_numpy()
+            if values.dtype.kind == 'M':
+                values = values.astype(self.spec['dtype']).view(np.int64)
+            else:
+                self._widen(values.dtype)
+                self.as_float32 = self.as_float32 and _fits_float32(values.astype(np.float64))
+            self.values.append(_exact_cast(values, self.values.dtype, self.column))
+        else:
+            if self.kind in ('text', 'category'):
+                values = series.dropna()
+                if not values.map(lambda value: isinstance(value, str)).all():
+                    raise ValueError(f"Colonne '{series.name}' : valeurs non textuelles dans un bloc")
+            if self.kind == 'category':
+                self.codes.append(CategoryColumn.encode(series, self.mapping))
+            else:
+                offsets, blob, nulls = TextColumn.encode(series, self.kind, self.spec.get('compression'))
+                self.offsets.append(offsets[1:] + self.blob_size)
+                self.nulls.append(nulls.astype(np.int64) + self.n_rows)
+                self.blob.write(blob)
+                self.blob_size += len(blob)
+        self.n_rows += len(series)
+
+    def _widen(self, block_dtype):
+        """
+        Élargit une colonne numérique au type d'un nouveau bloc
+
+        Le type vient du premier bloc : un bloc suivant plus large (ex. NaN
+        dans une colonne entière, qui devient float64) convertit les valeurs
+        déjà écrites au lieu d'être tronqué.
+        """
+        dtype = np.result_type(self.values.dtype, block_dtype)
+        if dtype.kind not in 'biuf':
+            raise ValueError(f"Colonne '{self.column}' : valeurs non numériques dans un bloc")
+        if dtype != self.values.dtype:
+            self.values.convert(dtype, self.column)
+            self.spec['dtype'] = dtype.name
+
+    def finish(self):
+        """Termine les fichiers et retourne la description du schéma."""
+        if self.kind == 'numeric':
+            float64 = self.values.dtype == np.float64
+            self.values.finish(np.float32 if float64 and self.as_float32 else None)
+        elif self.kind == 'category':
+            self.codes.finish(CategoryColumn.code_dtype(len(self.mapping)))
+            with open(f"{self.base}.categories.json", 'w', encoding='utf-8') as f:
+                json.dump(list(self.mapping), f, ensure_ascii=False)
+        else:
+            self.offsets.finish(_offset_dtype(self.blob_size))
+            self.nulls.finish()
+            self.blob.close()
+        return self.spec
+
+
+class ModelWriter:
+    """
+    Écriture d'un modèle par blocs de lignes, en mémoire bornée
+
+    Chaque bloc (lignes TF-IDF + emplois correspondants) est ajouté aux
+    fichiers du modèle ; seules les colonnes utilisées par l'index des
+    filtres et le cube des statistiques restent en mémoire jusqu'à ``close``. Le format produit est
+    exactement celui de ``save_model``.
+
+    Args:
+        model_dir (str): Dossier du modèle (créé si besoin)
+        vectorizer: TfidfVectorizer entraîné (vocabulaire et idf figés)
+        compression (str): Compression des longs textes (None = aucune)
+        matrix_precision (str): Poids de la matrice : 'float64', 'float32'
+            ou 'uint8' (quantifiés, échelle par ligne)
+        top_terms (int): Termes gardés par offre, lignes renormalisées
+            (None = tous)
+    """
+
+    def __init__(self, model_dir, vectorizer, compression=TEXT_COMPRESSION,
+                 matrix_precision=DEFAULT_PRECISION, top_terms=None):
+        self.model_dir = model_dir
+        self.vectorizer = vectorizer
+        self.compression = compression
+        self.matrix_precision = matrix_precision
+        self.top_terms = top_terms
+        data_dtype(matrix_precision)
+        self.n_rows = 0
+        self.n_features = len(vectorizer.vocabulary_)
+
+        os.makedirs(model_dir, exist_ok=True)
+
+        # Vectorizer : vocabulaire ordonné + idf
+        vectorizer_dir = os.path.join(model_dir, "vectorizer")
+        os.makedirs(vectorizer_dir, exist_ok=True)
+        vocabulary = [None] * len(vectorizer.vocabulary_)
+        for term, position in vectorizer.vocabulary_.items():
+            vocabulary[position] = term
+        with open(os.path.join(vectorizer_dir, "vocabulary.json"), 'w', encoding='utf-8') as f:
+            json.dump(vocabulary, f, ensure_ascii=False)
+        if getattr(vectorizer, 'use_idf', True):
+            np.save(os.path.join(vectorizer_dir, "idf.npy"), np.asarray(vectorizer.idf_, dtype=np.float64))
+        stop_words = vectorizer.get_stop_words()
+        if stop_words is not None:
+            with open(os.path.join(vectorizer_dir, "stop_words.json"), 'w', encoding='utf-8') as f:
+                json.dump(sorted(stop_words), f, ensure_ascii=False)
+
+        # Matrice CSR brute, ajoutée ligne à ligne
+        matrix_dir = os.path.join(model_dir, "matrix")
+        os.makedirs(matrix_dir, exist_ok=True)
+        self._data = _RawArray(os.path.join(matrix_dir, "data"), data_dtype(matrix_precision))
+        self._indices = _RawArray(os.path.join(matrix_dir, "indices"), np.int64)
+        self._indptr = _RawArray(os.path.join(matrix_dir, "indptr"), np.int64)
+        self._indptr.append([0])
+        self._scales = (_RawArray(os.path.join(matrix_dir, "row_scales"), np.float32)
+                        if matrix_precision == 'uint8' else None)
+
+        self._jobs_dir = os.path.join(model_dir, "jobs")
+        os.makedirs(self._jobs_dir, exist_ok=True)
+        self._columns = None
+        self._filter_blocks = []
+
+    def append(self, tfidf_block, jobs_block):
+        """
+        Ajoute un bloc de lignes
+
+        Args:
+            tfidf_block: Lignes TF-IDF du bloc
+            jobs_block (pd.DataFrame): Emplois correspondants (même ordre)
+        """
+
+        if tfidf_block.shape[0] != len(jobs_block):
+            raise ValueError("La matrice TF-IDF et jobs_df n'ont pas le même nombre de lignes")
+
+        block = sp.csr_matrix(tfidf_block)
+        block.sort_indices()
+        if self.top_terms:
+            block = prune_rows(block, self.top_terms, getattr(self.vectorizer, 'norm', 'l2'))
+        if self._scales is not None:
+            codes, scales = quantize_rows(block)
+            self._data.append(codes)
+            self._scales.append(scales)
+        else:
+            self._data.append(block.data)
+        self._indices.append(block.indices)
+        self._indptr.append(block.indptr[1:].astype(np.int64) + self._indices.size - block.nnz)
+
+        jobs_block = jobs_block.reset_index(drop=True)
+        if self._columns is None:
+            self._columns = {
+                column: _ColumnWriter(self._jobs_dir, column, jobs_block[column], self.compression)
+                for column in jobs_block.columns
+            }
+        for column, writer in self._columns.items():
+            writer.append(jobs_block[column])
+
+        filter_columns = [
+            column for column in (*FilterIndex.CATEGORICAL_COLUMNS, 'med_salary', 'remote_allowed')
+            if column in jobs_block.columns
+        ]
+        self._filter_blocks.append(jobs_block[filter_columns].copy())
+        self.n_rows += len(jobs_block)
+
+    def close(self, metadata):
+        """
+        Termine les fichiers, construit l'index des filtres et le cube des
+        statistiques, puis écrit le manifeste
+
+        Le manifeste est écrit en dernier (remplacement atomique).
+
+        Args:
+            metadata (dict): Métadonnées du modèle
+        """
+
+        # Index 32 bits tant que le nombre de valeurs non nulles le permet
+        # (16 bits pour les colonnes d'une matrice quantifiée)
+        nnz = self._indices.size
+        self._data.finish()
+        self._indices.finish(index_dtype(self.matrix_precision, self.n_features, nnz))
+        self._indptr.finish(index_dtype(DEFAULT_PRECISION, self.n_features, nnz))
+        if self._scales is not None:
+            self._scales.finish()
+
+        schema = {column: writer.finish() for column, writer in (self._columns or {}).items()}
+
+        filter_frame = (pd.concat(self._filter_blocks, ignore_index=True)
+                        if self._filter_blocks else pd.DataFrame())
+        FilterIndex.from_dataframe(filter_frame).save(os.path.join(self.model_dir, "filters"))
+        MarketCube.from_dataframe(filter_frame).save(os.path.join(self.model_dir, STATS_DIR))
+
+        manifest = {
+            'format': FORMAT_NAME,
+            'format_version': FORMAT_VERSION,
+            'n_jobs': int(self.n_rows),
+            'matrix_shape': [int(self.n_rows), int(self.n_features)],
+            'vectorizer': vectorizer_params(self.vectorizer),
+            'matrix': {'precision': self.matrix_precision, 'top_terms': self.top_terms},
+            'jobs_schema': schema,
+            'metadata': metadata,
+        }
+        write_manifest(self.model_dir, manifest)
+
+
+def save_model(model_dir, vectorizer, tfidf_matrix, jobs_df, metadata, compression=TEXT_COMPRESSION,
+               matrix_precision=DEFAULT_PRECISION, top_terms=None):
+    """
+    Sauvegarde un modèle au format mappé en mémoire
+
+    Le manifeste est écrit en dernier (remplacement atomique) : un dossier
+    sans manifeste, ou avec l'ancien manifeste, n'est jamais à moitié lu.
+
+    Args:
+        model_dir (str): Dossier du modèle (créé si besoin)
+        vectorizer: TfidfVectorizer entraîné
+        tfidf_matrix: Matrice TF-IDF des emplois
+        jobs_df (pd.DataFrame): Données des emplois (une ligne par ligne TF-IDF)
+        metadata (dict): Métadonnées du modèle
+        compression (str): Compression des longs textes (None = aucune)
+        matrix_precision (str): Poids de la matrice (voir matrix_compression.py)
+        top_terms (int): Termes gardés par offre (None = tous)
+    """
+
+    if tfidf_matrix.shape[0] != len(jobs_df):
+        raise ValueError("La matrice TF-IDF et jobs_df n'ont pas le même nombre de lignes")
+
+    writer = ModelWriter(model_dir, vectorizer, compression, matrix_precision, top_terms)
+    writer.append(tfidf_matrix, jobs_df)
+    writer.close(metadata)
+
+
+def write_manifest(model_dir, manifest):
+    """Écrit le manifeste par remplacement atomique (jamais à moitié lu)."""
+    manifest_path = os.path.join(model_dir, MANIFEST_FILE)
+    with open(manifest_path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, default=_json_default)
+    os.replace(manifest_path + ".tmp", manifest_path)
+
+
+def read_manifest(model_dir):
+    """Lit et valide le manifeste d'un dossier de modèle."""
+    with open(os.path.join(model_dir, MANIFEST_FILE), encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('format') != FORMAT_NAME:
+        raise ValueError(f"Format de modèle inconnu: {manifest.get('format')!r}")
+    if manifest.get('format_version', 0) > FORMAT_VERSION:
+        raise ValueError(
+            f"Version de format {manifest['format_version']} non supportée "
+            f"(maximum {FORMAT_VERSION})"
+        )
+    return manifest
+
+
+def has_manifest(model_dir):
+    """Indique si le dossier contient un modèle au format mappé en mémoire."""
+    return os.path.exists(os.path.join(model_dir, MANIFEST_FILE))
+
+
+def model_snapshot(model_dir):
+    """
+    Numéro de l'instantané servi (0 = modèle jamais mis à jour)
+
+    Les index dérivés (ANN, index inversé) enregistrent ce numéro : construits
+    sur un autre instantané, leurs positions ne correspondent plus.
+    """
+    if not has_manifest(model_dir):
+        return 0
+    return read_manifest(model_dir).get('snapshot', 0)
+
+
+def matrix_options(manifest):
+    """
+    Réglages de compression de la matrice d'un modèle, à reprendre pour ses
+    segments et ses compactions (arguments de ``ModelWriter``)
+    """
+    matrix_format = manifest.get('matrix', {})
+    return {
+        'matrix_precision': matrix_format.get('precision', DEFAULT_PRECISION),
+        'top_terms': matrix_format.get('top_terms'),
+    }
+
+
+def _read_vectorizer(directory):
+    """Vocabulaire et idf exportés d'un dossier de modèle."""
+    vectorizer_dir = os.path.join(directory, "vectorizer")
+    with open(os.path.join(vectorizer_dir, "vocabulary.json"), encoding='utf-8') as f:
+        vocabulary = json.load(f)
+    idf_path = os.path.join(vectorizer_dir, "idf.npy")
+    idf = np.load(idf_path) if os.path.exists(idf_path) else None
+    return vocabulary, idf
+
+
+def load_vectorizer(directory, manifest):
+    """Vectorizer entraîné d'un dossier de modèle (vocabulaire + idf)."""
+    vocabulary, idf = _read_vectorizer(directory)
+    return build_vectorizer(manifest['vectorizer'], vocabulary, idf)
+
+
+def load_query_encoder(directory, manifest):
+    """
+    Encodeur léger des profils d'un dossier de modèle (sans scikit-learn)
+
+    Les modèles antérieurs à ``stop_words.json`` relisent la liste 'english'
+    de scikit-learn. Les réglages que ``QueryEncoder`` ne reproduit pas
+    gardent le TfidfVectorizer.
+
+    Returns:
+        QueryEncoder | TfidfVectorizer: Objet exposant ``transform``
+    """
+
+    params = manifest['vectorizer']
+    if not QueryEncoder.supports(params):
+        return load_vectorizer(directory, manifest)
+
+    vocabulary, idf = _read_vectorizer(directory)
+    stop_words = params.get('stop_words')
+    stop_words_path = os.path.join(directory, "vectorizer", "stop_words.json")
+    if os.path.exists(stop_words_path):
+        with open(stop_words_path, encoding='utf-8') as f:
+            stop_words = json.load(f)
+    elif stop_words == 'english':
+        from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+        stop_words = ENGLISH_STOP_WORDS
+    return QueryEncoder.from_params(params, vocabulary, idf, stop_words)
+
+
+def _open_parts(directory, manifest, mmap_mode):
+    """Ouvre matrice, emplois et index des filtres d'un dossier."""
+    matrix_dir = os.path.join(directory, "matrix")
+    data, indices, indptr = (_open_array(os.path.join(matrix_dir, f"{name}.npy"), mmap_mode)
+                             for name in ('data', 'indices', 'indptr'))
+    if matrix_options(manifest)['matrix_precision'] == 'uint8':
+        # Poids quantifiés : décodés en float32, indices élargis à 32 bits
+        # (seuls types sur lesquels SciPy calcule sans recopie par requête)
+        scales = _open_array(os.path.join(matrix_dir, "row_scales.npy"), mmap_mode)
+        data = dequantize(data, scales, indptr)
+        indices = np.asarray(indices, dtype=np.int32)
+    tfidf_matrix = sp.csr_matrix((data, indices, indptr), shape=tuple(manifest['matrix_shape']), copy=False)
+
+    jobs = _open_jobs(os.path.join(directory, "jobs"), manifest['n_jobs'],
+                      manifest['jobs_schema'], mmap_mode)
+    filter_index = FilterIndex.load(os.path.join(directory, "filters"), mmap_mode)
+    return tfidf_matrix, jobs, filter_index
+
+
+def _dead_rows(job_ids, later_tombstones):
+    """Positions des lignes dont le job_id est fermé par un segment plus récent."""
+    if job_ids is None or not later_tombstones:
+        return np.empty(0, dtype=np.int64)
+    return np.flatnonzero(np.isin(job_ids, np.concatenate(later_tombstones)))
+
+
+def _load_snapshot(model_dir, manifest, mmap_mode, encoder=False):
+    """Charge la base et les segments delta listés par le manifeste."""
+    base_dir = os.path.join(model_dir, manifest.get('base', '.'))
+    tfidf_matrix, jobs, filter_index = _open_parts(base_dir, manifest, mmap_mode)
+    # Les segments partagent le vocabulaire et l'idf de la base
+    vectorizer = (load_query_encoder if encoder else load_vectorizer)(base_dir, manifest)
+    metadata = manifest['metadata']
+    if 'snapshot' in manifest:
+        metadata = dict(metadata, snapshot=manifest['snapshot'], updated_at=manifest.get('updated_at'))
+    if not manifest.get('segments'):
+        return vectorizer, tfidf_matrix, jobs, metadata, filter_index
+
+    matrices, tables, indexes, tombstones = [tfidf_matrix], [jobs], [filter_index], []
+    for segment in manifest['segments']:
+        segment_dir = os.path.join(model_dir, segment)
+        segment_matrix, segment_jobs, segment_index = _open_parts(segment_dir, read_manifest(segment_dir),
+                                                                  mmap_mode)
+        matrices.append(segment_matrix)
+        tables.append(segment_jobs)
+        indexes.append(segment_index)
+        tombstones.append(np.load(os.path.join(segment_dir, TOMBSTONES_FILE)))
+
+    # Une ligne est supprimée si un segment plus récent ferme ou remplace
+    # son job_id ; base et segments restent mappés tels quels, les lignes
+    # supprimées sont écartées au filtrage et au scoring
+    dead = []
+    for position, table in enumerate(tables):
+        job_ids = table['job_id'].to_numpy() if 'job_id' in table.columns else None
+        dead.append(_dead_rows(job_ids, tombstones[position:]))
+
+    tfidf_matrix = SegmentedMatrix(matrices, dead)
+    jobs = SegmentedJobTable(tables, dead)
+    filter_index = SegmentedFilterIndex(indexes, dead)
+
+    metadata = dict(metadata, n_jobs=len(jobs))
+    return vectorizer, tfidf_matrix, jobs, metadata, filter_index
+
+
+def load_model(model_dir, mmap_mode='r', encoder=False):
+    """
+    Charge un modèle sauvegardé par ``save_model``
+
+    Si le modèle a reçu des mises à jour incrémentales, la base et les
+    segments delta de l'instantané courant sont combinés.
+
+    Args:
+        model_dir (str): Dossier du modèle
+        mmap_mode (str): Mode de mapping mémoire (None = tout copier en RAM)
+        encoder (bool): Remplacer le TfidfVectorizer par un ``QueryEncoder``
+            (service : pas d'import de scikit-learn)
+
+    Returns:
+        tuple: (vectorizer, tfidf_matrix, jobs, metadata, filter_index)
+            - jobs est une JobTable paresseuse (colonnes texte non décodées)
+    """
+
+    # Une compaction peut supprimer les fichiers de l'instantané précédent
+    # entre la lecture du manifeste et l'ouverture des fichiers : relire
+    for attempt in range(3):
+        manifest = read_manifest(model_dir)
+        try:
+            return _load_snapshot(model_dir, manifest, mmap_mode, encoder)
+        except FileNotFoundError:
+            if attempt == 2:
+                raise
+
+
+def load_market_cube(model_dir, jobs=None, mmap_mode='r'):
+    """
+    Cube des statistiques de l'instantané servi par un dossier de modèle
+
+    Le cube enregistré avec la base est utilisé tant que l'instantané n'a pas
+    de segments delta ; sinon (mise à jour incrémentale, ancien modèle sans
+    cube) il est reconstruit à partir des emplois chargés ``jobs``.
+
+    Args:
+        model_dir (str): Dossier du modèle
+        jobs: Emplois de l'instantané (DataFrame, JobTable ou SegmentedJobTable)
+        mmap_mode (str): Mode de mapping mémoire des tableaux (None = copie)
+
+    Returns:
+        MarketCube | None: Cube, ou None s'il n'existe pas et que ``jobs``
+        n'est pas fourni
+    """
+
+    if has_manifest(model_dir):
+        manifest = read_manifest(model_dir)
+        directory = os.path.join(model_dir, manifest.get('base', '.'), STATS_DIR)
+        if not manifest.get('segments') and os.path.exists(os.path.join(directory, STATS_FILE)):
+            return MarketCube.load(directory, mmap_mode)
+    if jobs is None:
+        return None
+    return MarketCube.from_jobs(jobs)
+
+
+def load_legacy_model(model_dir):
+    """
+    Charge un ancien modèle composé de quatre fichiers pickle
+
+    Returns:
+        tuple: (vectorizer, tfidf_matrix, jobs_df, metadata)
+    """
+
+    loaded = []
+    for name in LEGACY_FILES:
+        with open(os.path.join(model_dir, name), 'rb') as f:
+            loaded.append(pickle.load(f))
+    vectorizer, tfidf_matrix, jobs_df, metadata = loaded
+    return vectorizer, tfidf_matrix, jobs_df, metadata
+
+
+def convert_legacy_model(model_dir):
+    """Convertit les fichiers .pkl d'un dossier vers le format mappé en mémoire."""
+    vectorizer, tfidf_matrix, jobs_df, metadata = load_legacy_model(model_dir)
+    save_model(model_dir, vectorizer, tfidf_matrix, jobs_df, metadata)
+    return metadata
+
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else "model"
+    converted = convert_legacy_model(target)
+    print(f"✅ Modèle converti ({converted['n_jobs']:,} emplois) : {target}/{MANIFEST_FILE}")
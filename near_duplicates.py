@@ -0,0 +1,341 @@
+"""
+🪞 JOB INTELLIGENT - Détection des offres quasi dupliquées (MinHash + LSH)
+
+Les offres republiées gardent une description presque identique : le
+``drop_duplicates()`` du notebook ne les voit pas, l'index TF-IDF les score
+toutes et le top-10 montre plusieurs fois le même poste. Étape de la
+construction du modèle (``prepare_model.py``, compaction et segments de
+``update_model.py``) :
+
+    1. Chaque offre (titre + description) est découpée en shingles de
+       ``SHINGLE_SIZE`` mots, résumés par une signature MinHash de
+       ``NUM_PERMUTATIONS`` valeurs (similarité de Jaccard estimée par la
+       fraction de valeurs égales)
+    2. LSH : la signature est coupée en ``BANDS`` bandes ; deux offres qui
+       partagent une bande (et les mêmes colonnes des filtres) sont candidates,
+       puis gardées si leur similarité estimée atteint le seuil
+    3. Les paires retenues forment des groupes (composantes connexes) ; seul
+       le représentant de chaque groupe (première offre lue) est écrit dans
+       le modèle, avec le nombre et les job_id des offres masquées
+
+Les colonnes des filtres (``KEY_COLUMNS``) font partie de la clé LSH : les
+offres d'un groupe passent exactement les mêmes filtres que leur
+représentant, les résultats filtrés sont inchangés. L'identifiant d'un
+groupe est le job_id de son représentant ; le classement ne montre donc
+qu'une offre par groupe.
+"""
+
+import os
+import re
+import tempfile
+import zlib
+
+import numpy as np
+import pandas as pd
+
+
+SHINGLE_SIZE = 3
+NUM_PERMUTATIONS = 64
+BANDS = 16
+SIMILARITY_THRESHOLD = 0.8
+
+# Colonnes identiques exigées dans un groupe (sémantique des filtres)
+KEY_COLUMNS = (
+    'company_name', 'location', 'state', 'city', 'formatted_experience_level',
+    'formatted_work_type', 'remote_allowed', 'med_salary'
+)
+
+# Colonnes ajoutées aux emplois des représentants
+DUPLICATES_COLUMN = 'duplicates'
+DUPLICATE_IDS_COLUMN = 'duplicate_ids'
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# Multiplicateur des hachages polynomiaux (shingles, bandes)
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+_NO_SHINGLE = np.iinfo(np.uint32).max
+
+
+class MinHasher:
+    """
+    Signatures MinHash des textes (hachages multiplicatifs 64 bits)
+
+    Attributes:
+        num_permutations (int): Longueur des signatures
+        shingle_size (int): Nombre de mots par shingle
+    """
+
+    def __init__(self, num_permutations=NUM_PERMUTATIONS, shingle_size=SHINGLE_SIZE, seed=0):
+        rng = np.random.default_rng(seed)
+        self.num_permutations = num_permutations
+        self.shingle_size = shingle_size
+        # Multiplicateurs impairs : x -> (a * x + b) mod 2^64, 32 bits de poids fort
+        self.multipliers = rng.integers(0, 2 ** 64 - 1, size=num_permutations, dtype=np.uint64) | np.uint64(1)
+        self.offsets = rng.integers(0, 2 ** 64 - 1, size=num_permutations, dtype=np.uint64)
+
+    def _shingles(self, texts):
+        """Hachages des shingles de tous les textes, et leur nombre par texte."""
+        token_lists = [TOKEN_PATTERN.findall(str(text).lower()) for text in texts]
+        lengths = np.fromiter((len(tokens) for tokens in token_lists), dtype=np.int64, count=len(token_lists))
+        tokens = np.fromiter(
+            (zlib.crc32(token.encode('utf-8')) for token_list in token_lists for token in token_list),
+            dtype=np.uint64, count=int(lengths.sum())
+        )
+
+        counts = np.maximum(lengths - self.shingle_size + 1, 0)
+        token_starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        shingle_offsets = np.concatenate([[0], np.cumsum(counts)])
+        starts = (np.repeat(token_starts, counts)
+                  + np.arange(shingle_offsets[-1]) - np.repeat(shingle_offsets[:-1], counts))
+
+        with np.errstate(over='ignore'):
+            shingles = tokens[starts]
+            for shift in range(1, self.shingle_size):
+                shingles = shingles * _MIX + tokens[starts + shift]
+        return shingles, counts
+
+    def signatures(self, texts):
+        """
+        Signatures MinHash d'une liste de textes
+
+        Returns:
+            np.ndarray: (n_textes x num_permutations) uint32 ; les textes trop
+            courts pour un shingle ont une signature pleine de ``_NO_SHINGLE``
+        """
+
+        shingles, counts = self._shingles(texts)
+        signatures = np.full((len(counts), self.num_permutations), _NO_SHINGLE, dtype=np.uint32)
+        present = np.flatnonzero(counts > 0)
+        if len(present) == 0:
+            return signatures
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[present]
+        with np.errstate(over='ignore'):
+            for permutation in range(self.num_permutations):
+                hashed = (shingles * self.multipliers[permutation] + self.offsets[permutation]) >> np.uint64(32)
+                signatures[present, permutation] = np.minimum.reduceat(hashed, starts)
+        return signatures
+
+
+def _key_hashes(jobs):
+    """Hachage des colonnes des filtres de chaque offre (0 si aucune)."""
+    columns = [column for column in KEY_COLUMNS if column in jobs.columns]
+    if not columns:
+        return np.zeros(len(jobs), dtype=np.uint64)
+    frame = pd.DataFrame({column: jobs[column].astype(str).to_numpy() for column in columns})
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy(dtype=np.uint64)
+
+
+def _connected_labels(n_rows, pairs_a, pairs_b):
+    """Plus petite ligne de la composante connexe de chaque ligne."""
+    labels = np.arange(n_rows)
+    if len(pairs_a) == 0:
+        return labels
+    while True:
+        smallest = np.minimum(labels[pairs_a], labels[pairs_b])
+        previous = labels.copy()
+        np.minimum.at(labels, pairs_a, smallest)
+        np.minimum.at(labels, pairs_b, smallest)
+        # Compression des chemins (saut de pointeurs)
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+        if np.array_equal(labels, previous):
+            return labels
+
+
+def cluster_signatures(signatures, keys, threshold=SIMILARITY_THRESHOLD, bands=BANDS):
+    """
+    Groupes d'offres quasi dupliquées (LSH sur les bandes des signatures)
+
+    Dans chaque seau (bande + clé des filtres), chaque offre est comparée à la
+    première du seau ; les paires assez similaires sont réunies.
+
+    Args:
+        signatures (np.ndarray): Signatures MinHash (n x num_permutations)
+        keys (np.ndarray): Hachage des colonnes des filtres (n)
+        threshold (float): Similarité de Jaccard estimée minimale
+        bands (int): Nombre de bandes (divise num_permutations)
+
+    Returns:
+        np.ndarray: Ligne du représentant (plus petite ligne) de chaque offre
+    """
+
+    n_rows, num_permutations = signatures.shape
+    rows_per_band = num_permutations // bands
+    valid = np.flatnonzero(signatures[:, 0] != _NO_SHINGLE) if n_rows else np.empty(0, dtype=np.int64)
+    pairs = []
+    for band in range(bands):
+        block = np.asarray(signatures[valid, band * rows_per_band:(band + 1) * rows_per_band], dtype=np.uint64)
+        bucket = keys[valid].copy()
+        with np.errstate(over='ignore'):
+            for column in range(rows_per_band):
+                bucket = bucket * _MIX + block[:, column]
+        order = np.argsort(bucket, kind='stable')
+        sorted_buckets = bucket[order]
+        first = np.concatenate([[True], sorted_buckets[1:] != sorted_buckets[:-1]])
+        heads = order[np.flatnonzero(first)[np.cumsum(first) - 1]]
+        members = ~first
+        if members.any():
+            pairs.append(np.stack([valid[heads[members]], valid[order[members]]], axis=1))
+    if not pairs:
+        return np.arange(n_rows)
+
+    pairs = np.unique(np.concatenate(pairs), axis=0)
+    similar = np.empty(len(pairs), dtype=bool)
+    step = 1 << 16
+    for start in range(0, len(pairs), step):
+        block = pairs[start:start + step]
+        agreement = (signatures[block[:, 0]] == signatures[block[:, 1]]).mean(axis=1)
+        similar[start:start + step] = agreement >= threshold
+    pairs = pairs[similar]
+    return _connected_labels(n_rows, pairs[:, 0], pairs[:, 1])
+
+
+def _split_ids(value):
+    """job_id d'une cellule ``duplicate_ids`` ("id, id, ...")."""
+    if not isinstance(value, str) or not value.strip():
+        return []
+    return [int(item) for item in value.split(', ') if item]
+
+
+class NearDuplicates:
+    """
+    Groupes d'offres quasi dupliquées d'un flux d'offres (lignes numérotées
+    dans l'ordre de lecture)
+
+    Attributes:
+        labels (np.ndarray): Ligne du représentant de chaque ligne
+        job_ids (np.ndarray): job_id de chaque ligne
+        threshold (float): Seuil de similarité utilisé
+    """
+
+    def __init__(self, labels, job_ids, threshold=SIMILARITY_THRESHOLD, previous_ids=None):
+        self.labels = labels
+        self.job_ids = job_ids
+        self.threshold = threshold
+        # Offres déjà masquées lors d'un passage précédent (compaction)
+        self._previous_ids = previous_ids or {}
+        self._hidden = None
+
+    @property
+    def n_rows(self):
+        return len(self.labels)
+
+    @property
+    def n_removed(self):
+        """Nombre d'offres masquées (hors représentants)."""
+        return int(np.count_nonzero(self.labels != np.arange(self.n_rows)))
+
+    @property
+    def n_hidden(self):
+        """Nombre total d'offres masquées, y compris lors des passages précédents."""
+        return sum(len(ids) for ids in self._hidden_ids().values())
+
+    def representative_rows(self):
+        """Lignes des représentants (écrites dans le modèle), triées."""
+        return np.flatnonzero(self.labels == np.arange(self.n_rows))
+
+    def _hidden_ids(self):
+        """job_id masqués par représentant (frères + offres déjà masquées)."""
+        if self._hidden is None:
+            hidden = {row: list(ids) for row, ids in self._previous_ids.items() if self.labels[row] == row}
+            for row in np.flatnonzero(self.labels != np.arange(self.n_rows)):
+                representative = int(self.labels[row])
+                ids = hidden.setdefault(representative, [])
+                ids.append(int(self.job_ids[row]))
+                ids.extend(self._previous_ids.get(int(row), ()))
+            self._hidden = hidden
+        return self._hidden
+
+    def annotate(self, jobs, rows):
+        """
+        Ajoute aux emplois des représentants le nombre et les job_id des
+        offres masquées de leur groupe
+
+        Args:
+            jobs (pd.DataFrame): Emplois des lignes ``rows`` (représentants)
+            rows (np.ndarray): Lignes correspondantes dans le flux
+
+        Returns:
+            pd.DataFrame: Emplois avec ``duplicates`` et ``duplicate_ids``
+        """
+
+        hidden = self._hidden_ids()
+        ids = [hidden.get(int(row), []) for row in rows]
+        jobs = jobs.reset_index(drop=True).copy()
+        jobs[DUPLICATES_COLUMN] = np.fromiter((len(row_ids) for row_ids in ids), dtype=np.int64, count=len(ids))
+        jobs[DUPLICATE_IDS_COLUMN] = [", ".join(map(str, row_ids)) for row_ids in ids]
+        return jobs
+
+    def filter_chunks(self, chunks):
+        """
+        Ne garde que les représentants d'un flux de paquets ``(texts, jobs)``
+        (même flux, même ordre que celui analysé)
+
+        Yields:
+            tuple: (textes, emplois annotés) des représentants du paquet
+        """
+
+        offset = 0
+        for texts, jobs in chunks:
+            rows = np.arange(offset, offset + len(jobs))
+            offset += len(jobs)
+            keep = self.labels[rows] == rows
+            if not keep.any():
+                continue
+            kept_texts = [text for text, kept in zip(texts, keep) if kept]
+            yield kept_texts, self.annotate(jobs[keep], rows[keep])
+
+
+def find_near_duplicates(frames, threshold=SIMILARITY_THRESHOLD, num_permutations=NUM_PERMUTATIONS,
+                         bands=BANDS, shingle_size=SHINGLE_SIZE):
+    """
+    Analyse un flux de paquets d'emplois et regroupe les quasi-doublons
+
+    Les signatures sont écrites dans un fichier temporaire mappé : seules les
+    clés (une par offre) restent en mémoire.
+
+    Args:
+        frames: Itérable de DataFrames d'emplois (title, description,
+            colonnes des filtres, job_id)
+        threshold (float): Similarité de Jaccard estimée minimale
+        num_permutations (int): Longueur des signatures MinHash
+        bands (int): Nombre de bandes LSH
+        shingle_size (int): Nombre de mots par shingle
+
+    Returns:
+        NearDuplicates: Groupes du flux
+    """
+
+    if num_permutations % bands:
+        raise ValueError("num_permutations doit être un multiple de bands")
+    hasher = MinHasher(num_permutations, shingle_size)
+    keys, job_ids, previous_ids = [], [], {}
+    n_rows = 0
+
+    with tempfile.TemporaryDirectory(prefix="near_duplicates_") as work_dir:
+        path = os.path.join(work_dir, "signatures.bin")
+        with open(path, 'wb') as f:
+            for jobs in frames:
+                texts = (jobs['title'].astype(str) + ' ' + jobs['description'].astype(str)).tolist()
+                f.write(hasher.signatures(texts).tobytes())
+                keys.append(_key_hashes(jobs))
+                job_ids.append(jobs['job_id'].to_numpy(dtype=np.int64))
+                if DUPLICATE_IDS_COLUMN in jobs.columns:
+                    for position, value in enumerate(jobs[DUPLICATE_IDS_COLUMN].tolist()):
+                        ids = _split_ids(value)
+                        if ids:
+                            previous_ids[n_rows + position] = ids
+                n_rows += len(jobs)
+
+        keys = np.concatenate(keys) if keys else np.empty(0, dtype=np.uint64)
+        job_ids = np.concatenate(job_ids) if job_ids else np.empty(0, dtype=np.int64)
+        if n_rows == 0:
+            return NearDuplicates(np.arange(0), job_ids, threshold)
+        signatures = np.memmap(path, dtype=np.uint32, mode='r', shape=(n_rows, num_permutations))
+        labels = cluster_signatures(signatures, keys, threshold, bands)
+        del signatures
+
+    return NearDuplicates(labels, job_ids, threshold, previous_ids)
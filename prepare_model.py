@@ -0,0 +1,437 @@
+"""
+🏗️ JOB INTELLIGENT - Construction du modèle TF-IDF en flux (mémoire bornée)
+
+Version autonome de l'étape d'entraînement du notebook, pour toutes les
+offres du dataset LinkedIn :
+    1. Les compétences et industries (tables 1-N) sont agrégées par job_id
+       AVANT la jointure : une ligne par offre, sans explosion du nombre
+       de lignes
+    2. Passe 0 : les offres quasi dupliquées (republications) sont
+       regroupées par MinHash/LSH ; seul un représentant par groupe est
+       gardé (voir ``near_duplicates.py``)
+    3. Passe 1 : ``job_postings.csv`` est lu par paquets ; les fréquences
+       (documents, termes) de chaque paquet sont écrites triées sur disque,
+       puis fusionnées en flux pour choisir le vocabulaire et calculer l'idf
+       (mêmes règles que ``TfidfVectorizer.fit`` : min_df, max_df,
+       max_features)
+    4. Passe 2 : chaque paquet est vectorisé avec le vocabulaire figé et
+       ajouté directement aux fichiers de ``model/`` (voir
+       ``model_store.ModelWriter``)
+
+La mémoire dépend de la taille des paquets, pas du nombre d'offres (hors
+textes agrégés des compétences/industries et colonnes des filtres).
+
+Usage :
+    python prepare_model.py dataset/ model/ --chunk-size 10000
+"""
+
+import argparse
+import heapq
+import numbers
+import os
+import shutil
+import tempfile
+import time
+from array import array
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+
+from matrix_compression import DEFAULT_PRECISION, PRECISIONS
+from model_store import TEXT_COMPRESSION, ModelWriter, build_vectorizer, vectorizer_params
+from near_duplicates import SIMILARITY_THRESHOLD, find_near_duplicates
+
+
+# Paramètres du modèle (identiques au notebook)
+VECTORIZER_PARAMS = dict(
+    max_features=3000,
+    stop_words='english',
+    ngram_range=(1, 2),
+    min_df=2,
+    max_df=0.8
+)
+
+CHUNK_SIZE = 10000
+
+# Colonnes des emplois pour l'application (identiques au notebook)
+JOB_COLUMNS = [
+    'job_id', 'title', 'description', 'company_name', 'location',
+    'med_salary', 'remote_allowed', 'formatted_experience_level',
+    'formatted_work_type', 'skills_text'
+]
+
+POSTING_DTYPES = {
+    'job_id': 'int64',
+    'company_id': 'float64',
+    'med_salary': 'float64',
+    'remote_allowed': 'float64',
+}
+
+
+# ============================================================================
+# LECTURE ET AGRÉGATION DES DONNÉES
+# ============================================================================
+
+def _read_mapping(path, key, value):
+    """Table de correspondance (ex. skill_abr -> skill_name), vide si absente."""
+    if not os.path.exists(path):
+        return {}
+    mapping = pd.read_csv(path, usecols=[key, value])
+    return dict(zip(mapping[key], mapping[value]))
+
+
+def aggregate_by_job(path, column, names=None, chunk_size=CHUNK_SIZE):
+    """
+    Agrège une table 1-N (job_id, valeur) en un texte par offre
+
+    La table est lue par paquets : seules les valeurs agrégées sont gardées.
+
+    Args:
+        path (str): Fichier CSV (ex. job_skills.csv)
+        column (str): Colonne à agréger (ex. skill_abr)
+        names (dict): Correspondance code -> libellé (optionnelle)
+        chunk_size (int): Nombre de lignes par paquet
+
+    Returns:
+        dict: job_id -> valeurs séparées par ", " (ordre du fichier)
+    """
+
+    aggregated = {}
+    if not os.path.exists(path):
+        return aggregated
+    for chunk in pd.read_csv(path, usecols=['job_id', column], chunksize=chunk_size):
+        chunk = chunk.dropna()
+        labels = chunk[column].map(names).fillna(chunk[column]) if names else chunk[column]
+        for job_id, label in zip(chunk['job_id'].to_numpy(), labels.astype(str).to_numpy()):
+            previous = aggregated.get(job_id)
+            aggregated[job_id] = label if previous is None else f"{previous}, {label}"
+    return aggregated
+
+
+def read_aggregates(dataset_dir, chunk_size=CHUNK_SIZE):
+    """
+    Agrège les tables 1-N du dataset par offre (compétences, industries)
+
+    Returns:
+        tuple: (skills, industries, company_names), voir ``iter_jobs``
+    """
+
+    mappings_dir = os.path.join(dataset_dir, 'mappings')
+    skills = aggregate_by_job(
+        os.path.join(dataset_dir, 'job_skills.csv'), 'skill_abr',
+        _read_mapping(os.path.join(mappings_dir, 'skills.csv'), 'skill_abr', 'skill_name'), chunk_size
+    )
+    industries = aggregate_by_job(
+        os.path.join(dataset_dir, 'job_industries.csv'), 'industry_id',
+        _read_mapping(os.path.join(mappings_dir, 'industries.csv'), 'industry_id', 'industry_name'), chunk_size
+    )
+    company_names = _read_mapping(os.path.join(dataset_dir, 'companies.csv'), 'company_id', 'name')
+    return skills, industries, company_names
+
+
+def iter_jobs(dataset_dir, skills, industries, company_names, chunk_size=CHUNK_SIZE, limit=None):
+    """
+    Lit les offres par paquets, jointes aux agrégats par job_id
+
+    Les valeurs manquantes sont traitées comme dans le notebook : texte
+    -> 'Not Specified', numérique -> 0.
+
+    Args:
+        dataset_dir (str): Dossier du dataset LinkedIn
+        skills (dict): job_id -> compétences (voir ``aggregate_by_job``)
+        industries (dict): job_id -> industries
+        company_names (dict): company_id -> nom (si absent de job_postings)
+        chunk_size (int): Nombre d'offres par paquet
+        limit (int): Nombre maximal d'offres (None = toutes)
+
+    Yields:
+        tuple: (textes combinés, DataFrame des emplois du paquet)
+    """
+
+    path = os.path.join(dataset_dir, 'job_postings.csv')
+    header = pd.read_csv(path, nrows=0).columns
+    usecols = [column for column in (*JOB_COLUMNS, 'company_id') if column in header]
+    dtypes = {column: dtype for column, dtype in POSTING_DTYPES.items() if column in usecols}
+
+    remaining = limit
+    for chunk in pd.read_csv(path, usecols=usecols, dtype=dtypes, chunksize=chunk_size):
+        if remaining is not None:
+            if remaining <= 0:
+                break
+            chunk = chunk.head(remaining)
+            remaining -= len(chunk)
+
+        job_ids = chunk['job_id']
+        chunk['skills_text'] = job_ids.map(skills)
+        chunk['industries'] = job_ids.map(industries)
+        if 'company_name' not in chunk.columns:
+            chunk['company_name'] = chunk['company_id'].map(company_names) if 'company_id' in chunk.columns else None
+        for column in JOB_COLUMNS:
+            if column not in chunk.columns:
+                chunk[column] = np.nan if column in POSTING_DTYPES else None
+
+        jobs = chunk[[*JOB_COLUMNS, 'industries']].reset_index(drop=True)
+        for column in jobs.columns:
+            if pd.api.types.is_numeric_dtype(jobs[column]):
+                jobs[column] = jobs[column].fillna(0)
+            else:
+                jobs[column] = jobs[column].fillna('Not Specified').astype(str)
+
+        texts = (jobs['title'] + ' ' + jobs['description'] + ' ' + jobs['skills_text']).tolist()
+        yield texts, jobs
+
+
+# ============================================================================
+# VOCABULAIRE EN FLUX
+# ============================================================================
+
+def _write_run(path, vocabulary, document_counts, term_counts):
+    """Écrit les fréquences d'un paquet, triées par terme (TSV)."""
+    with open(path, 'w', encoding='utf-8') as f:
+        for term in sorted(vocabulary):
+            position = vocabulary[term]
+            f.write(f"{term}\t{document_counts[position]}\t{term_counts[position]}\n")
+
+
+def _read_run(path):
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            term, document_count, term_count = line.rstrip('\n').split('\t')
+            yield term, int(document_count), int(term_count)
+
+
+def _merge_runs(paths):
+    """Fusionne les fichiers de fréquences : (terme, df, tf) par ordre alphabétique."""
+    current, document_count, term_count = None, 0, 0
+    for term, df, tf in heapq.merge(*(_read_run(path) for path in paths)):
+        if term != current:
+            if current is not None:
+                yield current, document_count, term_count
+            current, document_count, term_count = term, 0, 0
+        document_count += df
+        term_count += tf
+    if current is not None:
+        yield current, document_count, term_count
+
+
+def select_vocabulary(counts, n_documents, min_df=1, max_df=1.0, max_features=None):
+    """
+    Choisit le vocabulaire exactement comme ``TfidfVectorizer.fit``
+
+    Termes gardés si min_df <= df <= max_df ; parmi eux, les
+    ``max_features`` plus fréquents dans le corpus, sélectionnés par le même
+    tri que scikit-learn (mêmes choix à égalité de fréquence). Seules les
+    fréquences des termes candidats sont gardées en mémoire, pas les termes.
+
+    Args:
+        counts: Fonction retournant un itérable de (terme, df, tf) trié par
+            terme (appelée deux fois)
+        n_documents (int): Nombre de documents
+        min_df, max_df: Seuils de fréquence documentaire (entier ou proportion)
+        max_features (int): Taille maximale du vocabulaire
+
+    Returns:
+        tuple: (termes triés, df de chaque terme)
+    """
+
+    max_count = max_df if isinstance(max_df, numbers.Integral) else max_df * n_documents
+    min_count = min_df if isinstance(min_df, numbers.Integral) else min_df * n_documents
+
+    def _candidates():
+        for term, document_count, term_count in counts():
+            if min_count <= document_count <= max_count:
+                yield term, document_count, term_count
+
+    # Passe 1 : fréquences des candidats, dans l'ordre alphabétique
+    document_counts = array('q')
+    term_counts = array('q')
+    for _, document_count, term_count in _candidates():
+        document_counts.append(document_count)
+        term_counts.append(term_count)
+    document_counts = np.frombuffer(document_counts, dtype=np.int64)
+    term_counts = np.frombuffer(term_counts, dtype=np.int64)
+
+    selected = np.arange(len(term_counts))
+    if max_features is not None and len(term_counts) > max_features:
+        # Même appel que CountVectorizer._limit_features
+        selected = np.sort((-term_counts).argsort()[:max_features])
+
+    # Passe 2 : termes des candidats retenus
+    vocabulary = []
+    wanted = iter(selected)
+    next_wanted = next(wanted, None)
+    for position, (term, _, _) in enumerate(_candidates()):
+        if position == next_wanted:
+            vocabulary.append(term)
+            next_wanted = next(wanted, None)
+    return vocabulary, document_counts[selected]
+
+
+def fit_vectorizer(text_chunks, work_dir, params=None):
+    """
+    Entraîne le TfidfVectorizer en flux, sans garder le corpus en mémoire
+
+    Args:
+        text_chunks: Itérable de listes de textes (un paquet à la fois)
+        work_dir (str): Dossier des fichiers temporaires de fréquences
+        params (dict): Paramètres du vectorizer (défaut : VECTORIZER_PARAMS)
+
+    Returns:
+        TfidfVectorizer: Vectorizer prêt pour ``transform``
+    """
+
+    params = dict(VECTORIZER_PARAMS if params is None else params)
+    reference = TfidfVectorizer(**params)
+
+    # Même analyse (tokens, stop words, n-grammes) que le vectorizer final
+    counter = CountVectorizer(
+        **{name: value for name, value in reference.get_params().items()
+           if name in CountVectorizer().get_params()
+           and name not in ('min_df', 'max_df', 'max_features', 'vocabulary', 'binary', 'dtype')}
+    )
+
+    runs = []
+    n_documents = 0
+    for texts in text_chunks:
+        if not texts:
+            continue
+        counts = counter.fit_transform(texts).tocsc()
+        document_counts = np.diff(counts.indptr)
+        term_counts = np.asarray(counts.sum(axis=0)).ravel()
+        path = os.path.join(work_dir, f"run-{len(runs):05d}.tsv")
+        _write_run(path, counter.vocabulary_, document_counts, term_counts)
+        runs.append(path)
+        n_documents += len(texts)
+
+    vocabulary, document_counts = select_vocabulary(
+        lambda: _merge_runs(runs), n_documents,
+        min_df=reference.min_df, max_df=reference.max_df, max_features=reference.max_features
+    )
+    if not vocabulary:
+        raise ValueError("Vocabulaire vide : aucun terme ne respecte min_df / max_df")
+
+    # idf lissé de TfidfTransformer : ln((1 + n) / (1 + df)) + 1
+    smooth = int(reference.smooth_idf)
+    idf = np.log((n_documents + smooth) / (document_counts.astype(np.float64) + smooth)) + 1
+    return build_vectorizer(vectorizer_params(reference), vocabulary, idf)
+
+
+# ============================================================================
+# CONSTRUCTION DU MODÈLE
+# ============================================================================
+
+def build_model(dataset_dir="dataset", model_dir="model", chunk_size=CHUNK_SIZE, limit=None,
+                params=None, compression=TEXT_COMPRESSION, matrix_precision=DEFAULT_PRECISION,
+                top_terms=None, dedup_threshold=SIMILARITY_THRESHOLD):
+    """
+    Construit ``model/`` à partir du dataset LinkedIn, en mémoire bornée
+
+    Args:
+        dataset_dir (str): Dossier des CSV LinkedIn
+        model_dir (str): Dossier du modèle
+        chunk_size (int): Nombre d'offres par paquet
+        limit (int): Nombre maximal d'offres (None = toutes)
+        params (dict): Paramètres du vectorizer (défaut : ceux du notebook)
+        compression (str): Compression des descriptions (None = aucune)
+        matrix_precision (str): Poids de la matrice (voir matrix_compression.py)
+        top_terms (int): Termes gardés par offre (None = tous)
+        dedup_threshold (float): Similarité des quasi-doublons regroupés
+            (None = garder toutes les offres)
+
+    Returns:
+        dict: Métadonnées du modèle
+    """
+
+    aggregates = read_aggregates(dataset_dir, chunk_size)
+
+    def _chunks():
+        return iter_jobs(dataset_dir, *aggregates, chunk_size=chunk_size, limit=limit)
+
+    return write_model(_chunks, model_dir, params, compression, matrix_precision, top_terms,
+                       dedup_threshold)
+
+
+def write_model(make_chunks, model_dir="model", params=None, compression=TEXT_COMPRESSION,
+                matrix_precision=DEFAULT_PRECISION, top_terms=None, dedup_threshold=SIMILARITY_THRESHOLD):
+    """
+    Entraîne le vectorizer puis écrit le modèle, en deux passes sur les paquets
+
+    Args:
+        make_chunks: Fonction sans argument qui renvoie un nouvel itérateur
+            de paquets ``(texts, jobs)`` (même forme que ``iter_jobs``)
+        model_dir (str): Dossier du modèle
+        params (dict): Paramètres du vectorizer (défaut : ceux du notebook)
+        compression (str): Compression des descriptions (None = aucune)
+        matrix_precision (str): Poids de la matrice (voir matrix_compression.py)
+        top_terms (int): Termes gardés par offre (None = tous)
+        dedup_threshold (float): Similarité des quasi-doublons regroupés
+            (None = garder toutes les offres)
+
+    Returns:
+        dict: Métadonnées du modèle
+    """
+
+    # Passe 0 : un représentant par groupe de quasi-doublons, pour le
+    # vocabulaire comme pour la matrice
+    duplicates = None
+    if dedup_threshold:
+        duplicates = find_near_duplicates((jobs for _, jobs in make_chunks()), dedup_threshold)
+        read_chunks = make_chunks
+
+        def make_chunks():
+            return duplicates.filter_chunks(read_chunks())
+
+    work_dir = tempfile.mkdtemp(prefix="prepare_model_")
+    try:
+        vectorizer = fit_vectorizer((texts for texts, _ in make_chunks()), work_dir, params)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    writer = ModelWriter(model_dir, vectorizer, compression, matrix_precision, top_terms)
+    for texts, jobs in make_chunks():
+        writer.append(vectorizer.transform(texts), jobs)
+
+    metadata = {
+        'n_jobs': writer.n_rows,
+        'vocabulary_size': len(vectorizer.vocabulary_),
+        'created_at': pd.Timestamp.now().isoformat()
+    }
+    if duplicates is not None:
+        metadata['near_duplicates'] = {'threshold': dedup_threshold, 'removed': duplicates.n_hidden}
+    writer.close(metadata)
+    return metadata
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Construction du modèle TF-IDF en mémoire bornée")
+    parser.add_argument('dataset_dir', nargs='?', default='dataset')
+    parser.add_argument('model_dir', nargs='?', default='model')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--limit', type=int, default=None,
+                        help="Nombre maximal d'offres (le notebook en prend 50000)")
+    parser.add_argument('--no-compression', action='store_true',
+                        help="Ne pas compresser les descriptions")
+    parser.add_argument('--matrix-precision', choices=PRECISIONS, default=DEFAULT_PRECISION,
+                        help="Poids de la matrice TF-IDF (voir matrix_compression.py pour évaluer)")
+    parser.add_argument('--top-terms', type=int, default=None,
+                        help="Ne garder que les N plus forts termes de chaque offre")
+    parser.add_argument('--dedup-threshold', type=float, default=SIMILARITY_THRESHOLD,
+                        help="Similarité (Jaccard) des offres quasi dupliquées regroupées")
+    parser.add_argument('--no-dedup', action='store_true',
+                        help="Garder toutes les offres, même quasi dupliquées")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    metadata = build_model(args.dataset_dir, args.model_dir, args.chunk_size, args.limit,
+                           compression=None if args.no_compression else TEXT_COMPRESSION,
+                           matrix_precision=args.matrix_precision, top_terms=args.top_terms,
+                           dedup_threshold=None if args.no_dedup else args.dedup_threshold)
+    print(f"✅ Modèle construit en {time.perf_counter() - start:.1f} s : "
+          f"{metadata['n_jobs']:,} emplois, {metadata['vocabulary_size']:,} termes -> {args.model_dir}/")
+    if 'near_duplicates' in metadata:
+        print(f"🪞 {metadata['near_duplicates']['removed']:,} offres quasi dupliquées regroupées")
+
+
+if __name__ == "__main__":
+    main()
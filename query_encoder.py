@@ -0,0 +1,351 @@
+"""
+🔤 JOB INTELLIGENT - Encodeur léger des profils
+
+Le service n'a besoin du TfidfVectorizer que pour transformer un profil en
+vecteur. ``QueryEncoder`` refait exactement ce calcul à partir des fichiers
+exportés du modèle (vocabulaire, idf, mots vides) :
+
+    minuscules -> accents -> regex des tokens -> mots vides -> n-grammes
+    -> comptage -> (binaire / tf sublinéaire) -> x idf -> normalisation
+
+sans importer scikit-learn (plus d'une seconde au démarrage) ni passer par
+ses validations à chaque requête. Le vecteur produit est identique, bit à
+bit, à celui de ``vectorizer.transform`` (même ordre des opérations
+flottantes). Les réglages non reproduits (analyseur par caractères, entrée
+fichier) gardent le TfidfVectorizer.
+
+Usage (contrôle de parité et temps par requête sur un modèle) :
+    python query_encoder.py model/ --queries 2000
+"""
+
+import argparse
+import math
+import re
+import time
+import unicodedata
+
+import numpy as np
+import scipy.sparse as sp
+
+
+DEFAULT_TOKEN_PATTERN = r"(?u)\b\w\w+\b"
+
+# Profils du contrôle de parité en plus des textes des offres : casse,
+# accents, ponctuation, mots vides, hors vocabulaire, vide
+PARITY_PROFILES = (
+    "data analyst python sql",
+    "Data Scientist: Python, SQL & Machine-Learning (NLP/CV)",
+    "Développeur full-stack expérimenté, café et modélisation statistique",
+    "ÉNORME   espace\t\tTAB\nligne",
+    "the and of to in for with",
+    "a b c d e",
+    "zzzqqq xxyyzz",
+    "C++ C# .NET node.js R",
+    "",
+)
+
+
+def strip_accents_unicode(text):
+    """Retire les accents (décomposition NFKD) ; texte ASCII inchangé."""
+    try:
+        text.encode("ASCII", errors="strict")
+        return text
+    except UnicodeEncodeError:
+        normalized = unicodedata.normalize("NFKD", text)
+        return "".join([c for c in normalized if not unicodedata.combining(c)])
+
+
+def strip_accents_ascii(text):
+    """Translittère en ASCII (les caractères sans équivalent sont retirés)."""
+    return unicodedata.normalize("NFKD", text).encode("ASCII", "ignore").decode("ASCII")
+
+
+class QueryEncoder:
+    """
+    Transformation TF-IDF des profils sans scikit-learn
+
+    Expose les attributs lus par le reste du service (``vocabulary_``,
+    ``idf_``, ``norm``, ``lowercase``, ``analyzer``...) : il remplace le
+    TfidfVectorizer partout où seul ``transform`` est appelé.
+
+    Attributes:
+        vocabulary_ (dict): Terme -> colonne de la matrice TF-IDF
+        idf_ (np.ndarray): Poids IDF par colonne (None si use_idf=False)
+        stop_words (frozenset): Mots vides retirés avant les n-grammes
+    """
+
+    # Analyseur par mots, sans fonctions personnalisées
+    analyzer = 'word'
+    preprocessor = None
+    tokenizer = None
+
+    def __init__(self, vocabulary, idf=None, stop_words=None, lowercase=True,
+                 token_pattern=DEFAULT_TOKEN_PATTERN, ngram_range=(1, 1), strip_accents=None,
+                 binary=False, norm='l2', use_idf=True, sublinear_tf=False, dtype=np.float64,
+                 encoding='utf-8', decode_error='strict'):
+        self.vocabulary_ = {term: position for position, term in enumerate(vocabulary)}
+        self.use_idf = use_idf
+        self.idf_ = np.asarray(idf, dtype=np.float64) if use_idf and idf is not None else None
+        self.stop_words = frozenset(stop_words) if stop_words is not None else None
+        self.lowercase = lowercase
+        self.token_pattern = token_pattern
+        self.ngram_range = tuple(ngram_range)
+        self.strip_accents = strip_accents
+        self.binary = binary
+        self.norm = norm
+        self.sublinear_tf = sublinear_tf
+        self.dtype = np.dtype(dtype).type
+        self.encoding = encoding
+        self.decode_error = decode_error
+
+        pattern = re.compile(token_pattern)
+        if pattern.groups > 1:
+            raise ValueError("More than 1 capturing group in token pattern. Only a single "
+                             "group should be captured.")
+        self._tokenize = pattern.findall
+        if strip_accents is None:
+            self._strip_accents = None
+        elif strip_accents == 'ascii':
+            self._strip_accents = strip_accents_ascii
+        elif strip_accents == 'unicode':
+            self._strip_accents = strip_accents_unicode
+        else:
+            raise ValueError(f"Invalid value for 'strip_accents': {strip_accents}")
+        if norm not in (None, 'l1', 'l2', 'max'):
+            raise ValueError(f"'{norm}' is not a supported norm")
+
+    @staticmethod
+    def supports(params):
+        """Vrai si les paramètres exportés du vectorizer sont reproduits."""
+        stop_words = params.get('stop_words')
+        return (params.get('analyzer', 'word') == 'word'
+                and params.get('input', 'content') == 'content'
+                and (stop_words is None or stop_words == 'english' or not isinstance(stop_words, str)))
+
+    @classmethod
+    def from_params(cls, params, vocabulary, idf, stop_words=None):
+        """
+        Encodeur construit à partir des fichiers exportés du modèle
+
+        Args:
+            params (dict): Paramètres du vectorizer (manifeste)
+            vocabulary (list): Termes, dans l'ordre des colonnes
+            idf (np.ndarray): Poids IDF (None si use_idf=False)
+            stop_words: Mots vides résolus (None = aucun)
+
+        Returns:
+            QueryEncoder: Encodeur équivalent au TfidfVectorizer
+        """
+
+        return cls(
+            vocabulary, idf, stop_words,
+            lowercase=params.get('lowercase', True),
+            token_pattern=params.get('token_pattern', DEFAULT_TOKEN_PATTERN),
+            ngram_range=params.get('ngram_range', (1, 1)),
+            strip_accents=params.get('strip_accents'),
+            binary=params.get('binary', False),
+            norm=params.get('norm', 'l2'),
+            use_idf=params.get('use_idf', True),
+            sublinear_tf=params.get('sublinear_tf', False),
+            dtype=params.get('dtype', 'float64'),
+            encoding=params.get('encoding', 'utf-8'),
+            decode_error=params.get('decode_error', 'strict'),
+        )
+
+    @classmethod
+    def from_vectorizer(cls, vectorizer):
+        """Encodeur équivalent à un TfidfVectorizer entraîné (ancien modèle pickle)."""
+        params = vectorizer.get_params()
+        if (not cls.supports(params) or params.get('preprocessor') is not None
+                or params.get('tokenizer') is not None):
+            raise ValueError("Vectorizer non reproductible par QueryEncoder")
+        vocabulary = sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get)
+        return cls.from_params(params, vocabulary, getattr(vectorizer, 'idf_', None),
+                               vectorizer.get_stop_words())
+
+    def analyze(self, doc):
+        """Termes d'un document (n-grammes après retrait des mots vides)."""
+        if isinstance(doc, bytes):
+            doc = doc.decode(self.encoding, self.decode_error)
+        if doc is np.nan:
+            raise ValueError("np.nan is an invalid document, expected byte or unicode string.")
+        if self.lowercase:
+            doc = doc.lower()
+        if self._strip_accents is not None:
+            doc = self._strip_accents(doc)
+
+        tokens = self._tokenize(doc)
+        if self.stop_words is not None:
+            tokens = [token for token in tokens if token not in self.stop_words]
+
+        min_n, max_n = self.ngram_range
+        if max_n == 1:
+            return tokens
+        original_tokens = tokens
+        if min_n == 1:
+            tokens = list(original_tokens)
+            min_n += 1
+        else:
+            tokens = []
+        n_original_tokens = len(original_tokens)
+        for n in range(min_n, min(max_n + 1, n_original_tokens + 1)):
+            for i in range(n_original_tokens - n + 1):
+                tokens.append(" ".join(original_tokens[i:i + n]))
+        return tokens
+
+    def transform(self, raw_documents):
+        """
+        Vecteurs TF-IDF des documents (identiques à ``TfidfVectorizer.transform``)
+
+        Args:
+            raw_documents: Itérable de textes
+
+        Returns:
+            sp.csr_matrix: Matrice (n_documents x n_termes), indices triés
+        """
+
+        if isinstance(raw_documents, str):
+            raise ValueError("Iterable over raw text documents expected, string object received.")
+
+        vocabulary = self.vocabulary_
+        indices, counts, indptr = [], [], [0]
+        for doc in raw_documents:
+            counter = {}
+            for term in self.analyze(doc):
+                position = vocabulary.get(term)
+                if position is not None:
+                    counter[position] = counter.get(position, 0) + 1
+            columns = sorted(counter)
+            indices.extend(columns)
+            counts.extend(counter[column] for column in columns)
+            indptr.append(len(indices))
+
+        data = np.asarray(counts, dtype=self.dtype)
+        indices = np.asarray(indices, dtype=np.int32)
+        if self.binary:
+            data.fill(1)
+        if self.sublinear_tf:
+            np.log(data, data)
+            data += 1.0
+        if self.idf_ is not None:
+            data *= self.idf_[indices]
+        if self.norm is not None:
+            self._normalize(data, indptr)
+
+        return sp.csr_matrix((data, indices, np.asarray(indptr, dtype=np.int32)),
+                             shape=(len(indptr) - 1, len(vocabulary)), copy=False)
+
+    def _normalize(self, data, indptr):
+        """
+        Normalise chaque ligne en place
+
+        Somme séquentielle en double puis division en double, comme les
+        boucles de ``sklearn.preprocessing.normalize`` (résultat bit à bit).
+        """
+
+        for start, end in zip(indptr[:-1], indptr[1:]):
+            if start == end:
+                continue
+            row = data[start:end]
+            if self.norm == 'l2':
+                total = 0.0
+                for square in (row * row).tolist():
+                    total += square
+                scale = math.sqrt(total)
+            elif self.norm == 'l1':
+                total = 0.0
+                for value in np.abs(row).tolist():
+                    total += value
+                scale = total
+            else:
+                scale = float(np.abs(row).max())
+            if scale != 0.0:
+                row[:] = row / np.float64(scale)
+
+
+# ============================================================================
+# CONTRÔLE DE PARITÉ
+# ============================================================================
+
+def check_parity(encoder, vectorizer, documents):
+    """
+    Compare l'encodeur au TfidfVectorizer document par document
+
+    Args:
+        encoder (QueryEncoder): Encodeur léger
+        vectorizer: TfidfVectorizer de référence
+        documents (list): Textes testés
+
+    Returns:
+        dict: n_documents, mismatches (positions des vecteurs différents),
+        max_abs_diff et temps moyen par requête (ms) des deux encodeurs
+    """
+
+    mismatches, max_abs_diff = [], 0.0
+    elapsed = {'encoder': 0.0, 'vectorizer': 0.0}
+    for position, document in enumerate(documents):
+        start = time.perf_counter()
+        expected = sp.csr_matrix(vectorizer.transform([document]))
+        elapsed['vectorizer'] += time.perf_counter() - start
+        start = time.perf_counter()
+        found = encoder.transform([document])
+        elapsed['encoder'] += time.perf_counter() - start
+
+        same = (expected.dtype == found.dtype
+                and np.array_equal(expected.indptr, found.indptr)
+                and np.array_equal(expected.indices, found.indices)
+                and np.array_equal(expected.data, found.data))
+        if not same:
+            mismatches.append(position)
+            if expected.shape == found.shape:
+                max_abs_diff = max(max_abs_diff, float(abs(expected - found).max()))
+    n_documents = max(1, len(documents))
+    return {
+        'n_documents': len(documents),
+        'mismatches': mismatches,
+        'max_abs_diff': max_abs_diff,
+        'encoder_ms': elapsed['encoder'] * 1000 / n_documents,
+        'vectorizer_ms': elapsed['vectorizer'] * 1000 / n_documents,
+    }
+
+
+def main():
+    from model_store import load_model
+
+    parser = argparse.ArgumentParser(description="Parité QueryEncoder / TfidfVectorizer")
+    parser.add_argument('model_dir', nargs='?', default="model")
+    parser.add_argument('--queries', type=int, default=1000, help="Offres utilisées comme profils")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    encoder, _, jobs, _, _ = load_model(args.model_dir, encoder=True)
+    encoder_load = time.perf_counter() - start
+    start = time.perf_counter()
+    vectorizer, *_ = load_model(args.model_dir)
+    vectorizer_load = time.perf_counter() - start
+    # Classe du module importé par model_store (distinct de __main__)
+    if type(encoder).__name__ != QueryEncoder.__name__:
+        print("⚠️ Paramètres du vectorizer non reproduits : le modèle est servi avec le TfidfVectorizer")
+        return
+
+    rng = np.random.default_rng(0)
+    sample = np.sort(rng.choice(len(jobs), min(args.queries, len(jobs)), replace=False))
+    rows = jobs.take(sample)
+    texts = [str(row.get('title') or '') + ' ' + str(row.get('description') or '')
+             + ' ' + str(row.get('skills_text') or '') for row in rows.to_dict('records')]
+    # Profils courts (titre seul) : la taille typique d'une requête
+    titles = [str(title) for title in rows['title'].tolist()] if 'title' in rows.columns else []
+    documents = [*PARITY_PROFILES, *titles, *texts]
+
+    report = check_parity(encoder, vectorizer, documents)
+    print(f"Chargement : encodeur {encoder_load:.2f} s, TfidfVectorizer {vectorizer_load:.2f} s")
+    print(f"Encodage : {report['encoder_ms']:.3f} ms/requête (TfidfVectorizer {report['vectorizer_ms']:.3f} ms)")
+    if report['mismatches']:
+        print(f"❌ {len(report['mismatches'])}/{report['n_documents']} vecteurs différents "
+              f"(écart max {report['max_abs_diff']:.2e}), ex. : {documents[report['mismatches'][0]][:80]!r}")
+        raise SystemExit(1)
+    print(f"✅ {report['n_documents']} vecteurs identiques au TfidfVectorizer")
+
+
+if __name__ == "__main__":
+    main()
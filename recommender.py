@@ -0,0 +1,351 @@
+"""
+⚙️ JOB INTELLIGENT - Moteur de scoring des recommandations
+
+Moteur de recherche utilisé par l'application Streamlit, sans dépendance à
+l'interface : les filtres sont résolus en premier (indices des lignes
+candidates), seules ces lignes de la matrice TF-IDF sont scorées par un
+produit scalaire creux, et un DataFrame n'est construit que pour les k
+meilleurs emplois.
+
+Le vectorizer TF-IDF normalise ses lignes (norme L2) : le produit scalaire
+entre le profil et une offre est donc directement la similarité cosinus.
+"""
+
+from contextlib import nullcontext
+
+import numpy as np
+
+
+# ============================================================================
+# FILTRES
+# ============================================================================
+
+def _contains(series, pattern):
+    """Équivalent NumPy de ``series.str.contains(pattern, case=False, na=False)``."""
+    return series.str.contains(pattern, case=False, na=False).to_numpy(dtype=bool)
+
+
+def candidate_rows(jobs_df, location_filter=None, min_salary=0,
+                   experience_filter=None, work_type_filter=None,
+                   remote_only=False):
+    """
+    Calcule les positions des emplois qui passent tous les filtres
+
+    Les filtres ont exactement la même sémantique que l'ancienne version de
+    ``recommend_jobs`` (recherche de sous-chaîne insensible à la casse,
+    colonnes absentes ignorées), mais travaillent sur des masques booléens
+    sans jamais copier le DataFrame.
+
+    Args:
+        jobs_df (pd.DataFrame): DataFrame des emplois
+        location_filter (str): Filtrer par localisation (location, state, city)
+        min_salary (float): Salaire minimum
+        experience_filter (str): Niveau d'expérience
+        work_type_filter (str): Type de contrat
+        remote_only (bool): Garder seulement les postes en remote
+
+    Returns:
+        np.ndarray | None: Positions triées des lignes candidates, ou None
+        si aucun filtre n'est actif (toutes les lignes sont candidates)
+    """
+
+    mask = None
+
+    def _restrict(current, condition):
+        return condition if current is None else current & condition
+
+    if remote_only and 'remote_allowed' in jobs_df.columns:
+        mask = _restrict(mask, (jobs_df['remote_allowed'] == 1.0).to_numpy(dtype=bool))
+
+    if location_filter and location_filter != "Tous":
+        location_mask = np.zeros(len(jobs_df), dtype=bool)
+        for column in ('location', 'state', 'city'):
+            if column in jobs_df.columns:
+                location_mask |= _contains(jobs_df[column], location_filter)
+        mask = _restrict(mask, location_mask)
+
+    if min_salary > 0 and 'med_salary' in jobs_df.columns:
+        mask = _restrict(mask, (jobs_df['med_salary'] >= min_salary).to_numpy(dtype=bool))
+
+    if experience_filter and experience_filter != "Tous" and 'formatted_experience_level' in jobs_df.columns:
+        mask = _restrict(mask, _contains(jobs_df['formatted_experience_level'], experience_filter))
+
+    if work_type_filter and work_type_filter != "Tous" and 'formatted_work_type' in jobs_df.columns:
+        mask = _restrict(mask, _contains(jobs_df['formatted_work_type'], work_type_filter))
+
+    if mask is None:
+        return None
+    return np.flatnonzero(mask)
+
+
+# ============================================================================
+# SCORING
+# ============================================================================
+
+def query_dtype(tfidf_matrix):
+    """
+    Type des profils pour scorer une matrice TF-IDF
+
+    Un produit creux entre types différents recopie la matrice dans le type
+    commun à chaque requête : une matrice float32 (voir matrix_compression.py)
+    est donc scorée avec des profils float32.
+    """
+    return np.float32 if tfidf_matrix.dtype == np.float32 else np.float64
+
+
+def score_rows(profile_vector, tfidf_matrix, rows=None):
+    """
+    Score les lignes demandées de la matrice TF-IDF pour un profil
+
+    Args:
+        profile_vector: Vecteur TF-IDF (1 x n_features) du profil
+        tfidf_matrix: Matrice TF-IDF CSR des emplois (lignes normalisées L2)
+        rows (np.ndarray): Positions à scorer (None = toutes les lignes)
+
+    Returns:
+        np.ndarray: Similarité cosinus de chaque ligne demandée
+    """
+
+    query = np.asarray(profile_vector.toarray(), dtype=query_dtype(tfidf_matrix)).ravel()
+    matrix = tfidf_matrix if rows is None else tfidf_matrix[rows]
+    return np.asarray(matrix @ query, dtype=np.float64).ravel()
+
+
+def top_k(scores, k):
+    """
+    Sélectionne les k meilleurs scores par sélection partielle
+
+    L'ordre retourné est celui de ``DataFrame.nlargest(k, keep='first')`` :
+    scores décroissants, et à score égal la position la plus petite d'abord.
+
+    Args:
+        scores (np.ndarray): Scores des candidats
+        k (int): Nombre de résultats voulus
+
+    Returns:
+        np.ndarray: Positions (dans ``scores``) des k meilleurs, triées
+    """
+
+    n = scores.shape[0]
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.intp)
+
+    if k < n:
+        # k-ième plus grande valeur, sans trier tout le tableau
+        kth = np.partition(scores, n - k)[n - k]
+        above = np.flatnonzero(scores > kth)
+        ties = np.flatnonzero(scores == kth)[:k - len(above)]
+        selected = np.concatenate([above, ties])
+    else:
+        selected = np.arange(n)
+
+    order = np.lexsort((selected, -scores[selected]))
+    return selected[order]
+
+
+def merge_top_k(results, k):
+    """
+    Fusionne des top-k partiels (tranches, segments) en un top-k global
+
+    Même ordre que ``top_k`` : scores décroissants, puis la position la
+    plus petite à score égal.
+
+    Args:
+        results (list): (positions globales, scores) de chaque partie
+        k (int): Nombre de résultats voulus
+
+    Returns:
+        tuple: (positions, scores) des k meilleurs emplois, triés
+    """
+
+    if not results:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float64)
+    positions = np.concatenate([np.asarray(found, dtype=np.intp) for found, _ in results])
+    scores = np.concatenate([scores for _, scores in results])
+    best = np.lexsort((positions, -scores))[:k]
+    return positions[best], scores[best]
+
+
+def search(profile_vector, tfidf_matrix, k, rows=None):
+    """
+    Recherche exacte des k emplois les plus similaires parmi des candidats
+
+    Args:
+        profile_vector: Vecteur TF-IDF (1 x n_features) du profil
+        tfidf_matrix: Matrice TF-IDF CSR des emplois (ou matrice segmentée,
+            voir ``model_store.SegmentedMatrix`` : chaque partie est scorée
+            séparément)
+        k (int): Nombre de résultats voulus
+        rows (np.ndarray): Positions candidates triées (None = tout le corpus)
+
+    Returns:
+        tuple: (positions, scores) des k meilleurs emplois, triés
+    """
+
+    if hasattr(tfidf_matrix, 'parts'):
+        return tfidf_matrix.search(profile_vector, k, rows)
+    scores = score_rows(profile_vector, tfidf_matrix, rows)
+    best = top_k(scores, k)
+    positions = best if rows is None else np.asarray(rows)[best]
+    return positions, scores[best]
+
+
+# ============================================================================
+# LIGNES SUPPRIMÉES
+# ============================================================================
+
+# Les offres fermées d'un instantané segmenté restent dans les fichiers de la
+# base (mappés, jamais recopiés) : les positions servies sont les rangs des
+# lignes vivantes, ``dead`` liste les lignes locales supprimées (triées).
+
+def live_to_local(ranks, dead):
+    """Lignes locales des rangs ``ranks`` parmi les lignes vivantes."""
+    ranks = np.asarray(ranks, dtype=np.int64)
+    if len(dead) == 0:
+        return ranks
+    return ranks + np.searchsorted(dead - np.arange(len(dead)), ranks, side='right')
+
+
+def local_to_live(local, dead):
+    """Rangs parmi les lignes vivantes des lignes locales ``local`` (triées), lignes supprimées retirées."""
+    local = np.asarray(local, dtype=np.int64)
+    if len(dead) == 0:
+        return local
+    local = local[~np.isin(local, dead, assume_unique=True)]
+    return local - np.searchsorted(dead, local)
+
+
+def search_live(profile_vector, tfidf_matrix, k, rows=None, dead=()):
+    """
+    Recherche exacte en ignorant les lignes supprimées d'une matrice
+
+    Sans filtre, toute la matrice est scorée (aucune copie) puis les scores
+    des lignes supprimées sont retirés.
+
+    Args:
+        profile_vector: Vecteur TF-IDF (1 x n_features) du profil
+        tfidf_matrix: Matrice TF-IDF CSR (lignes vivantes et supprimées)
+        k (int): Nombre de résultats voulus
+        rows (np.ndarray): Rangs candidats parmi les lignes vivantes (None = tout)
+        dead (np.ndarray): Lignes locales supprimées, triées
+
+    Returns:
+        tuple: (rangs, scores) des k meilleurs emplois, triés
+    """
+
+    if len(dead) == 0:
+        return search(profile_vector, tfidf_matrix, k, rows)
+    if rows is None:
+        scores = np.delete(score_rows(profile_vector, tfidf_matrix), dead)
+        best = top_k(scores, k)
+        return best, scores[best]
+    rows = np.asarray(rows, dtype=np.int64)
+    scores = score_rows(profile_vector, tfidf_matrix, live_to_local(rows, dead))
+    best = top_k(scores, k)
+    return rows[best], scores[best]
+
+
+# ============================================================================
+# RECOMMANDATION
+# ============================================================================
+
+def _stage(trace, name):
+    """Chronomètre une étape si une trace est fournie (voir metrics.QueryTrace)."""
+    return nullcontext() if trace is None else trace.stage(name)
+
+
+def recommend_jobs(profile_text, jobs_df, vectorizer, tfidf_matrix,
+                   n_recommendations=10, location_filter=None,
+                   min_salary=0, experience_filter=None, work_type_filter=None,
+                   remote_only=False, filter_index=None, searcher=None, cache=None,
+                   trace=None):
+    """
+    Recommande les emplois les plus pertinents pour un profil donné
+
+    Utilise le modèle TF-IDF et la similarité cosinus pour scorer
+    les emplois qui passent les filtres par rapport au profil de
+    l'utilisateur. Seuls les k meilleurs emplois sont matérialisés.
+
+    Args:
+        profile_text (str): Description du profil candidat
+        jobs_df (pd.DataFrame | JobTable): Emplois (DataFrame ou table mappée)
+        vectorizer: Modèle TF-IDF pré-entraîné
+        tfidf_matrix: Matrice TF-IDF pré-calculée
+        n_recommendations (int): Nombre d'emplois à retourner
+        location_filter (str): Filtrer par localisation
+        min_salary (float): Salaire minimum
+        experience_filter (str): Niveau d'expérience
+        work_type_filter (str): Type de contrat
+        remote_only (bool): Retourner seulement les postes en remote
+        filter_index (FilterIndex): Index des filtres pré-calculé (optionnel,
+            sinon les filtres sont évalués sur ``jobs_df``)
+        searcher: Moteur de recherche alternatif exposant
+            ``search(profile_vector, tfidf_matrix, k, rows)`` (ex. AnnIndex) ;
+            par défaut, recherche exacte
+        cache (ResultCache): Cache des classements (optionnel) ; ignoré si
+            le moteur est approximatif (``searcher.exact`` faux)
+        trace (metrics.QueryTrace): Mesure de la durée de chaque étape (optionnel)
+
+    Returns:
+        pd.DataFrame: Emplois recommandés triés par score de similarité
+    """
+
+    filters = dict(
+        location_filter=location_filter,
+        min_salary=min_salary,
+        experience_filter=experience_filter,
+        work_type_filter=work_type_filter,
+        remote_only=remote_only
+    )
+
+    # Classement déjà calculé pour ce profil et ces filtres ?
+    key = cached = None
+    if cache is not None and getattr(searcher, 'exact', True):
+        with _stage(trace, 'cache'):
+            key = cache.key(profile_text, vectorizer, n_recommendations, **filters)
+            cached = cache.get(key)
+
+    if cached is not None:
+        positions, scores = cached
+    else:
+        # Résoudre les filtres avant tout calcul de score
+        with _stage(trace, 'filters'):
+            if filter_index is not None:
+                rows = filter_index.candidate_rows(**filters)
+            else:
+                rows = candidate_rows(jobs_df, **filters)
+
+        # Transformer le profil en vecteur TF-IDF
+        with _stage(trace, 'transform'):
+            profile_vector = vectorizer.transform([profile_text])
+
+        # Scorer uniquement les candidats et garder les k meilleurs
+        if searcher is not None:
+            # Le moteur fait lui-même la sélection du top-k
+            with _stage(trace, 'scoring'):
+                positions, scores = searcher.search(profile_vector, tfidf_matrix, n_recommendations, rows)
+        else:
+            with _stage(trace, 'scoring'):
+                all_scores = score_rows(profile_vector, tfidf_matrix, rows)
+            with _stage(trace, 'top_k'):
+                best = top_k(all_scores, n_recommendations)
+                positions = best if rows is None else np.asarray(rows)[best]
+                scores = all_scores[best]
+
+        if key is not None:
+            cache.put(key, positions, scores)
+
+    if trace is not None:
+        trace.annotate(
+            cache_hit=cached is not None,
+            candidates=None if cached is not None else (tfidf_matrix.shape[0] if rows is None else len(rows)),
+            searcher=type(searcher).__name__ if searcher is not None else 'exact',
+            n_results=len(positions),
+        )
+
+    # DataFrame.take et JobTable.take ne matérialisent que les lignes gagnantes
+    with _stage(trace, 'frame'):
+        recommendations = jobs_df.take(positions)
+        recommendations['similarity_score'] = scores
+
+    return recommendations
@@ -0,0 +1,149 @@
+"""
+🗃️ JOB INTELLIGENT - Cache des résultats de recommandation
+
+L'essentiel du trafic vient des profils prédéfinis et de quelques réglages
+de filtres courants : le classement (positions + scores) d'une requête déjà
+vue est réutilisé au lieu de re-vectoriser et re-scorer le corpus.
+
+Clé d'une entrée :
+    - empreinte du texte du profil normalisé (casse et espaces, seulement
+      si le vectorizer les ignore déjà : le vecteur TF-IDF est identique)
+    - filtres (localisation, salaire minimum, expérience, contrat, remote)
+      et nombre de résultats
+    - version du modèle (métadonnées) : un modèle régénéré ne sert jamais
+      les résultats de l'ancien
+
+Les entrées sont évincées par ancienneté d'usage (LRU) et expirent après
+``ttl_seconds``. Le cache est partagé entre threads (sessions Streamlit).
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+def model_version(metadata):
+    """Version du modèle, tirée de ses métadonnées (date de création, taille, instantané)."""
+    return (
+        f"{metadata.get('created_at')}:{metadata.get('n_jobs')}:"
+        f"{metadata.get('vocabulary_size')}:{metadata.get('snapshot', 0)}"
+    )
+
+
+def normalize_profile(profile_text, vectorizer=None):
+    """
+    Forme canonique d'un profil, qui donne le même vecteur TF-IDF
+
+    La casse n'est ignorée que si le vectorizer met en minuscules, et les
+    espaces ne sont fusionnés que pour l'analyseur par mots par défaut.
+
+    Args:
+        profile_text (str): Description du profil
+        vectorizer: Vectorizer TF-IDF du modèle
+
+    Returns:
+        str: Texte normalisé
+    """
+
+    if (getattr(vectorizer, 'analyzer', None) != 'word'
+            or getattr(vectorizer, 'preprocessor', None) is not None
+            or getattr(vectorizer, 'tokenizer', None) is not None):
+        return profile_text
+    if getattr(vectorizer, 'lowercase', False):
+        profile_text = profile_text.lower()
+    return " ".join(profile_text.split())
+
+
+class ResultCache:
+    """
+    Cache LRU/TTL des classements (positions, scores) par requête
+
+    Attributes:
+        model_version (str): Version du modèle servi, incluse dans chaque clé
+        max_entries (int): Nombre maximal d'entrées (LRU au-delà)
+        ttl_seconds (float): Durée de vie d'une entrée (None = illimitée)
+        hits (int): Requêtes servies depuis le cache
+        misses (int): Requêtes calculées
+    """
+
+    def __init__(self, model_version, max_entries=1024, ttl_seconds=3600, clock=time.monotonic):
+        self.model_version = model_version
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, profile_text, vectorizer, n_recommendations, location_filter=None,
+            min_salary=0, experience_filter=None, work_type_filter=None,
+            remote_only=False):
+        """Clé d'une requête (mêmes arguments que ``recommend_jobs``)."""
+        text = normalize_profile(profile_text, vectorizer)
+        return (
+            hashlib.sha1(text.encode('utf-8')).hexdigest(),
+            location_filter or None,
+            float(min_salary or 0),
+            experience_filter or None,
+            work_type_filter or None,
+            bool(remote_only),
+            int(n_recommendations),
+            self.model_version,
+        )
+
+    def get(self, key):
+        """
+        Classement en cache pour ``key``
+
+        Returns:
+            tuple | None: (positions, scores), ou None (absent ou expiré)
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl_seconds is not None and entry[0] <= self._clock():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def put(self, key, positions, scores):
+        """Enregistre un classement (copies en lecture seule)."""
+        positions = positions.copy()
+        scores = scores.copy()
+        positions.setflags(write=False)
+        scores.setflags(write=False)
+        expires_at = None if self.ttl_seconds is None else self._clock() + self.ttl_seconds
+        with self._lock:
+            self._entries[key] = (expires_at, positions, scores)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Vide le cache (les compteurs sont conservés)."""
+        with self._lock:
+            self._entries.clear()
+
+    def reset_stats(self):
+        """Remet les compteurs à zéro (ex. après le pré-calcul des presets)."""
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Compteurs du cache : hits, misses, taux de hits et nombre d'entrées."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'entries': len(self._entries),
+            }
@@ -0,0 +1,549 @@
+"""
+🛰️ JOB INTELLIGENT - Service HTTP/JSON de recommandation
+
+Expose ``recommend_jobs`` (mêmes filtres, mêmes scores) hors de Streamlit.
+Les requêtes simultanées sont regroupées en micro-lots :
+    1. Les requêtes arrivées pendant la fenêtre de regroupement
+       (``batch_window_ms``, quelques millisecondes) forment un lot
+    2. Un seul ``vectorizer.transform`` pour tout le lot, puis un seul
+       produit creux profils x postings (matrice termes x offres de l'index
+       inversé) qui ne lit que les postings des termes des profils
+    3. Les filtres propres à chaque requête sont appliqués aux offres
+       scorées, et les meilleures sont re-scorées exactement : mêmes
+       scores et même ordre que ``recommend_jobs``
+    4. Pendant le calcul d'un lot, les requêtes suivantes s'accumulent :
+       plus la charge est forte, plus les lots sont gros
+
+Contre-pression : au-delà de ``max_pending`` requêtes en attente, le
+service répond 503 (avec ``Retry-After``) au lieu d'allonger la file.
+
+Routes :
+    POST /recommend   {"profile_text": "...", "n_recommendations": 10,
+                       "location_filter": "CA", "min_salary": 0,
+                       "experience_filter": null, "work_type_filter": null,
+                       "remote_only": false}
+    GET  /health      état et taille du modèle
+    GET  /metrics     taille des lots, file d'attente, latences
+
+Usage :
+    python service.py --model model/ --port 8765 --batch-window-ms 5
+    JOB_SERVICE_URL=http://127.0.0.1:8765 streamlit run app.py   # app client léger
+"""
+
+import argparse
+import asyncio
+import http.client
+import json
+import logging
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+import numpy as np
+import pandas as pd
+
+from batch import profile_filters
+from inverted_index import InvertedIndex, load_inverted_index, pruning_slack
+from metrics import RollingHistogram
+from recommender import candidate_rows, score_rows, top_k
+from result_cache import ResultCache, model_version
+from serving import load_serving_model, warm_up
+
+
+DEFAULT_PORT = 8765
+
+# Fenêtre de regroupement et taille maximale d'un lot
+BATCH_WINDOW_MS = 5.0
+MAX_BATCH = 64
+
+# Requêtes en attente au-delà desquelles le service répond 503
+MAX_PENDING = 1024
+
+MAX_RECOMMENDATIONS = 100
+MAX_BODY_BYTES = 64 * 1024
+
+logger = logging.getLogger("job_intelligent.service")
+
+
+class Overloaded(Exception):
+    """File d'attente pleine : la requête est refusée (HTTP 503)."""
+
+
+class BadRequest(Exception):
+    """Requête invalide (HTTP 400)."""
+
+
+def _filters(query):
+    """Arguments de filtre de ``recommend_jobs`` d'une requête validée."""
+    return {name: value for name, value in query.items()
+            if name not in ('profile_text', 'n_recommendations')}
+
+
+def parse_query(payload):
+    """
+    Valide le corps JSON d'une requête /recommend
+
+    Args:
+        payload (dict): Corps de la requête
+
+    Returns:
+        dict: profile_text, n_recommendations et filtres normalisés comme
+        les arguments de ``recommend_jobs`` ("Tous" = pas de filtre)
+
+    Raises:
+        BadRequest: Si un champ est absent ou invalide
+    """
+
+    if not isinstance(payload, dict):
+        raise BadRequest("Le corps doit être un objet JSON")
+    profile_text = payload.get('profile_text')
+    if not isinstance(profile_text, str) or not profile_text.strip():
+        raise BadRequest("'profile_text' doit être un texte non vide")
+
+    try:
+        n_recommendations = int(payload.get('n_recommendations', 10))
+        filters = profile_filters({
+            key: None if payload.get(key) == "Tous" else payload.get(key)
+            for key in ('location_filter', 'min_salary', 'experience_filter',
+                        'work_type_filter', 'remote_only')
+        })
+    except (TypeError, ValueError) as error:
+        raise BadRequest(f"Paramètre invalide : {error}")
+    if not 1 <= n_recommendations <= MAX_RECOMMENDATIONS:
+        raise BadRequest(f"'n_recommendations' doit être entre 1 et {MAX_RECOMMENDATIONS}")
+
+    return {'profile_text': profile_text, 'n_recommendations': n_recommendations, **filters}
+
+
+# ============================================================================
+# MICRO-LOTS
+# ============================================================================
+
+def batch_top_k(profile_vectors, term_matrix, tfidf_matrix, ks, rows_list):
+    """
+    Top-k exact de plusieurs profils, par un seul produit creux
+
+    ``profile_vectors @ term_matrix`` donne, pour chaque profil, le score de
+    chaque offre partageant au moins un terme avec lui. L'ordre des sommes
+    diffère du produit de la recherche exacte : les offres à moins de
+    la marge d'arrondi (``pruning_slack``) du k-ième score sont re-scorées avec ``score_rows``
+    pour garder exactement les scores et l'ordre de ``recommender.search``.
+
+    Args:
+        profile_vectors: Matrice TF-IDF (n_profils x n_features) des profils
+        term_matrix: Postings (n_features x n_offres), voir
+            ``InvertedIndex.term_matrix``
+        tfidf_matrix: Matrice TF-IDF CSR des emplois
+        ks (list): Nombre de résultats voulus pour chaque profil
+        rows_list (list): Positions candidates triées de chaque profil
+            (None = tout le corpus)
+
+    Returns:
+        list: (positions, scores) des meilleurs emplois de chaque profil
+    """
+
+    # Indices non triés : seules les offres retenues sont triées ensuite
+    # (profils dans le type des postings : pas de copie de term_matrix)
+    partial = (profile_vectors.astype(term_matrix.dtype) @ term_matrix).tocsr()
+    slack = pruning_slack(term_matrix.dtype)
+
+    results = []
+    for i, (k, rows) in enumerate(zip(ks, rows_list)):
+        start, end = partial.indptr[i], partial.indptr[i + 1]
+        matched = partial.indices[start:end].astype(np.int64)
+        scores = partial.data[start:end]
+
+        # Filtres de la requête : garder les offres candidates
+        if rows is not None:
+            rows = np.asarray(rows, dtype=np.int64)
+            found = np.minimum(np.searchsorted(rows, matched), max(len(rows) - 1, 0))
+            keep = rows[found] == matched if len(rows) else np.zeros(len(matched), dtype=bool)
+            matched, scores = matched[keep], scores[keep]
+
+        if len(matched) > k:
+            kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+            selected = np.sort(matched[scores >= kth - slack])
+        else:
+            # Moins de k offres partagent un terme : compléter par les
+            # premières candidates de score nul, comme la recherche exacte
+            pool = (np.arange(min(k + len(matched), tfidf_matrix.shape[0])) if rows is None
+                    else rows[:k + len(matched)])
+            padding = np.setdiff1d(pool, matched, assume_unique=True)[:k - len(matched)]
+            selected = np.sort(np.concatenate([matched, padding]))
+
+        exact = score_rows(profile_vectors[i], tfidf_matrix, selected)
+        best = top_k(exact, k)
+        results.append((selected[best], exact[best]))
+    return results
+
+
+class MicroBatcher:
+    """
+    Regroupe les requêtes simultanées en lots scorés ensemble
+
+    Les lots sont calculés l'un après l'autre dans un thread dédié : la
+    boucle asyncio reste libre d'accepter les requêtes suivantes.
+
+    Attributes:
+        model (tuple): Résultat de ``load_serving_model``
+        term_matrix: Postings (termes x offres), voir ``InvertedIndex.term_matrix``
+        batch_window_ms (float): Attente maximale pour compléter un lot
+        max_batch (int): Nombre maximal de requêtes par lot
+        max_pending (int): Requêtes en attente au-delà desquelles refuser
+        cache (ResultCache): Cache des classements (optionnel)
+    """
+
+    def __init__(self, model, term_matrix, batch_window_ms=BATCH_WINDOW_MS, max_batch=MAX_BATCH,
+                 max_pending=MAX_PENDING, cache=None):
+        self.model = model
+        self.term_matrix = term_matrix
+        self.batch_window_ms = batch_window_ms
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.cache = cache
+        self.latency = RollingHistogram()
+        self.batch_sizes = RollingHistogram()
+        self.requests = 0
+        self.rejected = 0
+        self._queue = None
+        self._task = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="micro-batch")
+
+    async def start(self):
+        self._queue = asyncio.Queue(self.max_pending)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        self._executor.shutdown(wait=False)
+
+    @property
+    def pending(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def recommend(self, query):
+        """
+        Recommande des emplois pour une requête (voir ``parse_query``)
+
+        Returns:
+            bytes: Réponse JSON ``{"n_results": ..., "results": [...]}``, avec
+            les colonnes des emplois et ``similarity_score``
+
+        Raises:
+            Overloaded: Si la file d'attente est pleine
+        """
+
+        start = time.perf_counter()
+        self.requests += 1
+
+        # Un classement en cache passe aussi par la file : ses résultats sont
+        # matérialisés avec ceux du lot, hors de la boucle asyncio
+        key = ranking = None
+        if self.cache is not None:
+            key = self.cache.key(query['profile_text'], self.model[0],
+                                 query['n_recommendations'], **_filters(query))
+            ranking = self.cache.get(key)
+
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((query, ranking, future))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise Overloaded()
+
+        positions, scores, body = await future
+        if key is not None and ranking is None:
+            self.cache.put(key, positions, scores)
+        self.latency.add((time.perf_counter() - start) * 1000)
+        return body
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+
+            # Compléter le lot pendant la fenêtre de regroupement
+            deadline = loop.time() + self.batch_window_ms / 1000
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            self.batch_sizes.add(len(batch))
+            try:
+                found = await loop.run_in_executor(
+                    self._executor, self._process, [(query, ranking) for query, ranking, _ in batch]
+                )
+            except Exception as error:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+            for (_, _, future), result in zip(batch, found):
+                if not future.done():
+                    future.set_result(result)
+
+    def _process(self, items):
+        """
+        Un lot : un transform et un produit creux pour les requêtes hors
+        cache, puis une seule lecture des emplois gagnants de tout le lot
+        """
+
+        vectorizer, tfidf_matrix, jobs, metadata, filter_index = self.model
+        rankings = [ranking for _, ranking in items]
+
+        missing = [i for i, ranking in enumerate(rankings) if ranking is None]
+        if missing:
+            queries = [items[i][0] for i in missing]
+
+            # Filtres résolus une fois par combinaison distincte du lot
+            candidates = {}
+            for query in queries:
+                filters = _filters(query)
+                signature = tuple(filters.values())
+                if signature not in candidates:
+                    candidates[signature] = (filter_index.candidate_rows(**filters) if filter_index is not None
+                                             else candidate_rows(jobs, **filters))
+            rows_list = [candidates[tuple(_filters(query).values())] for query in queries]
+            profile_vectors = vectorizer.transform([query['profile_text'] for query in queries])
+            ks = [query['n_recommendations'] for query in queries]
+            for i, found in zip(missing, batch_top_k(profile_vectors, self.term_matrix,
+                                                     tfidf_matrix, ks, rows_list)):
+                rankings[i] = found
+
+        # DataFrame des résultats de tout le lot, découpé par requête
+        positions = np.concatenate([ranking[0] for ranking in rankings]).astype(np.intp)
+        recommendations = jobs.take(positions)
+        recommendations['similarity_score'] = np.concatenate([ranking[1] for ranking in rankings])
+
+        # Une seule conversion JSON (valeurs manquantes -> null) pour le lot
+        records = json.loads(recommendations.to_json(orient='records'))
+
+        results = []
+        start = 0
+        for ranking_positions, ranking_scores in rankings:
+            end = start + len(ranking_positions)
+            body = json.dumps({'n_results': end - start, 'results': records[start:end]})
+            results.append((ranking_positions, ranking_scores, body.encode('utf-8')))
+            start = end
+        return results
+
+    def stats(self):
+        """Compteurs du service : requêtes, refus, file, lots et latences."""
+        return {
+            'requests': self.requests,
+            'rejected': self.rejected,
+            'pending': self.pending,
+            'batch_window_ms': self.batch_window_ms,
+            'max_batch': self.max_batch,
+            'batch_size': {name.replace('_ms', ''): value
+                           for name, value in self.batch_sizes.summary().items() if name != 'buckets'},
+            'latency': self.latency.summary(),
+            'cache': self.cache.stats() if self.cache is not None else None,
+        }
+
+
+# ============================================================================
+# SERVEUR HTTP
+# ============================================================================
+
+class RecommendationService:
+    """
+    Serveur HTTP/1.1 minimal (asyncio, sans dépendance) autour d'un MicroBatcher
+
+    Attributes:
+        batcher (MicroBatcher): Regroupement et calcul des requêtes
+        metadata (dict): Métadonnées du modèle servi
+    """
+
+    def __init__(self, batcher):
+        self.batcher = batcher
+        self.metadata = batcher.model[3]
+
+    async def serve(self, host="127.0.0.1", port=DEFAULT_PORT):
+        await self.batcher.start()
+        server = await asyncio.start_server(self._handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                # Requête tronquée ou mal formée : fermer la connexion
+                try:
+                    request_line = await reader.readline()
+                    if not request_line:
+                        break
+                    method, path, version = request_line.decode('latin-1').split()
+                    headers = {}
+                    while True:
+                        line = await reader.readline()
+                        if line in (b'\r\n', b'\n', b''):
+                            break
+                        name, _, value = line.decode('latin-1').partition(':')
+                        headers[name.strip().lower()] = value.strip()
+                    length = int(headers.get('content-length', 0))
+                except (asyncio.IncompleteReadError, ValueError):
+                    break
+
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                        {'error': "Corps de requête trop volumineux"}, keep_alive=False)
+                    break
+                try:
+                    body = await reader.readexactly(length) if length else b''
+                except asyncio.IncompleteReadError:
+                    break
+
+                status, payload, extra_headers = await self._route(method, path.split('?')[0], body)
+                keep_alive = (version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close')
+                await self._respond(writer, status, payload, keep_alive, extra_headers)
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, body):
+        if path == '/recommend' and method == 'POST':
+            try:
+                query = parse_query(json.loads(body or b'null'))
+                results = await self.batcher.recommend(query)
+            except (BadRequest, json.JSONDecodeError) as error:
+                return HTTPStatus.BAD_REQUEST, {'error': str(error)}, {}
+            except Overloaded:
+                return (HTTPStatus.SERVICE_UNAVAILABLE, {'error': "Service surchargé, réessayer"},
+                        {'Retry-After': '1'})
+            except Exception as error:
+                logger.exception("Échec de la requête /recommend")
+                return HTTPStatus.INTERNAL_SERVER_ERROR, {'error': f"Erreur interne : {error}"}, {}
+            return HTTPStatus.OK, results, {}
+        if path == '/health' and method == 'GET':
+            return HTTPStatus.OK, {
+                'status': 'ok',
+                'n_jobs': self.metadata.get('n_jobs'),
+                'model_version': model_version(self.metadata),
+            }, {}
+        if path == '/metrics' and method == 'GET':
+            return HTTPStatus.OK, self.batcher.stats(), {}
+        return HTTPStatus.NOT_FOUND, {'error': f"Route inconnue : {method} {path}"}, {}
+
+    @staticmethod
+    async def _respond(writer, status, payload, keep_alive=True, extra_headers=None):
+        body = payload if isinstance(payload, bytes) else json.dumps(payload, default=str).encode('utf-8')
+        headers = {
+            'Content-Type': 'application/json; charset=utf-8',
+            'Content-Length': str(len(body)),
+            'Connection': 'keep-alive' if keep_alive else 'close',
+            **(extra_headers or {}),
+        }
+        head = f"HTTP/1.1 {status.value} {status.phrase}\r\n" + "".join(
+            f"{name}: {value}\r\n" for name, value in headers.items()
+        )
+        writer.write(head.encode('latin-1') + b"\r\n" + body)
+        await writer.drain()
+
+
+# ============================================================================
+# CLIENT (APP STREAMLIT EN CLIENT LÉGER)
+# ============================================================================
+
+class RecommendationClient:
+    """
+    Client du service : même interface que ``recommend_jobs`` pour l'app
+
+    Attributes:
+        base_url (str): URL du service (ex. http://127.0.0.1:8765)
+        timeout (float): Délai maximal d'une requête (secondes)
+    """
+
+    def __init__(self, base_url, timeout=30.0):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def recommend(self, profile_text, n_recommendations=10, location_filter=None,
+                  min_salary=0, experience_filter=None, work_type_filter=None,
+                  remote_only=False):
+        """
+        Recommande des emplois via le service
+
+        Returns:
+            pd.DataFrame: Emplois recommandés triés par score de similarité
+
+        Raises:
+            RuntimeError: Si le service refuse la requête ou est injoignable
+        """
+
+        payload = json.dumps({
+            'profile_text': profile_text,
+            'n_recommendations': n_recommendations,
+            'location_filter': location_filter,
+            'min_salary': min_salary,
+            'experience_filter': experience_filter,
+            'work_type_filter': work_type_filter,
+            'remote_only': remote_only,
+        }).encode('utf-8')
+        request = urllib.request.Request(
+            f"{self.base_url}/recommend", data=payload, method='POST',
+            headers={'Content-Type': 'application/json'}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                results = json.load(response)['results']
+        except urllib.error.HTTPError as error:
+            try:
+                message = json.loads(error.read() or b'{}').get('error', error.reason)
+            except (ValueError, AttributeError, OSError):
+                # Corps absent ou non JSON (ex. 503 d'un proxy)
+                message = error.reason
+            raise RuntimeError(f"Service de recommandation : {message}") from error
+        except urllib.error.URLError as error:
+            raise RuntimeError(f"Service de recommandation injoignable : {error.reason}") from error
+        except (TimeoutError, OSError, http.client.HTTPException) as error:
+            # Délai dépassé ou connexion coupée pendant la lecture de la réponse
+            raise RuntimeError(f"Service de recommandation injoignable : {error}") from error
+        except (ValueError, KeyError) as error:
+            raise RuntimeError(f"Service de recommandation : réponse invalide ({error})") from error
+        return pd.DataFrame(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Service HTTP/JSON de recommandation")
+    parser.add_argument('--model', default='model')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--batch-window-ms', type=float, default=BATCH_WINDOW_MS,
+                        help="Attente maximale pour compléter un lot")
+    parser.add_argument('--max-batch', type=int, default=MAX_BATCH)
+    parser.add_argument('--max-pending', type=int, default=MAX_PENDING,
+                        help="Requêtes en attente au-delà desquelles répondre 503")
+    parser.add_argument('--no-cache', action='store_true', help="Désactiver le cache des résultats")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    model = load_serving_model(args.model)
+    warm_up(model)
+    # Postings de l'index inversé (mappés) s'il est construit, sinon transposée en mémoire
+    index = load_inverted_index(args.model) or InvertedIndex.from_matrix(model[1])
+    cache = None if args.no_cache else ResultCache(model_version(model[3]))
+    batcher = MicroBatcher(model, index.term_matrix(), args.batch_window_ms, args.max_batch,
+                           args.max_pending, cache=cache)
+    print(f"✅ Modèle chargé en {time.perf_counter() - start:.1f} s ({model[1].shape[0]:,} offres)")
+    print(f"🛰️ Service sur http://{args.host}:{args.port} (fenêtre {args.batch_window_ms} ms, "
+          f"lots de {args.max_batch} max)")
+
+    try:
+        asyncio.run(RecommendationService(batcher).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+🚀 JOB INTELLIGENT - Chargement du modèle pour le service
+
+Chargement partagé du modèle, indépendant de Streamlit :
+    - ``model_fingerprint`` : empreinte (taille + mtime) des fichiers de
+      ``model/``, utilisée pour invalider le cache quand le modèle change
+    - ``load_serving_model`` : charge le format mappé en mémoire, ou les
+      anciens fichiers .pkl (convertis en table compacte), avec l'encodeur
+      léger des profils à la place du TfidfVectorizer (query_encoder.py)
+    - ``warm_up`` : exécute une requête factice (imports, regex, pages)
+    - ``model_memory_usage`` : mémoire occupée par le modèle dans le processus
+
+Pré-chauffage avant de lancer le serveur :
+    python serving.py model/ && streamlit run app.py
+"""
+
+import hashlib
+import mmap
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from filter_index import FilterIndex
+from model_store import CategoryColumn, JobTable, TextColumn, has_manifest, load_legacy_model, load_model
+from query_encoder import QueryEncoder
+from recommender import recommend_jobs
+
+
+WARMUP_PROFILE = "data analyst python sql"
+
+
+def model_fingerprint(model_dir):
+    """
+    Empreinte des fichiers du modèle (chemin, taille, date de modification)
+
+    Ne lit que les métadonnées des fichiers : assez rapide pour être
+    recalculée à chaque rerun Streamlit.
+
+    Args:
+        model_dir (str): Dossier du modèle
+
+    Returns:
+        str: Empreinte hexadécimale
+    """
+
+    digest = hashlib.sha1()
+    for root, dirs, files in os.walk(model_dir):
+        # Fichiers en cours d'écriture par une mise à jour (update_model.py)
+        dirs[:] = sorted(name for name in dirs if not name.endswith('.tmp'))
+        for name in sorted(files):
+            if name.endswith('.tmp') or name.startswith('.'):
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                # Supprimé par une compaction pendant le parcours
+                continue
+            digest.update(f"{os.path.relpath(path, model_dir)}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()
+
+
+def load_serving_model(model_dir):
+    """
+    Charge le modèle prêt à servir, quel que soit son format
+
+    Args:
+        model_dir (str): Dossier du modèle
+
+    Returns:
+        tuple: (vectorizer, tfidf_matrix, jobs, metadata, filter_index)
+            - vectorizer est un QueryEncoder si ses réglages sont reproduits
+    """
+
+    # Format versionné : tableaux mappés en mémoire, aucun unpickling ni
+    # import de scikit-learn
+    if has_manifest(model_dir):
+        return load_model(model_dir, encoder=True)
+
+    # Ancien format : quatre fichiers pickle. Le DataFrame (descriptions
+    # complètes, colonnes object) est remplacé par une table compacte
+    vectorizer, tfidf_matrix, jobs_df, metadata = load_legacy_model(model_dir)
+    try:
+        vectorizer = QueryEncoder.from_vectorizer(vectorizer)
+    except ValueError:
+        pass
+    filter_index = FilterIndex.from_dataframe(jobs_df)
+    jobs = JobTable.from_dataframe(jobs_df)
+    return vectorizer, tfidf_matrix, jobs, metadata, filter_index
+
+
+def _touch(array):
+    """Lit toutes les pages d'un tableau mappé pour les mettre en cache disque."""
+    if _is_mapped(array) and array.size:
+        step = max(1, 4096 // max(1, array.itemsize))
+        np.asarray(array).ravel()[::step].sum()
+
+
+def warm_up(model, touch_pages=False):
+    """
+    Exécute une requête factice pour que la première vraie requête soit rapide
+
+    Args:
+        model (tuple): Résultat de ``load_serving_model``
+        touch_pages (bool): Lire aussi toutes les pages des tableaux mappés
+
+    Returns:
+        float: Durée de la requête factice (secondes)
+    """
+
+    vectorizer, tfidf_matrix, jobs, metadata, filter_index = model
+
+    if touch_pages:
+        for array in _arrays(model):
+            _touch(array)
+
+    start = time.perf_counter()
+    recommend_jobs(WARMUP_PROFILE, jobs, vectorizer, tfidf_matrix,
+                   n_recommendations=1, filter_index=filter_index)
+    return time.perf_counter() - start
+
+
+def _arrays(model):
+    """Tous les tableaux NumPy détenus par le modèle."""
+    vectorizer, tfidf_matrix, jobs, metadata, filter_index = model
+
+    # Instantané mis à jour : une matrice par segment (SegmentedMatrix)
+    arrays = []
+    for part in getattr(tfidf_matrix, 'parts', [tfidf_matrix]):
+        arrays.extend([part.data, part.indices, part.indptr])
+    idf = getattr(vectorizer, 'idf_', None)
+    if idf is not None:
+        arrays.append(idf)
+
+    # Instantané mis à jour : une table par segment (SegmentedJobTable)
+    for table in getattr(jobs, 'tables', [jobs]):
+        if isinstance(table, pd.DataFrame):
+            continue
+        for values in table.data.values():
+            if isinstance(values, TextColumn):
+                arrays.extend([values.offsets, values.blob, values.nulls])
+            elif isinstance(values, CategoryColumn):
+                arrays.append(values.codes)
+            else:
+                arrays.append(values)
+
+    for index in getattr(filter_index, 'indexes', [filter_index]):
+        for postings in index.postings.values():
+            arrays.extend([postings.offsets, postings.rows])
+        for optional in (index.salary_sorted, index.salary_rows, index.remote_rows):
+            if optional is not None:
+                arrays.append(optional)
+    return arrays
+
+
+def _is_mapped(array):
+    """Indique si un tableau est une vue sur un fichier mappé en mémoire."""
+    while array is not None:
+        if isinstance(array, (np.memmap, mmap.mmap)):
+            return True
+        array = getattr(array, 'base', None)
+    return False
+
+
+def process_rss_bytes():
+    """Mémoire résidente du processus (octets), ou None si indisponible."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def model_memory_usage(model):
+    """
+    Mémoire occupée par le modèle dans ce processus
+
+    Args:
+        model (tuple): Résultat de ``load_serving_model``
+
+    Returns:
+        dict: Octets privés au processus (``private_bytes``), octets mappés
+        depuis le disque et partagés entre processus (``mapped_bytes``), et
+        mémoire résidente totale du processus (``process_rss_bytes``)
+    """
+
+    private_bytes = 0
+    mapped_bytes = 0
+    for array in _arrays(model):
+        if _is_mapped(array):
+            mapped_bytes += array.nbytes
+        else:
+            private_bytes += array.nbytes
+
+    jobs = model[2]
+    if isinstance(jobs, pd.DataFrame):
+        private_bytes += int(jobs.memory_usage(deep=True).sum())
+
+    return {
+        'private_bytes': private_bytes,
+        'mapped_bytes': mapped_bytes,
+        'process_rss_bytes': process_rss_bytes(),
+    }
+
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else "model"
+
+    start = time.perf_counter()
+    model = load_serving_model(target)
+    load_seconds = time.perf_counter() - start
+    query_seconds = warm_up(model, touch_pages=True)
+    memory = model_memory_usage(model)
+
+    print(f"✅ Modèle chargé en {load_seconds * 1000:.0f} ms ({len(model[2]):,} emplois)")
+    print(f"✅ Requête de pré-chauffage : {query_seconds * 1000:.1f} ms")
+    print(f"💾 Mémoire privée : {memory['private_bytes'] / 1e6:,.1f} MB | "
+          f"mappée (partagée) : {memory['mapped_bytes'] / 1e6:,.1f} MB")
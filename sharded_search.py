@@ -0,0 +1,359 @@
+"""
+🧩 JOB INTELLIGENT - Recherche exacte répartie sur plusieurs cœurs
+
+``recommend_jobs`` score toutes les offres candidates sur un seul cœur : la
+latence d'une requête croît avec la taille du corpus. ``ShardedSearcher``
+découpe la matrice TF-IDF en N tranches de lignes contiguës (même nombre de
+poids non nuls par tranche) et score chaque requête en parallèle :
+
+    1. Les lignes candidates des filtres (triées) sont réparties entre les
+       tranches par recherche dichotomique : chaque tranche ne score que ses
+       propres candidats
+    2. Chaque tranche calcule son top-k avec ``recommender.search``
+    3. Les N top-k sont fusionnés (score décroissant, puis position) : même
+       classement et mêmes scores que la recherche exacte
+
+Un instantané segmenté (voir update_model.py) est découpé partie par
+partie : la base et chaque segment restent mappés, les lignes supprimées
+sont écartées dans chaque tranche.
+
+Deux pools de workers persistants :
+    - ``thread``  : les tranches sont des vues de la matrice (mappée ou non),
+      le produit creux de SciPy libère le GIL
+    - ``process`` : la matrice est copiée une fois en mémoire partagée
+      (``multiprocessing.shared_memory``), lue sans copie par tous les
+      workers ; utile si le GIL limite les threads
+
+Le plus rapide dépend de la machine et du corpus : le comparer avec
+
+    python sharded_search.py model/ --shards 1 2 4 8 --backend thread process
+
+puis l'activer dans l'app (``JOB_SEARCH_SHARDS=4 JOB_SEARCH_BACKEND=thread``)
+ou le mesurer avec ``benchmark.py run --searcher sharded``.
+"""
+
+import argparse
+import multiprocessing
+import os
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import scipy.sparse as sp
+
+from recommender import merge_top_k, search_live
+from recommender import search as exact_search
+
+
+BACKENDS = ('thread', 'process')
+DEFAULT_BACKEND = 'thread'
+
+# En dessous de ce nombre de candidats, répartir coûte plus que scorer
+# directement (filtres très sélectifs)
+MIN_PARALLEL_ROWS = 20_000
+
+
+def shard_bounds(indptr, n_shards):
+    """
+    Bornes de N tranches de lignes contiguës de poids (nnz) équilibrés
+
+    Args:
+        indptr (np.ndarray): indptr de la matrice CSR
+        n_shards (int): Nombre de tranches voulu
+
+    Returns:
+        np.ndarray: Bornes croissantes ``[0, ..., n_rows]`` (tranches non vides)
+    """
+
+    n_rows = len(indptr) - 1
+    targets = np.linspace(0, indptr[-1], n_shards + 1)
+    bounds = np.searchsorted(indptr, targets[1:-1], side='left')
+    return np.unique(np.concatenate([[0], np.clip(bounds, 0, n_rows), [n_rows]])).astype(np.int64)
+
+
+def _shard(tfidf_matrix, start, end):
+    """Vue CSR des lignes ``start:end`` (data et indices partagés)."""
+    indptr = np.asarray(tfidf_matrix.indptr)
+    low, high = indptr[start], indptr[end]
+    return sp.csr_matrix(
+        (tfidf_matrix.data[low:high], tfidf_matrix.indices[low:high], indptr[start:end + 1] - low),
+        shape=(end - start, tfidf_matrix.shape[1]), copy=False
+    )
+
+
+# ============================================================================
+# WORKERS (processus)
+# ============================================================================
+
+# Tranches ouvertes dans un processus worker : {numéro: (matrice, blocs partagés, lignes supprimées)}
+_WORKER_SHARDS = {}
+
+
+def _attach(spec):
+    """Tableau NumPy lu dans un bloc de mémoire partagée existant."""
+    block = shared_memory.SharedMemory(name=spec['name'])
+    return np.ndarray(spec['shape'], dtype=spec['dtype'], buffer=block.buf), block
+
+
+def _init_worker(shard_specs):
+    """Ouvre toutes les tranches en mémoire partagée (une fois par worker)."""
+    for number, spec in enumerate(shard_specs):
+        arrays, blocks = {}, []
+        for name in ('data', 'indices', 'indptr'):
+            arrays[name], block = _attach(spec[name])
+            blocks.append(block)
+        matrix = sp.csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']),
+                               shape=tuple(spec['shape']), copy=False)
+        _WORKER_SHARDS[number] = (matrix, blocks, spec['dead'])
+
+
+def _search_worker_shard(number, profile_vector, k, rows):
+    """Top-k d'une tranche dans un processus worker (positions locales)."""
+    matrix, _, dead = _WORKER_SHARDS[number]
+    return search_live(profile_vector, matrix, k, rows, dead)
+
+
+def _share(array):
+    """Copie un tableau dans un nouveau bloc de mémoire partagée."""
+    array = np.ascontiguousarray(array)
+    block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+    return block, {'name': block.name, 'shape': array.shape, 'dtype': array.dtype.str}
+
+
+def _release(executor, blocks):
+    """Arrête le pool et libère la mémoire partagée (appelé une seule fois)."""
+    executor.shutdown(wait=True, cancel_futures=True)
+    for block in blocks:
+        block.close()
+        block.unlink()
+
+
+# ============================================================================
+# MOTEUR
+# ============================================================================
+
+class ShardedSearcher:
+    """
+    Recherche exacte parallèle sur des tranches de lignes de la matrice TF-IDF
+
+    Même contrat que ``recommender.search`` : utilisable comme ``searcher``
+    de ``recommend_jobs`` (cache des résultats autorisé).
+
+    Attributes:
+        n_shards (int): Nombre de tranches (une de plus par segment delta)
+        backend (str): 'thread' ou 'process'
+        bounds (np.ndarray): Première position de chaque tranche, puis n_rows
+        min_parallel_rows (int): Candidats en dessous desquels la recherche
+            se fait directement, sans les workers
+    """
+
+    # Mêmes résultats que la recherche exacte (cache des résultats autorisé)
+    exact = True
+
+    def __init__(self, tfidf_matrix, n_shards=None, backend=DEFAULT_BACKEND,
+                 min_parallel_rows=MIN_PARALLEL_ROWS):
+        if backend not in BACKENDS:
+            raise ValueError(f"Backend inconnu: {backend!r} (choix : {', '.join(BACKENDS)})")
+        self.backend = backend
+        self.min_parallel_rows = min_parallel_rows
+        n_shards = max(1, n_shards or os.cpu_count() or 1)
+
+        # Instantané segmenté : tranches de la base et de chaque segment
+        parts = getattr(tfidf_matrix, 'parts', None)
+        if parts is None:
+            parts, dead = [sp.csr_matrix(tfidf_matrix, copy=False)], [np.empty(0, dtype=np.int64)]
+        else:
+            dead = tfidf_matrix.dead
+        total_nnz = max(1, sum(part.nnz for part in parts))
+
+        self._shards, self._dead, starts = [], [], []
+        position = 0
+        for part, part_dead in zip(parts, dead):
+            bounds = shard_bounds(part.indptr, max(1, round(n_shards * part.nnz / total_nnz)))
+            for start, end in zip(bounds[:-1], bounds[1:]):
+                shard_dead = part_dead[(part_dead >= start) & (part_dead < end)] - start
+                self._shards.append(_shard(part, start, end))
+                self._dead.append(shard_dead)
+                starts.append(position)
+                position += int(end - start) - len(shard_dead)
+        self.n_rows = position
+        self.bounds = np.array([*starts, position], dtype=np.int64)
+        self.n_shards = len(self._shards)
+
+        if backend == 'thread':
+            self._executor = ThreadPoolExecutor(max_workers=min(n_shards, self.n_shards),
+                                                thread_name_prefix="sharded-search")
+            blocks = []
+        else:
+            blocks, specs = [], []
+            for shard, shard_dead in zip(self._shards, self._dead):
+                spec = {'shape': shard.shape, 'dead': shard_dead}
+                for name in ('data', 'indices', 'indptr'):
+                    block, spec[name] = _share(getattr(shard, name))
+                    blocks.append(block)
+                specs.append(spec)
+            # spawn : pas de fork d'un processus serveur multi-thread (Streamlit)
+            self._executor = ProcessPoolExecutor(
+                max_workers=min(n_shards, self.n_shards), mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker, initargs=(specs,)
+            )
+        self._finalizer = weakref.finalize(self, _release, self._executor, blocks)
+
+    def _submit(self, number, profile_vector, k, rows):
+        if self.backend == 'thread':
+            return self._executor.submit(search_live, profile_vector, self._shards[number], k, rows,
+                                         self._dead[number])
+        return self._executor.submit(_search_worker_shard, number, profile_vector, k, rows)
+
+    def search(self, profile_vector, tfidf_matrix, k, rows=None):
+        """
+        Recherche exacte des k emplois les plus similaires, tranches en parallèle
+
+        Args:
+            profile_vector: Vecteur TF-IDF (1 x n_features) du profil
+            tfidf_matrix: Matrice TF-IDF CSR des emplois (celle des tranches)
+            k (int): Nombre de résultats voulus
+            rows (np.ndarray): Positions candidates triées (None = tout)
+
+        Returns:
+            tuple: (positions, scores) des k meilleurs emplois, triés
+        """
+
+        n_candidates = self.n_rows if rows is None else len(rows)
+        if k <= 0 or n_candidates == 0:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float64)
+        if self.n_shards == 1 or n_candidates < self.min_parallel_rows:
+            return exact_search(profile_vector, tfidf_matrix, k, rows)
+
+        profile_vector = sp.csr_matrix(profile_vector)
+        if rows is not None:
+            rows = np.asarray(rows)
+            cuts = np.searchsorted(rows, self.bounds)
+
+        futures = []
+        for number, start in enumerate(self.bounds[:-1]):
+            shard_rows = None
+            if rows is not None:
+                # Filtres poussés dans la tranche : ses candidats, en positions locales
+                shard_rows = rows[cuts[number]:cuts[number + 1]] - start
+                if len(shard_rows) == 0:
+                    continue
+            futures.append((start, self._submit(number, profile_vector, k, shard_rows)))
+
+        results = []
+        for start, future in futures:
+            found, scores = future.result()
+            results.append((found + start, scores))
+        return merge_top_k(results, k)
+
+    def close(self):
+        """Arrête les workers et libère la mémoire partagée."""
+        self._finalizer()
+
+
+def load_sharded_searcher(tfidf_matrix, n_shards, backend=DEFAULT_BACKEND):
+    """ShardedSearcher si plus d'une tranche est demandée, sinon None."""
+    if not n_shards or n_shards <= 1:
+        return None
+    return ShardedSearcher(tfidf_matrix, n_shards, backend)
+
+
+# ============================================================================
+# COMPARAISON DES RÉGLAGES
+# ============================================================================
+
+def compare_settings(tfidf_matrix, queries, settings, k=10, candidate_fraction=0.3, seed=0):
+    """
+    Parité et latence de chaque réglage (backend, tranches) face à la recherche exacte
+
+    Chaque requête est mesurée sans filtre puis avec une fraction des
+    lignes comme candidats (filtres de la sidebar).
+
+    Args:
+        tfidf_matrix: Matrice TF-IDF CSR
+        queries: Profils TF-IDF (n_requêtes x n_features)
+        settings (list): Couples (backend, n_shards)
+        k (int): Taille du top-k
+        candidate_fraction (float): Fraction des lignes candidates filtrées
+
+    Returns:
+        list: Un dict par réglage (backend, shards, mismatches, ms/requête
+        sans et avec filtre) ; la recherche exacte mono-cœur d'abord
+    """
+
+    rng = np.random.default_rng(seed)
+    n_rows = tfidf_matrix.shape[0]
+    filtered = np.flatnonzero(rng.random(n_rows) < candidate_fraction)
+    cases = [(queries[row], rows) for row in range(queries.shape[0]) for rows in (None, filtered)]
+    expected = [exact_search(query, tfidf_matrix, k, rows) for query, rows in cases]
+
+    def _measure(engine):
+        elapsed, mismatches = {'all': 0.0, 'filtered': 0.0}, 0
+        for (query, rows), (positions, scores) in zip(cases, expected):
+            start = time.perf_counter()
+            found, found_scores = engine(query, tfidf_matrix, k, rows)
+            elapsed['all' if rows is None else 'filtered'] += time.perf_counter() - start
+            mismatches += not (np.array_equal(found, positions) and np.array_equal(found_scores, scores))
+        return {
+            'mismatches': mismatches,
+            'ms_all': elapsed['all'] * 1000 / max(1, queries.shape[0]),
+            'ms_filtered': elapsed['filtered'] * 1000 / max(1, queries.shape[0]),
+        }
+
+    results = [{'backend': 'exact', 'shards': 1, **_measure(exact_search)}]
+    for backend, n_shards in settings:
+        searcher = ShardedSearcher(tfidf_matrix, n_shards, backend, min_parallel_rows=0)
+        try:
+            searcher.search(queries[0], tfidf_matrix, k)
+            results.append({'backend': backend, 'shards': searcher.n_shards, **_measure(searcher.search)})
+        finally:
+            searcher.close()
+    return results
+
+
+def main():
+    from model_store import load_model
+
+    parser = argparse.ArgumentParser(description="Recherche exacte répartie : parité et latence")
+    parser.add_argument('model_dir', nargs='?', default="model")
+    parser.add_argument('--shards', type=int, nargs='+', default=[2, 4, os.cpu_count() or 1])
+    parser.add_argument('--backend', nargs='+', choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument('--queries', type=int, default=50, help="Offres utilisées comme profils")
+    parser.add_argument('--repeat', type=int, default=1,
+                        help="Répéter les lignes de la matrice (simuler un plus grand corpus)")
+    parser.add_argument('--k', type=int, default=10)
+    args = parser.parse_args()
+
+    _, tfidf_matrix, _, _, _ = load_model(args.model_dir, encoder=True)
+    if args.repeat > 1:
+        tfidf_matrix = sp.vstack([tfidf_matrix.tocsr()] * args.repeat, format='csr')
+    rng = np.random.default_rng(0)
+    sample = np.sort(rng.choice(tfidf_matrix.shape[0], min(args.queries, tfidf_matrix.shape[0]), replace=False))
+    queries = tfidf_matrix[sample]
+
+    settings = [(backend, n_shards) for backend in args.backend for n_shards in sorted(set(args.shards))]
+    print(f"{tfidf_matrix.shape[0]:,} offres, {tfidf_matrix.nnz:,} poids, {os.cpu_count()} cœur(s)")
+    results = compare_settings(tfidf_matrix, queries, settings, args.k)
+
+    print(f"{'backend':>8} {'tranches':>8} {'ms/req':>8} {'filtré':>8} {'accél.':>7} {'parité':>8}")
+    baseline = results[0]['ms_all']
+    for result in results:
+        print(f"{result['backend']:>8} {result['shards']:>8} {result['ms_all']:>8.2f} "
+              f"{result['ms_filtered']:>8.2f} {baseline / max(result['ms_all'], 1e-9):>6.2f}x "
+              f"{'✅' if not result['mismatches'] else '❌ ' + str(result['mismatches']):>8}")
+
+    best = min(results, key=lambda result: result['ms_all'])
+    if any(result['mismatches'] for result in results):
+        print("❌ Résultats différents de la recherche exacte")
+    elif best['backend'] == 'exact':
+        print("✅ La recherche mono-cœur reste la plus rapide sur cette machine (JOB_SEARCH_SHARDS=0)")
+    else:
+        print(f"✅ Réglage le plus rapide : JOB_SEARCH_SHARDS={best['shards']} "
+              f"JOB_SEARCH_BACKEND={best['backend']}")
+
+
+if __name__ == "__main__":
+    main()
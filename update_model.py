@@ -0,0 +1,368 @@
+"""
+🔄 JOB INTELLIGENT - Mises à jour incrémentales du modèle
+
+Les nouvelles offres LinkedIn arrivent chaque jour : au lieu de ré-entraîner
+tout le modèle, chaque livraison devient un segment delta :
+    - les offres ouvertes sont vectorisées avec le vocabulaire et l'idf
+      figés du modèle, et écrites dans ``model/segments/<n>/``
+    - les offres fermées (``closed_time`` renseigné) et les offres
+      republiées deviennent des tombstones : leur ancienne ligne disparaît
+      de l'instantané servi
+    - si le modèle a été construit avec le regroupement des quasi-doublons,
+      seul un représentant par groupe de la livraison est écrit ; la
+      compaction regroupe aussi les doublons entre livraisons
+
+Le manifeste est remplacé en dernier, atomiquement : l'application charge
+toujours un instantané complet (base + segments listés), jamais un segment
+à moitié écrit.
+
+La compaction (tâche de fond, ex. cron nocturne) fusionne la base et les
+segments en une nouvelle base ``model/generations/<n>/`` entièrement mappée
+en mémoire, et recalcule l'idf sur les offres vivantes (vocabulaire figé).
+
+Usage :
+    python update_model.py apply model/ livraison/     # dossier au format dataset/
+    python update_model.py compact model/
+"""
+
+import argparse
+import os
+import shutil
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.preprocessing import normalize
+
+from model_store import (TOMBSTONES_FILE, ModelWriter, load_model, load_vectorizer,
+                         matrix_options, read_manifest, write_manifest)
+from near_duplicates import find_near_duplicates
+from prepare_model import CHUNK_SIZE, iter_jobs, read_aggregates
+
+
+SEGMENTS_DIR = "segments"
+GENERATIONS_DIR = "generations"
+LOCK_FILE = ".update.lock"
+
+# Au-delà de ce nombre de segments, compacter (chargement plus lent)
+MAX_SEGMENTS = 8
+
+# Positions relues par le contrôle de l'instantané publié
+CHECK_POSITIONS = 1000
+
+# Fichiers d'une base écrite par save_model à la racine de model/
+ROOT_BASE_DIRS = ("vectorizer", "matrix", "jobs", "filters", "stats")
+
+
+@contextmanager
+def update_lock(model_dir):
+    """Empêche deux mises à jour simultanées du même modèle."""
+    path = os.path.join(model_dir, LOCK_FILE)
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        raise RuntimeError(f"Mise à jour déjà en cours ({path}) ; supprimer ce fichier si elle a échoué")
+    os.write(fd, str(os.getpid()).encode())
+    os.close(fd)
+    try:
+        yield
+    finally:
+        os.remove(path)
+
+
+def closed_job_ids(dataset_dir, chunk_size=CHUNK_SIZE):
+    """job_id des offres fermées (``closed_time`` renseigné) d'une livraison."""
+    path = os.path.join(dataset_dir, 'job_postings.csv')
+    if 'closed_time' not in pd.read_csv(path, nrows=0).columns:
+        return np.empty(0, dtype=np.int64)
+    closed = [
+        chunk.loc[chunk['closed_time'].notna(), 'job_id'].to_numpy(dtype=np.int64)
+        for chunk in pd.read_csv(path, usecols=['job_id', 'closed_time'], chunksize=chunk_size)
+    ]
+    return np.concatenate(closed) if closed else np.empty(0, dtype=np.int64)
+
+
+# ============================================================================
+# SEGMENTS DELTA
+# ============================================================================
+
+def dedup_threshold(manifest):
+    """Seuil des quasi-doublons du modèle (None si la construction les garde tous)."""
+    return manifest['metadata'].get('near_duplicates', {}).get('threshold')
+
+
+def apply_delta(model_dir, dataset_dir, chunk_size=CHUNK_SIZE, expired_ids=()):
+    """
+    Ajoute une livraison d'offres comme segment delta
+
+    Args:
+        model_dir (str): Dossier du modèle (format mappé en mémoire)
+        dataset_dir (str): Livraison au format du dataset LinkedIn
+            (job_postings.csv, et optionnellement job_skills.csv, ...)
+        chunk_size (int): Nombre d'offres par paquet
+        expired_ids (iterable): job_id expirés supplémentaires
+
+    Returns:
+        dict: Instantané publié, offres ajoutées, offres fermées, segments
+    """
+
+    with update_lock(model_dir):
+        manifest = read_manifest(model_dir)
+        snapshot = manifest.get('snapshot', 0) + 1
+        vectorizer = load_vectorizer(os.path.join(model_dir, manifest.get('base', '.')), manifest)
+
+        closed = np.union1d(closed_job_ids(dataset_dir, chunk_size),
+                            np.asarray(list(expired_ids), dtype=np.int64))
+
+        # Segment écrit dans un dossier temporaire, renommé une fois complet
+        name = f"{SEGMENTS_DIR}/{snapshot:06d}"
+        segment_dir = os.path.join(model_dir, name)
+        tmp_dir = f"{segment_dir}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        aggregates = read_aggregates(dataset_dir, chunk_size)
+
+        def open_chunks():
+            for texts, jobs in iter_jobs(dataset_dir, *aggregates, chunk_size=chunk_size):
+                is_open = ~jobs['job_id'].isin(closed).to_numpy()
+                if is_open.any():
+                    yield ([text for text, keep in zip(texts, is_open) if keep],
+                           jobs[is_open].reset_index(drop=True))
+
+        # Quasi-doublons de la livraison : un représentant par groupe
+        chunks = open_chunks()
+        segment_metadata = {'segment': name, 'created_at': pd.Timestamp.now().isoformat()}
+        duplicates = None
+        threshold = dedup_threshold(manifest)
+        if threshold:
+            duplicates = find_near_duplicates((jobs for _, jobs in open_chunks()), threshold)
+            chunks = duplicates.filter_chunks(open_chunks())
+            segment_metadata['near_duplicates'] = {'threshold': threshold, 'removed': duplicates.n_hidden}
+
+        writer = ModelWriter(tmp_dir, vectorizer, **matrix_options(manifest))
+        added = []
+        for texts, jobs in chunks:
+            writer.append(vectorizer.transform(texts), jobs)
+            added.append(jobs['job_id'].to_numpy(dtype=np.int64))
+        added = np.concatenate(added) if added else np.empty(0, dtype=np.int64)
+        writer.close(segment_metadata)
+
+        # Tombstones : offres fermées + anciennes versions des offres republiées
+        # (les offres masquées comme doublons remplacent aussi leurs anciennes versions)
+        replaced = duplicates.job_ids if duplicates is not None else added
+        np.save(os.path.join(tmp_dir, TOMBSTONES_FILE), np.union1d(closed, replaced))
+        os.replace(tmp_dir, segment_dir)
+
+        # Publication de l'instantané : remplacement atomique du manifeste
+        manifest['segments'] = [*manifest.get('segments', []), name]
+        manifest['snapshot'] = snapshot
+        manifest['updated_at'] = pd.Timestamp.now().isoformat()
+        write_manifest(model_dir, manifest)
+
+    return {'snapshot': snapshot, 'added': len(added), 'closed': len(closed),
+            'duplicates': duplicates.n_hidden if duplicates is not None else 0,
+            'segments': len(manifest['segments'])}
+
+
+def check_snapshot(model_dir, n_positions=CHECK_POSITIONS, seed=0):
+    """
+    Relit l'instantané publié et contrôle ``jobs.take`` sur des positions répétées
+
+    Les lots de batch.py et du service concatènent les positions de plusieurs
+    profils : une même offre y revient, dans le désordre et à cheval sur la
+    base et les segments.
+
+    Args:
+        model_dir (str): Dossier du modèle
+        n_positions (int): Nombre de positions tirées (chacune demandée deux fois)
+        seed (int): Graine du tirage
+
+    Returns:
+        dict: n_positions et mismatches (positions dont la ligne lue ne
+        correspond pas à la colonne job_id de l'instantané)
+    """
+
+    _, _, jobs, _, _ = load_model(model_dir)
+    if not len(jobs):
+        return {'n_positions': 0, 'mismatches': []}
+    rng = np.random.default_rng(seed)
+    # Première et dernière ligne de la base et de chaque segment, plus un tirage
+    starts = getattr(jobs, 'starts', np.array([0, len(jobs)]))
+    edges = np.clip(np.concatenate([starts[:-1], starts[1:] - 1]), 0, len(jobs) - 1)
+    sample = np.concatenate([edges, rng.integers(0, len(jobs), n_positions // 2)])
+    positions = rng.permutation(np.concatenate([sample, sample]))
+    frame = jobs.take(positions)
+    expected = jobs['job_id'].to_numpy()[positions]
+    wrong = (frame.index.to_numpy() != positions) | (frame['job_id'].to_numpy() != expected)
+    return {'n_positions': len(positions), 'mismatches': np.unique(positions[wrong]).tolist()}
+
+
+# ============================================================================
+# COMPACTION
+# ============================================================================
+
+def refresh_idf(vectorizer, tfidf_matrix):
+    """
+    Recalcule l'idf sur les lignes de la matrice, vocabulaire figé
+
+    Les poids sont ramenés à tf (division par l'ancien idf), multipliés par
+    le nouvel idf, puis renormalisés comme le ferait le vectorizer.
+
+    Args:
+        vectorizer: TfidfVectorizer du modèle
+        tfidf_matrix: Matrice TF-IDF CSR des offres vivantes
+
+    Returns:
+        tuple: (vectorizer avec le nouvel idf, matrice re-pondérée)
+    """
+
+    if not getattr(vectorizer, 'use_idf', True):
+        return vectorizer, tfidf_matrix
+
+    n_documents, n_features = tfidf_matrix.shape
+    document_counts = np.bincount(tfidf_matrix.indices, minlength=n_features)
+    smooth = int(vectorizer.smooth_idf)
+    idf = np.log((n_documents + smooth) / (document_counts.astype(np.float64) + smooth)) + 1
+
+    matrix = tfidf_matrix.astype(np.float64, copy=True)
+    matrix.data = matrix.data / vectorizer.idf_[matrix.indices] * idf[matrix.indices]
+    if vectorizer.norm:
+        matrix = normalize(matrix, norm=vectorizer.norm, copy=False)
+
+    refreshed = clone(vectorizer)
+    refreshed.vocabulary_ = vectorizer.vocabulary_
+    refreshed.idf_ = idf
+    return refreshed, matrix.astype(tfidf_matrix.dtype, copy=False)
+
+
+def compact(model_dir, refresh=True, block_rows=CHUNK_SIZE):
+    """
+    Fusionne la base et les segments delta en une nouvelle base
+
+    L'instantané courant reste servi pendant la compaction ; le nouveau est
+    publié par remplacement atomique du manifeste, puis les fichiers de
+    l'ancien sont supprimés (les processus qui les ont mappés les gardent
+    lisibles jusqu'à leur rechargement). Les quasi-doublons venus de
+    livraisons différentes sont regroupés à cette occasion.
+
+    Args:
+        model_dir (str): Dossier du modèle
+        refresh (bool): Recalculer l'idf sur les offres vivantes
+        block_rows (int): Nombre de lignes écrites par bloc
+
+    Returns:
+        dict: Instantané publié et nombre d'offres
+    """
+
+    with update_lock(model_dir):
+        manifest = read_manifest(model_dir)
+        snapshot = manifest.get('snapshot', 0) + 1
+        vectorizer, tfidf_matrix, jobs, metadata, _ = load_model(model_dir)
+
+        # Quasi-doublons de tout l'instantané (base et segments)
+        rows = np.arange(len(jobs))
+        duplicates = None
+        threshold = dedup_threshold(manifest)
+        if threshold:
+            duplicates = find_near_duplicates(
+                (jobs.take(rows[start:start + block_rows]) for start in range(0, len(rows), block_rows)),
+                threshold
+            )
+            rows = duplicates.representative_rows()
+            tfidf_matrix = tfidf_matrix[rows]
+        else:
+            # Base et segments réunis en une seule matrice
+            tfidf_matrix = tfidf_matrix.tocsr()
+        if refresh:
+            vectorizer, tfidf_matrix = refresh_idf(vectorizer, tfidf_matrix)
+
+        name = f"{GENERATIONS_DIR}/{snapshot:06d}"
+        generation_dir = os.path.join(model_dir, name)
+        tmp_dir = f"{generation_dir}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        metadata = dict(metadata, n_jobs=len(rows), vocabulary_size=len(vectorizer.vocabulary_),
+                        compacted_at=pd.Timestamp.now().isoformat())
+        if duplicates is not None:
+            metadata['near_duplicates'] = {'threshold': threshold, 'removed': duplicates.n_hidden}
+        metadata.pop('snapshot', None)
+        metadata.pop('updated_at', None)
+
+        writer = ModelWriter(tmp_dir, vectorizer, **matrix_options(manifest))
+        for start in range(0, len(rows), block_rows):
+            positions = np.arange(start, min(start + block_rows, len(rows)))
+            block_jobs = jobs.take(rows[positions])
+            if duplicates is not None:
+                block_jobs = duplicates.annotate(block_jobs, rows[positions])
+            writer.append(tfidf_matrix[positions], block_jobs)
+        writer.close(metadata)
+        os.replace(tmp_dir, generation_dir)
+
+        # Publication : le manifeste racine pointe vers la nouvelle base
+        compacted = read_manifest(generation_dir)
+        compacted.update(base=name, segments=[], snapshot=snapshot,
+                         updated_at=pd.Timestamp.now().isoformat())
+        write_manifest(model_dir, compacted)
+
+        # Nettoyage de l'instantané précédent
+        obsolete = list(manifest.get('segments', []))
+        if manifest.get('base', '.') == '.':
+            obsolete.extend(ROOT_BASE_DIRS)
+        else:
+            obsolete.append(manifest['base'])
+        for path in obsolete:
+            shutil.rmtree(os.path.join(model_dir, path), ignore_errors=True)
+        segments_dir = os.path.join(model_dir, SEGMENTS_DIR)
+        if os.path.isdir(segments_dir) and not os.listdir(segments_dir):
+            os.rmdir(segments_dir)
+
+    return {'snapshot': snapshot, 'n_jobs': len(rows)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mises à jour incrémentales du modèle")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    apply_parser = subparsers.add_parser('apply', help="Ajouter une livraison comme segment delta")
+    apply_parser.add_argument('model_dir')
+    apply_parser.add_argument('dataset_dir', help="Dossier au format dataset/ (job_postings.csv, ...)")
+    apply_parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    apply_parser.add_argument('--compact', action='store_true',
+                              help=f"Compacter ensuite si plus de {MAX_SEGMENTS} segments")
+
+    compact_parser = subparsers.add_parser('compact', help="Fusionner les segments dans une nouvelle base")
+    compact_parser.add_argument('model_dir')
+    compact_parser.add_argument('--keep-idf', action='store_true', help="Ne pas recalculer l'idf")
+
+    args = parser.parse_args()
+    start = time.perf_counter()
+
+    if args.command == 'apply':
+        report = apply_delta(args.model_dir, args.dataset_dir, args.chunk_size)
+        print(f"✅ Instantané {report['snapshot']} publié en {time.perf_counter() - start:.1f} s : "
+              f"{report['added']:,} offres ajoutées, {report['closed']:,} fermées "
+              f"({report['segments']} segments)")
+        if report['duplicates']:
+            print(f"🪞 {report['duplicates']:,} offres quasi dupliquées regroupées")
+        check = check_snapshot(args.model_dir)
+        if check['mismatches']:
+            print(f"⚠️ Instantané incohérent : {len(check['mismatches']):,} positions relues "
+                  f"ne correspondent pas à leur offre (ex. {check['mismatches'][:5]})")
+        if report['segments'] > MAX_SEGMENTS:
+            if args.compact:
+                args.keep_idf = False
+                args.command = 'compact'
+                start = time.perf_counter()
+            else:
+                print(f"💡 Plus de {MAX_SEGMENTS} segments : lancer 'python update_model.py compact {args.model_dir}'")
+
+    if args.command == 'compact':
+        report = compact(args.model_dir, refresh=not args.keep_idf)
+        print(f"✅ Instantané {report['snapshot']} compacté en {time.perf_counter() - start:.1f} s "
+              f"({report['n_jobs']:,} offres)")
+
+
+if __name__ == "__main__":
+    main()